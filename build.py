@@ -11,14 +11,18 @@ except ImportError:
 # Cython is installed. Compile
 else:
     from setuptools import Extension
-    from setuptools.dist import Distribution
-    from distutils.command.build_ext import build_ext
+    from setuptools.command.build_ext import build_ext
 
     # This function will be executed in setup.py:
     def build(setup_kwargs):
         # The file you want to compile
         extensions = [
-            "high_order_spectra_analysis/time_domain_trispectrum/tdts_cython.pyx"
+            Extension(
+                "high_order_spectra_analysis.engines.native",
+                ["high_order_spectra_analysis/engines/native.pyx"],
+                extra_compile_args=["-fopenmp"],
+                extra_link_args=["-fopenmp"],
+            )
         ]
 
         # gcc arguments hack: enable optimizations
@@ -29,7 +33,6 @@ else:
             'ext_modules': cythonize(
                 extensions,
                 language_level=3,
-                compiler_directives={'linetrace': True},
             ),
             'cmdclass': {'build_ext': build_ext}
-        })
\ No newline at end of file
+        })
@@ -0,0 +1,4 @@
+from high_order_spectra_analysis.benchmarks.suite import main
+
+
+raise SystemExit(main())
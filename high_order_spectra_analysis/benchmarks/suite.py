@@ -0,0 +1,303 @@
+import argparse
+import importlib.metadata
+import itertools
+import json
+import os
+import platform
+import sys
+import time as timer
+import tracemalloc
+from collections.abc import Callable
+from datetime import datetime, timezone
+
+import numpy as np
+from high_order_spectra_analysis.engines.dispatch import ENGINES, native_projections
+from high_order_spectra_analysis.time_domain_spectrum.tds import tds
+from high_order_spectra_analysis.time_domain_spectrum.tds_parallel import tds as tds_parallel
+from high_order_spectra_analysis.time_domain_bispectrum.tdbs import tdbs
+from high_order_spectra_analysis.time_domain_trispectrum.tdts import tdts
+from high_order_spectra_analysis.time_domain_tetraspectrum.tdqs import tdqs
+from high_order_spectra_analysis.time_domain_high_order_spectra.tdhos import tdhos
+
+
+# Largest error allowed against the reference, relative to the largest reference amplitude
+TOLERANCES = {"float64": 1e-9, "float32": 1e-3}
+
+FUNCTIONS = ("tds", "tds_parallel", "tdbs", "tdts", "tdqs", "tdhos")
+
+# Engine of the reference results, run in float64
+REFERENCE_ENGINE = "analytic"
+
+
+def quadratic_phase_coupled(
+    signal_length: int,
+    frequency_sampling: float,
+    first_frequency: float | None = None,
+    second_frequency: float | None = None,
+    noise: float = 0.1,
+    seed: int = 0
+) -> np.ndarray:
+    """Synthetic signal with quadratic phase coupling: cosines at f1, f2 and f1 + f2, whose phases add up, in white noise
+
+    Args:
+        signal_length (int): Number of samples.
+        frequency_sampling (float): Frequency sampling of the signal.
+        first_frequency (float | None, optional): f1. Defaults to None, 0.11*frequency_sampling.
+        second_frequency (float | None, optional): f2. Defaults to None, 0.17*frequency_sampling.
+        noise (float, optional): Standard deviation of the noise. Defaults to 0.1.
+        seed (int, optional): Seed of the phases and of the noise. Defaults to 0.
+
+    Returns:
+        np.ndarray: the signal
+    """
+
+    first_frequency = 0.11*frequency_sampling if first_frequency is None else first_frequency
+    second_frequency = 0.17*frequency_sampling if second_frequency is None else second_frequency
+
+    rng = np.random.default_rng(seed)
+    first_phase, second_phase = rng.uniform(0, 2*np.pi, 2)
+    time = np.arange(signal_length)/frequency_sampling
+
+    return (
+        np.cos(2*np.pi*first_frequency*time + first_phase)
+        + np.cos(2*np.pi*second_frequency*time + second_phase)
+        + np.cos(2*np.pi*(first_frequency + second_frequency)*time + first_phase + second_phase)
+        + noise*rng.standard_normal(signal_length)
+    )
+
+
+def available_engines() -> tuple[str, ...]:
+    """Engines that can run here: every engine but "auto", and "native" only when it is built
+
+    Returns:
+        tuple[str, ...]: engine names
+    """
+
+    return tuple(engine for engine in ENGINES if engine != "auto" and (engine != "native" or native_projections is not None))
+
+
+def _implementation(
+    function: str,
+    engine: str,
+    orders: tuple[int, ...]
+) -> Callable[..., list[np.ndarray]]:
+    """Callable computing the amplitudes of one implementation, from (signal, frequency_sampling, **grid)"""
+
+    options = dict(enable_progress_bar=False, engine=engine)
+
+    if function == "tds_parallel":
+        return lambda signal, fs, dtype, **grid: [tds_parallel(signal, fs, **grid)[1]]
+
+    if function == "tdhos":
+        return lambda signal, fs, dtype, **grid: list(tdhos(signal, fs, dtype=dtype, orders=orders, **grid, **options)[1])
+
+    spectra, amplitude_indices = {
+        "tds": (tds, (1,)),
+        "tdbs": (tdbs, (1, 3)),
+        "tdts": (tdts, (1, 3, 5)),
+        "tdqs": (tdqs, (1, 3, 5, 7))
+    }[function]
+
+    def run(signal, fs, dtype, **grid):
+        result = spectra(signal, fs, dtype=dtype, **grid, **options)
+        return [result[index] for index in amplitude_indices]
+
+    return run
+
+
+def _orders(
+    function: str,
+    order_set: tuple[int, ...]
+) -> tuple[int, ...]:
+    return {"tds": (1,), "tds_parallel": (1,), "tdbs": (1, 2), "tdts": (1, 2, 3), "tdqs": (1, 2, 3, 4)}.get(function, order_set)
+
+
+def _measure(
+    run: Callable[[], list[np.ndarray]],
+    repeat: int,
+    track_memory: bool
+) -> tuple[list[np.ndarray], float, int | None]:
+    """Best wall time over repeat runs, and the peak of traced memory of one more run"""
+
+    wall_time = np.inf
+    for _ in range(repeat):
+        start = timer.perf_counter()
+        amplitudes = run()
+        wall_time = min(wall_time, timer.perf_counter() - start)
+
+    peak_memory = None
+    if track_memory:
+        tracemalloc.start()
+        try:
+            run()
+            peak_memory = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+
+    return amplitudes, wall_time, peak_memory
+
+
+def run_benchmarks(
+    functions: tuple[str, ...] = FUNCTIONS,
+    engines: tuple[str, ...] | None = None,
+    lengths: tuple[int, ...] = (1000, 4000),
+    frequencies: tuple[int, ...] = (100, 1000),
+    phase_steps: tuple[float, ...] = (1e-2,),
+    dtypes: tuple[str, ...] = ("float64", "float32"),
+    order_sets: tuple[tuple[int, ...], ...] = ((1, 2), (1, 2, 3, 4)),
+    frequency_sampling: float = 1000.0,
+    repeat: int = 3,
+    max_scan_work: float = 1e8,
+    track_memory: bool = True,
+    seed: int = 0
+) -> dict:
+    """Time, throughput, peak memory and accuracy of every implementation and engine over a sweep of problem sizes
+
+    Every case runs on a quadratic phase coupled signal, and its amplitudes are compared
+    with those of the float64 "analytic" engine on the same frequency and phase grids,
+    against the tolerance of its dtype in TOLERANCES. The throughput is in samples times
+    frequency bins per second, the wall time is the best of repeat runs and the peak
+    memory is the peak traced by tracemalloc in one more run, which does not include
+    the memory of worker processes.
+
+    Args:
+        functions (tuple[str, ...], optional): Implementations to run, from FUNCTIONS. Defaults to FUNCTIONS.
+        engines (tuple[str, ...] | None, optional): Engines to run. Defaults to None, every available engine.
+        lengths (tuple[int, ...], optional): Signal lengths. Defaults to (1000, 4000).
+        frequencies (tuple[int, ...], optional): Numbers of frequency bins between 1 Hz and the Nyquist frequency. Defaults to (100, 1000).
+        phase_steps (tuple[float, ...], optional): Phase steps. Defaults to (1e-2,).
+        dtypes (tuple[str, ...], optional): Precisions. Defaults to ("float64", "float32").
+        order_sets (tuple[tuple[int, ...], ...], optional): Orders of the "tdhos" runs. Defaults to ((1, 2), (1, 2, 3, 4)).
+        frequency_sampling (float, optional): Frequency sampling of the signals. Defaults to 1000.0.
+        repeat (int, optional): Timed runs per case. Defaults to 3.
+        max_scan_work (float, optional): Skip "scan" cases above this number of samples*frequencies*phases. Defaults to 1e8.
+        track_memory (bool, optional): Measure the peak memory. Defaults to True.
+        seed (int, optional): Seed of the signals. Defaults to 0.
+
+    Returns:
+        dict: "metadata" of the run and one entry of "results" per case
+    """
+
+    engines = available_engines() if engines is None else engines
+    results = []
+
+    for signal_length, frequency_length, phase_step in itertools.product(lengths, frequencies, phase_steps):
+        signal = quadratic_phase_coupled(signal_length, frequency_sampling, seed=seed)
+
+        fmin = 1.0
+        fmax = np.floor(frequency_sampling/2) - 1
+        grid = dict(fmin=fmin, fmax=fmax, freq_step=(fmax - fmin)/frequency_length, phase_step=phase_step)
+
+        for function in functions:
+            for order_set in (order_sets if function == "tdhos" else order_sets[:1]):
+                orders = _orders(function, order_set)
+                reference = np.array(_implementation(function, REFERENCE_ENGINE, orders)(signal, frequency_sampling, np.float64, **grid))
+                scale = np.max(np.abs(reference), axis=-1, keepdims=True)
+
+                for engine, dtype in itertools.product(("parallel",) if function == "tds_parallel" else engines, dtypes):
+                    if function == "tds_parallel" and dtype != "float64":
+                        continue
+
+                    case = dict(
+                        function=function,
+                        engine=engine,
+                        dtype=dtype,
+                        orders=list(orders),
+                        signal_length=signal_length,
+                        frequency_length=reference.shape[-1],
+                        phase_step=phase_step
+                    )
+
+                    work = signal_length*reference.shape[-1]*np.ceil(2*np.pi/phase_step)
+                    if engine == "scan" and work > max_scan_work:
+                        results.append(dict(case, skipped=f"scan work {work:.3g} above max_scan_work"))
+                        continue
+
+                    run = _implementation(function, engine, orders)
+                    amplitudes, wall_time, peak_memory = _measure(
+                        lambda: run(signal, frequency_sampling, getattr(np, dtype), **grid),
+                        repeat,
+                        track_memory
+                    )
+
+                    error = float(np.max(np.abs(np.array(amplitudes, dtype=np.float64) - reference)/scale))
+
+                    results.append(dict(
+                        case,
+                        wall_time=wall_time,
+                        throughput=signal_length*reference.shape[-1]/wall_time,
+                        peak_memory_bytes=peak_memory,
+                        max_relative_error=error,
+                        tolerance=TOLERANCES[dtype],
+                        passed=error <= TOLERANCES[dtype]
+                    ))
+
+    try:
+        version = importlib.metadata.version("high-order-spectra-analysis")
+    except importlib.metadata.PackageNotFoundError:
+        version = None
+
+    metadata = dict(
+        timestamp=datetime.now(timezone.utc).isoformat(),
+        version=version,
+        python=sys.version,
+        numpy=np.__version__,
+        platform=platform.platform(),
+        cpu_count=os.cpu_count(),
+        native_built=native_projections is not None,
+        frequency_sampling=frequency_sampling,
+        repeat=repeat,
+        seed=seed,
+        tolerances=TOLERANCES,
+        reference_engine=REFERENCE_ENGINE
+    )
+
+    return dict(metadata=metadata, results=results)
+
+
+def main(argv: list[str] | None = None) -> int:
+    """Run the benchmarks from the command line and write the results as JSON
+
+    Returns:
+        int: exit status, 1 when any case is outside its tolerance
+    """
+
+    parser = argparse.ArgumentParser(description="Benchmark and accuracy check of the time domain high order spectra implementations")
+    parser.add_argument("--functions", nargs="+", default=FUNCTIONS, choices=FUNCTIONS)
+    parser.add_argument("--engines", nargs="+", default=None, choices=available_engines())
+    parser.add_argument("--lengths", nargs="+", type=int, default=(1000, 4000))
+    parser.add_argument("--frequencies", nargs="+", type=int, default=(100, 1000))
+    parser.add_argument("--phase-steps", nargs="+", type=float, default=(1e-2,))
+    parser.add_argument("--dtypes", nargs="+", default=("float64", "float32"), choices=tuple(TOLERANCES))
+    parser.add_argument("--orders", nargs="+", default=("1,2", "1,2,3,4"), help="order sets of the tdhos runs, as comma separated orders")
+    parser.add_argument("--frequency-sampling", type=float, default=1000.0)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--max-scan-work", type=float, default=1e8)
+    parser.add_argument("--no-memory", action="store_true", help="do not trace the peak memory")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", default="-", help="JSON file to write, '-' for the standard output")
+    arguments = parser.parse_args(argv)
+
+    report = run_benchmarks(
+        functions=tuple(arguments.functions),
+        engines=None if arguments.engines is None else tuple(arguments.engines),
+        lengths=tuple(arguments.lengths),
+        frequencies=tuple(arguments.frequencies),
+        phase_steps=tuple(arguments.phase_steps),
+        dtypes=tuple(arguments.dtypes),
+        order_sets=tuple(tuple(int(order) for order in order_set.split(",")) for order_set in arguments.orders),
+        frequency_sampling=arguments.frequency_sampling,
+        repeat=arguments.repeat,
+        max_scan_work=arguments.max_scan_work,
+        track_memory=not arguments.no_memory,
+        seed=arguments.seed
+    )
+
+    if arguments.output == "-":
+        json.dump(report, sys.stdout, indent=2)
+        sys.stdout.write("\n")
+    else:
+        with open(arguments.output, "w") as file:
+            json.dump(report, file, indent=2)
+
+    return int(any(result.get("passed") is False for result in report["results"]))
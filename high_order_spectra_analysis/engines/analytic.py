@@ -0,0 +1,146 @@
+import numpy as np
+from high_order_spectra_analysis.engines.telemetry import Monitor, timed
+
+
+def direct_projections(
+    powers: np.ndarray,
+    time: np.ndarray,
+    frequency_array: np.ndarray,
+    monitor: Monitor | None = None
+) -> np.ndarray:
+    """Complex projections of the signal powers over a frequency array
+
+    Evaluates Z[k, i] = mean(powers[k] * exp(1j*2*pi*frequency_array[i]*time)), so that
+    mean(powers[k] * cos(2*pi*f*t + phi)) = Re(Z[k, i] * exp(1j*phi)) for every phase phi.
+
+    Args:
+        powers (np.ndarray): Signal powers, with shape (orders, samples).
+        time (np.ndarray): Time array of the samples.
+        frequency_array (np.ndarray): Frequencies to project onto.
+        monitor (Monitor | None, optional): Receiver of the progress and of the stage timings. Defaults to None.
+
+    Returns:
+        np.ndarray: complex projections, with shape (orders, frequencies)
+    """
+
+    powers = np.atleast_2d(powers)
+    time = np.asarray(time, dtype=np.float64)
+
+    projections = np.zeros((powers.shape[0], len(frequency_array)), dtype=np.complex128)
+
+    for i, freq in enumerate(frequency_array):
+
+        with timed(monitor, "basis"):
+            basis = np.exp(2j*np.pi*np.float64(freq)*time)
+
+        with timed(monitor, "reduction"):
+            projections[:, i] = powers @ basis
+
+        if monitor is not None:
+            monitor.advance()
+
+    return projections/powers.shape[1]
+
+
+def _evaluate(
+    first_harmonic: np.ndarray,
+    second_harmonic: np.ndarray,
+    phi: np.ndarray
+) -> np.ndarray:
+    # g(phi) = Re(c1*exp(1j*phi)) + Re(c2*exp(2j*phi))
+    return (
+        np.real(first_harmonic[:, None]*np.exp(1j*phi))
+        + np.real(second_harmonic[:, None]*np.exp(2j*phi))
+    )
+
+
+def _critical_phases(
+    first_harmonic: np.ndarray,
+    second_harmonic: np.ndarray
+) -> np.ndarray:
+    # Stationary points of g(phi) are the unit circle roots of
+    # 2*c2*z^4 + c1*z^3 - conj(c1)*z - 2*conj(c2), with z = exp(1j*phi)
+    leading = 2*second_harmonic
+    valid = leading != 0
+    safe_leading = np.where(valid, leading, 1)
+
+    companion = np.zeros((len(first_harmonic), 4, 4), dtype=np.complex128)
+    companion[:, 1, 0] = 1
+    companion[:, 2, 1] = 1
+    companion[:, 3, 2] = 1
+    companion[:, 0, 3] = 2*np.conj(second_harmonic)/safe_leading
+    companion[:, 1, 3] = np.conj(first_harmonic)/safe_leading
+    companion[:, 3, 3] = -first_harmonic/safe_leading
+
+    roots = np.linalg.eigvals(companion)
+    phases = np.mod(np.angle(roots), 2*np.pi)
+    phases[~valid] = np.mod(-np.angle(first_harmonic[~valid]), 2*np.pi)[:, None]
+
+    return phases
+
+
+def maximize_phase(
+    first_harmonic: np.ndarray | None,
+    second_harmonic: np.ndarray | None = None,
+    phi_array: np.ndarray | None = None
+) -> tuple[np.ndarray, np.ndarray]:
+    """Closed-form maximization of Re(c1*exp(1j*phi)) + Re(c2*exp(2j*phi)) over the phase
+
+    Replaces the brute-force scan over phi_array: a pure first harmonic peaks at -angle(c1),
+    a pure second harmonic at -angle(c2)/2, and the mixed case at one of the roots of a
+    quartic polynomial, which are solved for every frequency at once.
+
+    Args:
+        first_harmonic (np.ndarray | None): Complex coefficients c1 of exp(1j*phi), one per frequency.
+        second_harmonic (np.ndarray | None, optional): Complex coefficients c2 of exp(2j*phi), one per frequency. Defaults to None.
+        phi_array (np.ndarray | None, optional): Uniform phase grid starting at zero, as scanned by the brute-force
+            implementations. When given, the maximum is taken over this grid, otherwise the exact phase is returned. Defaults to None.
+
+    Returns:
+        tuple[np.ndarray, np.ndarray]: maximum amplitude array, phase array
+    """
+
+    if first_harmonic is None and second_harmonic is None:
+        raise ValueError("At least one of first_harmonic and second_harmonic must be given")
+
+    length = len(first_harmonic) if first_harmonic is not None else len(second_harmonic)
+    first_harmonic = np.zeros(length, dtype=np.complex128) if first_harmonic is None else np.asarray(first_harmonic, dtype=np.complex128)
+    second_harmonic = np.zeros(length, dtype=np.complex128) if second_harmonic is None else np.asarray(second_harmonic, dtype=np.complex128)
+
+    if not np.any(second_harmonic):
+        candidates = np.mod(-np.angle(first_harmonic), 2*np.pi)[:, None]
+    elif not np.any(first_harmonic):
+        candidates = np.mod(-np.angle(second_harmonic), 2*np.pi)[:, None]/2
+        candidates = np.hstack([candidates, candidates + np.pi])
+    else:
+        candidates = np.hstack([
+            _critical_phases(first_harmonic, second_harmonic),
+            np.mod(-np.angle(first_harmonic), 2*np.pi)[:, None]
+        ])
+
+    if phi_array is None:
+        values = _evaluate(first_harmonic, second_harmonic, candidates)
+        # Ties resolve to the smallest phase, as the scan keeps the first maximum
+        order = np.argsort(candidates, axis=1)
+        candidates = np.take_along_axis(candidates, order, axis=1)
+        values = np.take_along_axis(values, order, axis=1)
+        best = np.argmax(values, axis=1)[:, None]
+        return (
+            np.take_along_axis(values, best, axis=1).reshape(-1),
+            np.take_along_axis(candidates, best, axis=1).reshape(-1)
+        )
+
+    phase_length = len(phi_array)
+    phase_step = (np.float64(phi_array[-1]) - np.float64(phi_array[0]))/(phase_length - 1) if phase_length > 1 else 2*np.pi
+
+    lower = np.clip(np.floor(candidates/phase_step).astype(np.int64), 0, phase_length - 1)
+    indexes = np.sort(np.hstack([lower, np.mod(lower + 1, phase_length)]), axis=1)
+
+    grid = np.asarray(phi_array)
+    values = _evaluate(first_harmonic, second_harmonic, grid[indexes].astype(np.float64))
+    best = np.argmax(values, axis=1)[:, None]
+
+    return (
+        np.take_along_axis(values, best, axis=1).reshape(-1),
+        grid[np.take_along_axis(indexes, best, axis=1).reshape(-1)]
+    )
@@ -0,0 +1,166 @@
+from typing import Hashable
+
+import numpy as np
+from high_order_spectra_analysis.engines.cache import BasisCache
+from high_order_spectra_analysis.engines.telemetry import Monitor, timed
+
+
+DEFAULT_MAX_MEMORY_BYTES = 256*2**20
+# Samples per matrix product below float64, whose dot products are accumulated in float64
+SUMMATION_BLOCK = 2**12
+
+
+def tile_shape(
+    orders: int,
+    signal_length: int,
+    frequency_length: int,
+    dtype: np.dtype = np.float64,
+    max_memory_bytes: int = DEFAULT_MAX_MEMORY_BYTES,
+    max_samples: int | None = None
+) -> tuple[int, int]:
+    """Largest (frequencies, samples) tile that fits in the memory budget
+
+    A tile of B frequencies and T samples holds the float64 phase argument, the cos
+    and sin bases in dtype and a dtype copy of the T samples of every order, that is
+    B*T*(8 + 2*itemsize) + orders*T*itemsize bytes. Whole rows of samples are
+    preferred; the time axis is only split when a single frequency does not fit, or
+    past max_samples.
+
+    Args:
+        orders (int): Number of signal powers reduced against each tile.
+        signal_length (int): Number of samples N.
+        frequency_length (int): Number of frequencies F.
+        dtype (np.dtype, optional): Precision of the tiles. Defaults to np.float64.
+        max_memory_bytes (int, optional): Memory budget of a tile. Defaults to DEFAULT_MAX_MEMORY_BYTES.
+        max_samples (int | None, optional): Largest number of samples per tile. Defaults to None, no limit.
+
+    Returns:
+        tuple[int, int]: number of frequencies and number of samples per tile
+    """
+
+    itemsize = np.dtype(dtype).itemsize
+    cell_bytes = 8 + 2*itemsize
+    column_bytes = orders*itemsize
+
+    samples = min(signal_length, max(1, max_memory_bytes//(cell_bytes + column_bytes)))
+    samples = samples if max_samples is None else min(samples, max_samples)
+    frequencies = max(1, (max_memory_bytes - column_bytes*samples)//(cell_bytes*samples))
+
+    return min(frequencies, max(frequency_length, 1)), samples
+
+
+def _basis_tile(
+    frequencies: np.ndarray,
+    time: np.ndarray,
+    argument: np.ndarray,
+    cos_tile: np.ndarray,
+    sin_tile: np.ndarray
+) -> tuple[np.ndarray, np.ndarray]:
+    # Phase argument in turns, reduced to [0, 1) in float64 before the trigonometric evaluation
+    np.multiply.outer(frequencies, time, out=argument)
+    np.mod(argument, 1, out=argument)
+    argument *= 2*np.pi
+
+    # The reduced argument is cast once, so that cos and sin run in the precision of the tile
+    np.copyto(cos_tile, argument, casting="same_kind")
+    np.sin(cos_tile, out=sin_tile)
+    np.cos(cos_tile, out=cos_tile)
+
+    return cos_tile, sin_tile
+
+
+def blocked_projections(
+    powers: np.ndarray,
+    time: np.ndarray,
+    frequency_array: np.ndarray,
+    dtype: np.dtype = np.float64,
+    max_memory_bytes: int | None = None,
+    monitor: Monitor | None = None,
+    cache: BasisCache | None = None,
+    cache_key: Hashable | None = None
+) -> np.ndarray:
+    """Complex projections of the signal powers, reduced one frequency tile at a time with matrix products
+
+    Each tile builds the cos and sin bases of a block of frequencies and reduces every
+    order against them with a single matrix multiply, so the work runs in BLAS instead
+    of a Python loop over the frequencies. Below float64, the time axis is split every
+    SUMMATION_BLOCK samples and the partial products are accumulated in float64, so the
+    rounding error does not grow with the length of the signal.
+
+    Args:
+        powers (np.ndarray): Signal powers, with shape (orders, samples).
+        time (np.ndarray): Time array of the samples.
+        frequency_array (np.ndarray): Frequencies to project onto.
+        dtype (np.dtype, optional): Precision of the basis tiles and of the matrix products. Defaults to np.float64.
+        max_memory_bytes (int | None, optional): Memory budget of a tile. Defaults to None, which uses DEFAULT_MAX_MEMORY_BYTES.
+        monitor (Monitor | None, optional): Receiver of the progress and of the stage timings. Defaults to None.
+        cache (BasisCache | None, optional): Cache keeping the basis tiles between calls. Defaults to None.
+        cache_key (Hashable | None, optional): Key identifying the time and frequency arrays in the cache. Defaults to None.
+
+    Returns:
+        np.ndarray: complex projections, with shape (orders, frequencies)
+    """
+
+    powers = np.atleast_2d(powers)
+    time = np.asarray(time, dtype=np.float64)
+    frequency_array = np.asarray(frequency_array, dtype=np.float64)
+    max_memory_bytes = DEFAULT_MAX_MEMORY_BYTES if max_memory_bytes is None else max_memory_bytes
+
+    orders, signal_length = powers.shape
+    frequency_length = len(frequency_array)
+
+    block_frequencies, block_samples = tile_shape(
+        orders,
+        signal_length,
+        frequency_length,
+        dtype,
+        max_memory_bytes,
+        max_samples=None if np.dtype(dtype).itemsize >= 8 else SUMMATION_BLOCK
+    )
+
+    in_phase = np.zeros((orders, frequency_length))
+    quadrature = np.zeros((orders, frequency_length))
+
+    argument = np.empty((block_frequencies, block_samples))
+    if cache is None:
+        cos_tile = np.empty((block_frequencies, block_samples), dtype=dtype)
+        sin_tile = np.empty((block_frequencies, block_samples), dtype=dtype)
+
+    for start in range(0, frequency_length, block_frequencies):
+        stop = min(start + block_frequencies, frequency_length)
+        rows = stop - start
+
+        for time_start in range(0, signal_length, block_samples):
+            time_stop = min(time_start + block_samples, signal_length)
+            columns = time_stop - time_start
+
+            frequencies = frequency_array[start:stop]
+            samples_time = time[time_start:time_stop]
+            block_argument = argument[:rows, :columns]
+
+            with timed(monitor, "basis"):
+                if cache is None:
+                    block_cos, block_sin = _basis_tile(
+                        frequencies, samples_time, block_argument, cos_tile[:rows, :columns], sin_tile[:rows, :columns]
+                    )
+                else:
+                    block_cos, block_sin = cache.get(
+                        ("blocked", cache_key, np.dtype(dtype).str, start, stop, time_start, time_stop),
+                        lambda: _basis_tile(
+                            frequencies,
+                            samples_time,
+                            block_argument,
+                            np.empty((rows, columns), dtype=dtype),
+                            np.empty((rows, columns), dtype=dtype)
+                        )
+                    )
+
+            with timed(monitor, "reduction"):
+                block_powers = np.asarray(powers[:, time_start:time_stop], dtype=dtype)
+                in_phase[:, start:stop] += block_powers @ block_cos.T
+                quadrature[:, start:stop] += block_powers @ block_sin.T
+
+        if monitor is not None:
+            monitor.advance(rows)
+
+    return (in_phase + 1j*quadrature)/signal_length
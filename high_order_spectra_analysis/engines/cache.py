@@ -0,0 +1,321 @@
+import hashlib
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+from typing import Callable, Hashable
+
+import numpy as np
+
+
+DEFAULT_CACHE_BYTES = 256*2**20
+DEFAULT_RESULT_CACHE_BYTES = 4*2**30
+
+# Part of every result cache key: bump it whenever a change alters the computed spectra
+ENGINE_VERSION = 1
+
+
+def array_key(
+    array: np.ndarray,
+    grid: tuple[float, float] | None = None
+) -> tuple:
+    """Hashable description of a time or frequency array
+
+    Args:
+        array (np.ndarray): Time or frequency array.
+        grid (tuple[float, float] | None, optional): Start and step the array was generated from, which avoids hashing its content. Defaults to None.
+
+    Returns:
+        tuple: key identifying the array values
+    """
+
+    array = np.asarray(array)
+
+    if grid is not None:
+        return ("grid", float(grid[0]), float(grid[1]), len(array))
+
+    digest = hashlib.blake2b(np.ascontiguousarray(array).view(np.uint8), digest_size=16).hexdigest()
+
+    return ("array", array.dtype.str, array.shape, digest)
+
+
+def signal_digest(
+    signal: np.ndarray,
+    block_size: int = 2**20
+) -> str:
+    """Hash of the shape, dtype and values of a signal, read block by block along its time (last) axis
+
+    Args:
+        signal (np.ndarray): Signal, possibly memory mapped.
+        block_size (int, optional): Samples per hashed block, which bounds the memory of a non-contiguous signal. Defaults to 2**20.
+
+    Returns:
+        str: hexadecimal digest
+    """
+
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(repr((signal.shape, signal.dtype.str)).encode())
+
+    for start in range(0, signal.shape[-1], block_size):
+        digest.update(np.ascontiguousarray(signal[..., start:start + block_size]).view(np.uint8))
+
+    return digest.hexdigest()
+
+
+class BasisCache:
+    """Least recently used cache of basis tables, bounded in bytes
+
+    Holds tuples of arrays (cos/sin basis tiles, chirp-z twiddles) between calls that
+    share the sampling rate, signal length, frequency grid and dtype. Cached arrays are
+    read-only, and a table larger than the whole budget is computed but never stored.
+
+    Args:
+        max_bytes (int, optional): Largest total size of the cached arrays. Defaults to DEFAULT_CACHE_BYTES.
+    """
+
+    def __init__(self, max_bytes: int = DEFAULT_CACHE_BYTES):
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.current_bytes = 0
+        self._entries: OrderedDict[Hashable, tuple[np.ndarray, ...]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(
+        self,
+        key: Hashable,
+        factory: Callable[[], tuple[np.ndarray, ...]]
+    ) -> tuple[np.ndarray, ...]:
+        """Cached table for a key, computed by the factory on a miss
+
+        Args:
+            key (Hashable): Key of the table.
+            factory (Callable[[], tuple[np.ndarray, ...]]): Computes the table.
+
+        Returns:
+            tuple[np.ndarray, ...]: the table
+        """
+
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._entries[key]
+            self.misses += 1
+
+        value = tuple(factory())
+        size = sum(array.nbytes for array in value)
+
+        if size > self.max_bytes:
+            return value
+
+        for array in value:
+            array.setflags(write=False)
+
+        with self._lock:
+            if key not in self._entries:
+                self._entries[key] = value
+                self.current_bytes += size
+
+            while self.current_bytes > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self.current_bytes -= sum(array.nbytes for array in evicted)
+
+        return value
+
+    def clear(self) -> None:
+        """Drop every cached table and reset the counters"""
+
+        with self._lock:
+            self._entries.clear()
+            self.current_bytes = 0
+            self.hits = 0
+            self.misses = 0
+
+
+class ResultCache:
+    """Content-addressed cache of computed spectra in a local directory, bounded in bytes
+
+    Every entry is one .npy file named after the hash of everything the spectra depend on
+    (see key), so a hit is memory mapped instead of read. Entries are written to a
+    temporary file and renamed into place, which is atomic, so concurrent writers of the
+    same key and readers never see a partial file. Hits refresh the modification time
+    of the entry, and the least recently used entries are removed when the directory
+    grows past max_bytes; an entry larger than the whole budget is never stored.
+
+    Args:
+        directory (str | os.PathLike): Directory of the cache, created if needed.
+        max_bytes (int, optional): Largest total size of the cached files. Defaults to DEFAULT_RESULT_CACHE_BYTES.
+    """
+
+    suffix = ".npy"
+
+    def __init__(
+        self,
+        directory: str | os.PathLike,
+        max_bytes: int = DEFAULT_RESULT_CACHE_BYTES
+    ):
+        self.directory = os.fspath(directory)
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+
+        os.makedirs(self.directory, exist_ok=True)
+
+    @staticmethod
+    def key(
+        signal: np.ndarray,
+        frequency_sampling: float,
+        frequency_array: np.ndarray,
+        phase_step: float,
+        dtype: np.dtype,
+        orders: tuple[int, ...],
+        cumulative: bool,
+        engine: str,
+        exact_phase: bool,
+        time: np.ndarray | None = None
+    ) -> str:
+        """Key of the spectra of a signal
+
+        Args:
+            signal (np.ndarray): Signal, possibly memory mapped.
+            frequency_sampling (float): Frequency sampling of the signal.
+            frequency_array (np.ndarray): Frequency array.
+            phase_step (float): Phase step.
+            dtype (np.dtype): Precision of the computation.
+            orders (tuple[int, ...]): Computed orders.
+            cumulative (bool): Whether the amplitudes are cumulative.
+            engine (str): Engine computing the spectra, resolved (not "auto").
+            exact_phase (bool): Whether the phases are exact.
+            time (np.ndarray | None, optional): Time array of the samples. Defaults to None, the uniform grid of frequency_sampling.
+
+        Returns:
+            str: hexadecimal key, also the name of the entry
+        """
+
+        parameters = (
+            ENGINE_VERSION,
+            signal_digest(signal),
+            float(frequency_sampling),
+            array_key(np.asarray(frequency_array)),
+            None if phase_step is None else float(phase_step),
+            np.dtype(dtype).str,
+            tuple(int(order) for order in orders),
+            bool(cumulative),
+            engine,
+            bool(exact_phase)
+        )
+
+        # Appended only when given, so the keys of uniformly sampled signals stay the same
+        if time is not None:
+            parameters += (array_key(np.asarray(time, dtype=np.float64)),)
+
+        return hashlib.blake2b(repr(parameters).encode(), digest_size=20).hexdigest()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, key + self.suffix)
+
+    def get(self, key: str) -> np.ndarray | None:
+        """Cached array of a key, memory mapped read-only, or None on a miss
+
+        Args:
+            key (str): Key of the entry.
+
+        Returns:
+            np.ndarray | None: the array
+        """
+
+        path = self._path(key)
+
+        try:
+            array = np.load(path, mmap_mode="r")
+            os.utime(path)
+        except (OSError, ValueError):
+            # Missing, evicted meanwhile by another process or unreadable
+            self.misses += 1
+            return None
+
+        self.hits += 1
+
+        return array
+
+    def put(self, key: str, array: np.ndarray) -> None:
+        """Store the array of a key, then evict the least recently used entries past the byte limit
+
+        Args:
+            key (str): Key of the entry.
+            array (np.ndarray): Array to store.
+        """
+
+        if array.nbytes > self.max_bytes:
+            return
+
+        descriptor, temporary = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        try:
+            with os.fdopen(descriptor, "wb") as file:
+                np.save(file, array)
+            os.replace(temporary, self._path(key))
+        except BaseException:
+            os.unlink(temporary)
+            raise
+
+        self.evict()
+
+    def entries(self) -> list[tuple[str, float, int]]:
+        """Cached entries, least recently used first
+
+        Returns:
+            list[tuple[str, float, int]]: path, last use time and size of every entry
+        """
+
+        entries = []
+        with os.scandir(self.directory) as scan:
+            for entry in scan:
+                if entry.name.endswith(self.suffix):
+                    try:
+                        status = entry.stat()
+                    except FileNotFoundError:
+                        continue
+                    entries.append((entry.path, status.st_mtime, status.st_size))
+
+        return sorted(entries, key=lambda entry: entry[1])
+
+    def current_bytes(self) -> int:
+        """Total size of the cached entries"""
+
+        return sum(size for _, _, size in self.entries())
+
+    def evict(self) -> None:
+        """Remove the least recently used entries until the cache fits in max_bytes"""
+
+        entries = self.entries()
+        total = sum(size for _, _, size in entries)
+
+        for path, _, size in entries:
+            if total <= self.max_bytes:
+                break
+
+            try:
+                os.unlink(path)
+            except FileNotFoundError:
+                pass
+            except OSError:
+                # Still mapped by a reader on platforms that forbid removing open files
+                continue
+
+            total -= size
+
+    def clear(self) -> None:
+        """Remove every cached entry and reset the counters"""
+
+        for path, _, _ in self.entries():
+            try:
+                os.unlink(path)
+            except OSError:
+                pass
+
+        self.hits = 0
+        self.misses = 0
@@ -0,0 +1,149 @@
+import json
+import os
+import struct
+import time as timer
+
+import numpy as np
+
+
+DEFAULT_CHECKPOINT_BLOCK = 256
+DEFAULT_CHECKPOINT_INTERVAL = 60.0
+
+
+class FrequencyCheckpoint:
+    """Append-only file of the finished frequency blocks of a scan
+
+    The file starts with MAGIC, the length of a JSON header and the header, which holds
+    the digest of every parameter the results depend on, followed by one record per
+    finished block: its index as int64, then the float64 maxima and phases of the block,
+    each with shape (rows, block frequencies). Records are buffered and written, flushed
+    and synced to disk at most every interval seconds, so an interrupted scan loses at
+    most that much work; a record cut short by the interruption is dropped on load.
+
+    Args:
+        path (str | os.PathLike): Checkpoint file.
+        digest (str): Digest of the parameters of the scan.
+        rows (int): Rows of every block, one per (power, channel).
+        frequencies (int): Number of frequencies of the scan.
+        block_size (int, optional): Frequencies per block. Defaults to DEFAULT_CHECKPOINT_BLOCK.
+        interval (float, optional): Seconds between writes of the finished blocks. Defaults to DEFAULT_CHECKPOINT_INTERVAL.
+    """
+
+    MAGIC = b"HOSACKP1"
+
+    def __init__(
+        self,
+        path: str | os.PathLike,
+        digest: str,
+        rows: int,
+        frequencies: int,
+        block_size: int = DEFAULT_CHECKPOINT_BLOCK,
+        interval: float = DEFAULT_CHECKPOINT_INTERVAL
+    ):
+        if block_size < 1:
+            raise ValueError(f"block_size must be positive, got {block_size}")
+
+        self.path = os.fspath(path)
+        self.header = {"digest": digest, "rows": rows, "frequencies": frequencies, "block_size": block_size}
+        self.interval = interval
+        self.blocks = -(-frequencies//block_size)
+
+        self._pending = []
+        self._last_write = timer.perf_counter()
+
+    def block_slice(self, index: int) -> slice:
+        """Frequencies of a block"""
+
+        block_size = self.header["block_size"]
+
+        return slice(index*block_size, min((index + 1)*block_size, self.header["frequencies"]))
+
+    def load(self) -> dict[int, tuple[np.ndarray, np.ndarray]]:
+        """Finished blocks of an existing checkpoint, creating the file when there is none
+
+        Returns:
+            dict[int, tuple[np.ndarray, np.ndarray]]: maxima and phases of every finished block, by block index
+        """
+
+        if not os.path.exists(self.path):
+            encoded = json.dumps(self.header).encode()
+            with open(self.path, "wb") as file:
+                file.write(self.MAGIC + struct.pack("<Q", len(encoded)) + encoded)
+                file.flush()
+                os.fsync(file.fileno())
+            return {}
+
+        blocks = {}
+        rows = self.header["rows"]
+
+        with open(self.path, "r+b") as file:
+            if file.read(len(self.MAGIC)) != self.MAGIC:
+                raise ValueError(f"{self.path} is not a checkpoint file")
+
+            (length,) = struct.unpack("<Q", file.read(8))
+            header = json.loads(file.read(length))
+
+            if header != self.header:
+                raise ValueError(
+                    f"The checkpoint {self.path} was written by a scan with other parameters, remove it to start over"
+                )
+
+            end = file.tell()
+            while True:
+                raw_index = file.read(8)
+                if len(raw_index) < 8:
+                    break
+
+                (index,) = struct.unpack("<q", raw_index)
+                if not 0 <= index < self.blocks:
+                    break
+
+                block = self.block_slice(index)
+                count = rows*(block.stop - block.start)
+                data = file.read(2*8*count)
+                if len(data) < 2*8*count:
+                    break
+
+                values = np.frombuffer(data, dtype="<f8").reshape(2, rows, block.stop - block.start)
+                blocks[index] = (values[0], values[1])
+                end = file.tell()
+
+            # Drop a record cut short by an interruption, so that appends start on a record boundary
+            file.truncate(end)
+
+        return blocks
+
+    def append(
+        self,
+        index: int,
+        maxima: np.ndarray,
+        phases: np.ndarray
+    ) -> None:
+        """Add a finished block, writing the finished blocks when interval seconds passed since the last write
+
+        Args:
+            index (int): Index of the block.
+            maxima (np.ndarray): Maxima of the block, with shape (rows, block frequencies).
+            phases (np.ndarray): Phases of the block, with the same shape.
+        """
+
+        self._pending.append(
+            struct.pack("<q", index)
+            + np.ascontiguousarray(maxima, dtype="<f8").tobytes()
+            + np.ascontiguousarray(phases, dtype="<f8").tobytes()
+        )
+
+        if timer.perf_counter() - self._last_write >= self.interval:
+            self.flush()
+
+    def flush(self) -> None:
+        """Write, flush and sync the finished blocks"""
+
+        if self._pending:
+            with open(self.path, "ab") as file:
+                file.write(b"".join(self._pending))
+                file.flush()
+                os.fsync(file.fileno())
+            self._pending = []
+
+        self._last_write = timer.perf_counter()
@@ -0,0 +1,177 @@
+import itertools
+
+import numpy as np
+from high_order_spectra_analysis.engines.analytic import maximize_phase
+from high_order_spectra_analysis.engines.blocked import DEFAULT_MAX_MEMORY_BYTES, SUMMATION_BLOCK, _basis_tile, tile_shape
+from high_order_spectra_analysis.engines.telemetry import Monitor, timed
+
+
+# Channel products reduced by one matrix product
+PAIR_BLOCK = 256
+# Bytes per projection maximized at once: the complex projection and the temporaries of maximize_phase
+ARGMAX_BYTES = 176
+
+
+def channel_pairs(
+    channels: int,
+    order: int = 2
+) -> np.ndarray:
+    """Every combination of order distinct channels, in lexicographic order
+
+    Args:
+        channels (int): Number of channels.
+        order (int, optional): Channels per product, 2 for the cross-bispectrum and 3 for the cross-trispectrum. Defaults to 2.
+
+    Returns:
+        np.ndarray: channel indices with shape (pairs, order)
+    """
+
+    if order < 1:
+        raise ValueError(f"The order must be a positive integer, got {order}")
+
+    pairs = np.fromiter(
+        itertools.chain.from_iterable(itertools.combinations(range(channels), order)), dtype=np.intp
+    )
+
+    return pairs.reshape(-1, order)
+
+
+def channel_products(
+    signal: np.ndarray,
+    pairs: np.ndarray,
+    out: np.ndarray | None = None
+) -> np.ndarray:
+    """Products of the channels of every pair, sample by sample
+
+    Args:
+        signal (np.ndarray): Signal with shape (channels, samples).
+        pairs (np.ndarray): Channel indices with shape (pairs, order).
+        out (np.ndarray | None, optional): Array with shape (pairs, samples) receiving the products. Defaults to None, a new array.
+
+    Returns:
+        np.ndarray: products with shape (pairs, samples)
+    """
+
+    out = np.take(signal, pairs[:, 0], axis=0, out=out)
+    for column in range(1, pairs.shape[1]):
+        out *= signal[pairs[:, column]]
+
+    return out
+
+
+def cross_projections(
+    signal: np.ndarray,
+    pairs: np.ndarray,
+    time: np.ndarray,
+    frequency_array: np.ndarray,
+    dtype: np.dtype = np.float64,
+    max_memory_bytes: int | None = None,
+    phi_array: np.ndarray | None = None,
+    monitor: Monitor | None = None
+) -> tuple[np.ndarray, np.ndarray]:
+    """Maximum over the phase of the mean of every channel product times cos(2*pi*f*t + phi)
+
+    Every tile of the cos and sin bases is evaluated once and reduced against all the
+    channel products, formed PAIR_BLOCK pairs at a time for the samples of the tile, with
+    one matrix product per block. The projections of a frequency tile are maximized over
+    the phase as soon as they are complete, a few pairs at a time, so besides the outputs
+    only one tile, one block of products and the float64 accumulators of one frequency
+    tile are held in memory, within max_memory_bytes whatever the number of channels. Below float64, the time
+    axis is split every SUMMATION_BLOCK samples and accumulated in float64.
+
+    Args:
+        signal (np.ndarray): Signal with shape (channels, samples).
+        pairs (np.ndarray): Channel indices with shape (pairs, order).
+        time (np.ndarray): Time array of the samples.
+        frequency_array (np.ndarray): Frequencies to project onto.
+        dtype (np.dtype, optional): Precision of the products, of the basis tiles and of the outputs. Defaults to np.float64.
+        max_memory_bytes (int | None, optional): Memory budget of the tiles. Defaults to None, which uses DEFAULT_MAX_MEMORY_BYTES.
+        phi_array (np.ndarray | None, optional): Phase grid of the maximum. Defaults to None, the exact phase.
+        monitor (Monitor | None, optional): Receiver of the progress and of the stage timings. Defaults to None.
+
+    Returns:
+        tuple[np.ndarray, np.ndarray]: maxima and phases, with shape (pairs, frequencies)
+    """
+
+    signal = np.asarray(signal, dtype=dtype)
+    pairs = np.atleast_2d(np.asarray(pairs, dtype=np.intp))
+    time = np.asarray(time, dtype=np.float64)
+    frequency_array = np.asarray(frequency_array, dtype=np.float64)
+    max_memory_bytes = DEFAULT_MAX_MEMORY_BYTES if max_memory_bytes is None else max_memory_bytes
+
+    pair_count = len(pairs)
+    signal_length = signal.shape[-1]
+    frequency_length = len(frequency_array)
+    pair_block = min(pair_count, PAIR_BLOCK)
+
+    # Half of the budget to the basis tile and the block of products, a quarter to the accumulators of a frequency
+    # tile and a quarter to the phase maximization. The products take at most half of their share, leaving the basis
+    # tile room for many frequencies
+    tile_bytes = max_memory_bytes//2
+    max_samples = max(1, tile_bytes//(2*max(pair_block, 1)*np.dtype(dtype).itemsize))
+    block_frequencies, block_samples = tile_shape(
+        pair_block,
+        signal_length,
+        frequency_length,
+        dtype,
+        tile_bytes,
+        max_samples=max_samples if np.dtype(dtype).itemsize >= 8 else min(max_samples, SUMMATION_BLOCK)
+    )
+    block_frequencies = min(block_frequencies, max(1, (max_memory_bytes//4)//(2*8*max(pair_count, 1))))
+    argmax_pairs = max(1, (max_memory_bytes//4)//(ARGMAX_BYTES*block_frequencies))
+
+    maxima = np.empty((pair_count, frequency_length), dtype=dtype)
+    phases = np.empty((pair_count, frequency_length), dtype=dtype)
+
+    argument = np.empty((block_frequencies, block_samples))
+    cos_tile = np.empty((block_frequencies, block_samples), dtype=dtype)
+    sin_tile = np.empty((block_frequencies, block_samples), dtype=dtype)
+    products = np.empty((pair_block, block_samples), dtype=dtype)
+    in_phase = np.empty((pair_count, block_frequencies))
+    quadrature = np.empty((pair_count, block_frequencies))
+
+    for start in range(0, frequency_length, block_frequencies):
+        stop = min(start + block_frequencies, frequency_length)
+        rows = stop - start
+
+        in_phase[:, :rows] = 0
+        quadrature[:, :rows] = 0
+
+        for time_start in range(0, signal_length, block_samples):
+            time_stop = min(time_start + block_samples, signal_length)
+            columns = time_stop - time_start
+
+            with timed(monitor, "basis"):
+                block_cos, block_sin = _basis_tile(
+                    frequency_array[start:stop],
+                    time[time_start:time_stop],
+                    argument[:rows, :columns],
+                    cos_tile[:rows, :columns],
+                    sin_tile[:rows, :columns]
+                )
+
+            with timed(monitor, "reduction"):
+                samples = signal[:, time_start:time_stop]
+
+                for pair_start in range(0, pair_count, pair_block):
+                    pair_stop = min(pair_start + pair_block, pair_count)
+                    block_products = channel_products(
+                        samples, pairs[pair_start:pair_stop], products[:pair_stop - pair_start, :columns]
+                    )
+
+                    in_phase[pair_start:pair_stop, :rows] += block_products @ block_cos.T
+                    quadrature[pair_start:pair_stop, :rows] += block_products @ block_sin.T
+
+        with timed(monitor, "argmax"):
+            for pair_start in range(0, pair_count, argmax_pairs):
+                pair_stop = min(pair_start + argmax_pairs, pair_count)
+                projection = (in_phase[pair_start:pair_stop, :rows] + 1j*quadrature[pair_start:pair_stop, :rows])/signal_length
+
+                tile_maxima, tile_phases = maximize_phase(projection.reshape(-1), phi_array=phi_array)
+                maxima[pair_start:pair_stop, start:stop] = tile_maxima.reshape(pair_stop - pair_start, rows)
+                phases[pair_start:pair_stop, start:stop] = tile_phases.reshape(pair_stop - pair_start, rows)
+
+        if monitor is not None:
+            monitor.advance(rows)
+
+    return maxima, phases
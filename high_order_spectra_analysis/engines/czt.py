@@ -0,0 +1,169 @@
+import numpy as np
+from high_order_spectra_analysis.engines.cache import BasisCache
+from high_order_spectra_analysis.engines.telemetry import Monitor, timed
+
+
+# Largest phase error, in radians over the whole record, accepted when an
+# explicit array is treated as a uniform grid by the chirp-z engine
+GRID_PHASE_TOLERANCE = 1e-6
+
+
+def uniform_grid(
+    array: np.ndarray,
+    span: float
+) -> tuple[float, float] | None:
+    """Start and step of an array, if it is a uniform grid
+
+    The array is accepted as uniform when replacing it by start + step*arange(len(array))
+    moves the phase 2*pi*f*t by less than GRID_PHASE_TOLERANCE.
+
+    Args:
+        array (np.ndarray): Time or frequency array.
+        span (float): Largest absolute value of the conjugate variable (frequency for a time array and vice versa).
+
+    Returns:
+        tuple[float, float] | None: start and step of the grid, or None if the array is not uniform
+    """
+
+    array = np.asarray(array, dtype=np.float64)
+
+    if len(array) < 2:
+        return None
+
+    start = array[0]
+    step = (array[-1] - array[0])/(len(array) - 1)
+
+    if step <= 0 or not on_grid(array, (start, step), span):
+        return None
+
+    return start, step
+
+
+def on_grid(
+    array: np.ndarray,
+    grid: tuple[float, float],
+    span: float
+) -> bool:
+    """Whether an array is the grid start + step*arange(len(array)), to within GRID_PHASE_TOLERANCE of the phase 2*pi*f*t
+
+    An array generated from a grid and then rounded, such as a float32 frequency array on
+    a kHz range, can be a bin or more away from the grid it was generated from.
+
+    Args:
+        array (np.ndarray): Time or frequency array.
+        grid (tuple[float, float]): Start and step of the grid.
+        span (float): Largest absolute value of the conjugate variable (frequency for a time array and vice versa).
+
+    Returns:
+        bool: True if the array is the grid
+    """
+
+    array = np.asarray(array, dtype=np.float64)
+    deviation = np.max(np.abs(array - (grid[0] + grid[1]*np.arange(len(array)))), initial=0.0)
+
+    return bool(2*np.pi*deviation*span <= GRID_PHASE_TOLERANCE)
+
+
+def _fft_length(length: int) -> int:
+    return 1 << (length - 1).bit_length()
+
+
+def czt_twiddles(
+    signal_length: int,
+    time_grid: tuple[float, float],
+    frequency_grid: tuple[float, float],
+    frequency_length: int
+) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Twiddle factors of the chirp-z transform, which depend only on the grids
+
+    Args:
+        signal_length (int): Number of samples N.
+        time_grid (tuple[float, float]): Start t0 and step dt of the time array.
+        frequency_grid (tuple[float, float]): Start f0 and step df of the frequency array.
+        frequency_length (int): Number of frequencies F.
+
+    Returns:
+        tuple[np.ndarray, np.ndarray, np.ndarray]: modulation of the samples, transformed chirp kernel, demodulation of the frequencies
+    """
+
+    time_start, time_step = time_grid
+    frequency_start, frequency_step = frequency_grid
+
+    n = np.arange(signal_length, dtype=np.float64)
+    m = np.arange(frequency_length, dtype=np.float64)
+    k = np.arange(max(signal_length, frequency_length), dtype=np.float64)
+
+    # w^(k^2/2), with w = exp(1j*2*pi*df*dt), reduced modulo one turn before the exponential
+    rate = frequency_step*time_step
+    chirp = np.exp(1j*np.pi*np.mod(rate*k*k, 2))
+
+    # y_n = x_n * a^n * w^(n^2/2), with a = exp(1j*2*pi*f0*dt)
+    modulation = np.exp(2j*np.pi*np.mod(frequency_start*time_step*n, 1))*chirp[:signal_length]
+
+    fft_length = _fft_length(signal_length + frequency_length - 1)
+
+    kernel = np.zeros(fft_length, dtype=np.complex128)
+    kernel[:frequency_length] = np.conj(chirp[:frequency_length])
+    kernel[fft_length - signal_length + 1:] = np.conj(chirp[1:signal_length])[::-1]
+
+    # w^(i^2/2) * exp(1j*2*pi*f_i*t0)
+    demodulation = chirp[:frequency_length]*np.exp(
+        2j*np.pi*np.mod((frequency_start + frequency_step*m)*time_start, 1)
+    )
+
+    return modulation, np.fft.fft(kernel), demodulation
+
+
+def czt_projections(
+    powers: np.ndarray,
+    time_grid: tuple[float, float],
+    frequency_grid: tuple[float, float],
+    frequency_length: int,
+    cache: BasisCache | None = None,
+    monitor: Monitor | None = None
+) -> np.ndarray:
+    """Complex projections of the signal powers over a uniform frequency grid, using the chirp-z transform
+
+    Computes Z[k, i] = mean(powers[k] * exp(1j*2*pi*f_i*t_n)), with t_n = t0 + n*dt and
+    f_i = f0 + i*df, for every frequency at once with Bluestein's algorithm, in
+    O((N + F) log(N + F)) per order instead of O(N*F).
+
+    Against the direct evaluation, the absolute error stays below
+    (1e-13 + 2e-19*N^2*df*dt) * max|powers[k]|, the second term coming from the
+    rounding of the chirp phase pi*df*dt*n^2 (about 2e-12 for a 200 s recording at
+    1 kHz scanned with df = 0.37 Hz).
+
+    Args:
+        powers (np.ndarray): Signal powers, with shape (orders, samples).
+        time_grid (tuple[float, float]): Start t0 and step dt of the time array.
+        frequency_grid (tuple[float, float]): Start f0 and step df of the frequency array.
+        frequency_length (int): Number of frequencies F.
+        cache (BasisCache | None, optional): Cache keeping the twiddle factors between calls. Defaults to None.
+        monitor (Monitor | None, optional): Receiver of the progress and of the stage timings. Defaults to None.
+
+    Returns:
+        np.ndarray: complex projections, with shape (orders, frequencies)
+    """
+
+    powers = np.atleast_2d(powers)
+    signal_length = powers.shape[1]
+
+    with timed(monitor, "basis"):
+        if cache is None:
+            modulation, kernel_transform, demodulation = czt_twiddles(signal_length, time_grid, frequency_grid, frequency_length)
+        else:
+            modulation, kernel_transform, demodulation = cache.get(
+                ("czt", signal_length, tuple(time_grid), tuple(frequency_grid), frequency_length),
+                lambda: czt_twiddles(signal_length, time_grid, frequency_grid, frequency_length)
+            )
+
+    with timed(monitor, "reduction"):
+        convolution = np.fft.ifft(
+            np.fft.fft(powers*modulation, n=len(kernel_transform), axis=-1)*kernel_transform,
+            axis=-1
+        )[:, :frequency_length]
+
+    if monitor is not None:
+        monitor.advance(frequency_length)
+
+    return convolution*demodulation/signal_length
@@ -0,0 +1,185 @@
+import numpy as np
+from high_order_spectra_analysis.engines.analytic import direct_projections
+from high_order_spectra_analysis.engines.blocked import blocked_projections
+from high_order_spectra_analysis.engines.cache import BasisCache, array_key
+from high_order_spectra_analysis.engines.czt import czt_projections, on_grid, uniform_grid
+from high_order_spectra_analysis.engines.nufft import nufft_projections
+from high_order_spectra_analysis.engines.parallel import parallel_projections
+from high_order_spectra_analysis.engines.telemetry import Monitor, timed
+
+# Compiled kernel, available when the package was built with Cython
+try:
+    from high_order_spectra_analysis.engines.native import native_projections
+except ImportError:
+    native_projections = None
+
+
+ENGINES = ("scan", "analytic", "czt", "blocked", "parallel", "native", "nufft", "auto")
+
+
+def check_engine(engine: str) -> None:
+    """Raise a ValueError if the engine is not available
+
+    Args:
+        engine (str): Engine name.
+    """
+
+    if engine not in ENGINES:
+        raise ValueError(f"Unknown engine '{engine}', expected one of {ENGINES}")
+
+
+def signal_powers(
+    signal: np.ndarray,
+    orders: tuple[int, ...],
+    dtype: np.dtype | None = None
+) -> np.ndarray:
+    """Signal powers as the engines take them, one row per (order, channel)
+
+    The powers are written in place, whatever the memory layout of the signal.
+
+    Args:
+        signal (np.ndarray): Signal, with shape (samples,) or (channels, samples).
+        orders (tuple[int, ...]): Powers to compute.
+        dtype (np.dtype | None, optional): Precision of the powers. Defaults to None, the dtype of the signal.
+
+    Returns:
+        np.ndarray: signal powers, with shape (orders*channels, samples)
+    """
+
+    signal = np.asarray(signal, dtype=dtype)
+
+    powers = np.empty((len(orders),) + signal.shape, dtype=signal.dtype)
+    for j, order in enumerate(orders):
+        np.power(signal, order, out=powers[j])
+
+    return powers.reshape(-1, signal.shape[-1])
+
+
+def resolve_engine(engine: str) -> str:
+    """Engine that actually runs, resolving "auto" to the compiled kernel when it is built and to "blocked" otherwise
+
+    Args:
+        engine (str): Engine name.
+
+    Returns:
+        str: engine name
+    """
+
+    check_engine(engine)
+
+    if engine == "auto":
+        return "blocked" if native_projections is None else "native"
+
+    if engine == "native" and native_projections is None:
+        raise ValueError("The native engine is not built, install the package with Cython available or use engine='auto'")
+
+    return engine
+
+
+def projections(
+    powers: np.ndarray,
+    time: np.ndarray,
+    frequency_array: np.ndarray,
+    engine: str = "analytic",
+    monitor: Monitor | None = None,
+    time_grid: tuple[float, float] | None = None,
+    frequency_grid: tuple[float, float] | None = None,
+    dtype: np.dtype = np.float64,
+    max_memory_bytes: int | None = None,
+    cache: BasisCache | None = None,
+    n_jobs: int | None = None,
+    chunk_size: int | None = None,
+    tolerance: float | None = None
+) -> np.ndarray:
+    """Complex projections of the signal powers, computed by the selected engine
+
+    Args:
+        powers (np.ndarray): Signal powers, with shape (orders, samples).
+        time (np.ndarray): Time array of the samples.
+        frequency_array (np.ndarray): Frequencies to project onto.
+        engine (str, optional): Engine used to compute the projections. The "czt" engine falls back to
+            the "nufft" one when the time or frequency array is not a uniform grid, and "auto" uses "nufft" when
+            the time array is not a uniform grid. Defaults to "analytic".
+        monitor (Monitor | None, optional): Receiver of the progress and of the basis and reduction stage timings. Defaults to None.
+        time_grid (tuple[float, float] | None, optional): Start and step the time array was generated from. Defaults to None, detected from time.
+        frequency_grid (tuple[float, float] | None, optional): Start and step the frequency array was generated from, ignored
+            when the array was rounded away from it. Defaults to None, detected from frequency_array.
+        dtype (np.dtype, optional): Precision of the basis tiles of the "blocked" engine. Defaults to np.float64.
+        max_memory_bytes (int | None, optional): Memory budget of a basis tile of the "blocked" engine. Defaults to None.
+        cache (BasisCache | None, optional): Cache keeping the basis tiles of the "blocked" engine and the twiddle factors of the
+            "czt" engine between calls. Defaults to None.
+        n_jobs (int | None, optional): Number of worker processes of the "parallel" engine, or threads of the "native" one. Defaults to None, one per CPU.
+        chunk_size (int | None, optional): Frequencies per task of the "parallel" engine. Defaults to None.
+        tolerance (float | None, optional): Error of the "nufft" engine relative to mean(|powers|). Defaults to None,
+            DEFAULT_NUFFT_TOLERANCE.
+
+    Returns:
+        np.ndarray: complex projections, with shape (orders, frequencies)
+    """
+
+    # A reduced precision frequency array is rounded away from the grid it was generated from: the engines must all
+    # evaluate the returned frequencies, so the grid is only kept when the array still is that grid
+    if frequency_grid is not None and len(frequency_array) > 1:
+        time_span = np.max(np.abs(np.asarray(time, dtype=np.float64)))
+        if not on_grid(frequency_array, frequency_grid, time_span):
+            frequency_grid = None
+
+    # Irregular sample times, such as jittered timestamps or dropped samples, go to the non-uniform transform
+    if engine == "auto" and time_grid is None and len(frequency_array) > 1:
+        frequency_span = np.max(np.abs(np.asarray(frequency_array, dtype=np.float64)))
+        if uniform_grid(time, frequency_span) is None:
+            engine = "nufft"
+
+    engine = resolve_engine(engine)
+
+    if engine == "scan":
+        raise ValueError("The scan engine evaluates the phases directly and has no projections")
+
+    if engine == "czt" and len(frequency_array) > 1:
+        frequency_span = np.max(np.abs(np.asarray(frequency_array, dtype=np.float64)))
+        time_span = np.max(np.abs(np.asarray(time, dtype=np.float64)))
+        time_grid = uniform_grid(time, frequency_span) if time_grid is None else time_grid
+        frequency_grid = uniform_grid(frequency_array, time_span) if frequency_grid is None else frequency_grid
+
+        if time_grid is not None and frequency_grid is not None:
+            return czt_projections(powers, time_grid, frequency_grid, len(frequency_array), cache=cache, monitor=monitor)
+
+        engine = "nufft"
+
+    if engine == "nufft":
+        return nufft_projections(powers, time, frequency_array, tolerance=tolerance, monitor=monitor)
+
+    if engine == "blocked":
+        return blocked_projections(
+            powers,
+            time,
+            frequency_array,
+            dtype=dtype,
+            max_memory_bytes=max_memory_bytes,
+            monitor=monitor,
+            cache=cache,
+            cache_key=None if cache is None else (array_key(time, time_grid), array_key(frequency_array, frequency_grid))
+        )
+
+    if engine == "native":
+        with timed(monitor, "reduction"):
+            projection = native_projections(powers, time, frequency_array, n_jobs=n_jobs)
+
+        if monitor is not None:
+            monitor.advance(len(frequency_array))
+
+        return projection
+
+    if engine == "parallel":
+        return parallel_projections(
+            powers,
+            time,
+            frequency_array,
+            n_jobs=n_jobs,
+            chunk_size=chunk_size,
+            dtype=dtype,
+            max_memory_bytes=max_memory_bytes,
+            monitor=monitor
+        )
+
+    return direct_projections(powers, time, frequency_array, monitor=monitor)
@@ -0,0 +1,123 @@
+# cython: language_level=3, boundscheck=False, wraparound=False, cdivision=True, initializedcheck=False
+
+import numpy as np
+
+from cython.parallel cimport parallel, prange
+from libc.math cimport M_PI, cos, floor, sin
+from libc.stdlib cimport abort, free, malloc
+
+
+cdef extern from "<math.h>" nogil:
+    float cosf(float x)
+    float sinf(float x)
+
+from high_order_spectra_analysis.engines.parallel import resolve_jobs
+
+
+ctypedef fused floating:
+    float
+    double
+
+
+cdef void _project(
+    const floating[:, :] powers,
+    const double[::1] time,
+    const double[::1] frequencies,
+    double[:, ::1] in_phase,
+    double[:, ::1] quadrature,
+    int n_threads
+) noexcept nogil:
+    cdef Py_ssize_t orders = powers.shape[0]
+    cdef Py_ssize_t signal_length = powers.shape[1]
+    cdef Py_ssize_t frequency_length = frequencies.shape[0]
+    cdef Py_ssize_t i, n, k
+    cdef double turns, angle, cos_value, sin_value, value
+    cdef double *accumulator
+
+    with parallel(num_threads=n_threads):
+        # Per-thread (in-phase, quadrature) sums of every order
+        accumulator = <double *> malloc(2*orders*sizeof(double))
+        if accumulator == NULL:
+            abort()
+
+        for i in prange(frequency_length, schedule="static"):
+            for k in range(2*orders):
+                accumulator[k] = 0
+
+            for n in range(signal_length):
+                # Phase argument in turns, reduced to [0, 1) before the trigonometric evaluation
+                turns = frequencies[i]*time[n]
+                turns = turns - floor(turns)
+                angle = 2*M_PI*turns
+                # float32 powers take the basis in single precision, from the float64 reduced argument
+                if floating is float:
+                    cos_value = cosf(<float>angle)
+                    sin_value = sinf(<float>angle)
+                else:
+                    cos_value = cos(angle)
+                    sin_value = sin(angle)
+
+                for k in range(orders):
+                    value = powers[k, n]
+                    accumulator[k] += value*cos_value
+                    accumulator[orders + k] += value*sin_value
+
+            for k in range(orders):
+                in_phase[k, i] = accumulator[k]
+                quadrature[k, i] = accumulator[orders + k]
+
+        free(accumulator)
+
+
+def native_projections(
+    powers,
+    time,
+    frequency_array,
+    n_jobs=None
+):
+    """Complex projections of the signal powers, computed by a compiled OpenMP kernel
+
+    Runs without the GIL over typed memoryviews, float32 or float64 signal powers, with the
+    frequencies split across threads. Every order is reduced against the same cos/sin
+    evaluation, with the phase argument reduced in float64 and float64 accumulators; the
+    cos/sin of float32 powers are evaluated in float32.
+
+    Args:
+        powers (np.ndarray): Signal powers, with shape (orders, samples).
+        time (np.ndarray): Time array of the samples.
+        frequency_array (np.ndarray): Frequencies to project onto.
+        n_jobs (int | None, optional): Number of threads. Defaults to None, one per CPU.
+
+    Returns:
+        np.ndarray: complex projections, with shape (orders, frequencies)
+    """
+
+    powers = np.atleast_2d(powers)
+    if powers.dtype != np.float32:
+        powers = powers.astype(np.float64, copy=False)
+    # Only the samples need to be contiguous, rows may be strided, as in the sliding windows of segment_powers
+    if powers.strides[1] != powers.itemsize:
+        powers = np.ascontiguousarray(powers)
+
+    cdef const double[::1] time_view = np.ascontiguousarray(time, dtype=np.float64)
+    cdef const double[::1] frequencies = np.ascontiguousarray(frequency_array, dtype=np.float64)
+    cdef int n_threads = resolve_jobs(n_jobs)
+
+    in_phase = np.zeros((powers.shape[0], frequencies.shape[0]))
+    quadrature = np.zeros((powers.shape[0], frequencies.shape[0]))
+    cdef double[:, ::1] in_phase_view = in_phase
+    cdef double[:, ::1] quadrature_view = quadrature
+
+    cdef const float[:, :] powers_float
+    cdef const double[:, :] powers_double
+
+    if powers.dtype == np.float32:
+        powers_float = powers
+        with nogil:
+            _project(powers_float, time_view, frequencies, in_phase_view, quadrature_view, n_threads)
+    else:
+        powers_double = powers
+        with nogil:
+            _project(powers_double, time_view, frequencies, in_phase_view, quadrature_view, n_threads)
+
+    return (in_phase + 1j*quadrature)/powers.shape[1]
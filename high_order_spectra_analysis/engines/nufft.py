@@ -0,0 +1,163 @@
+import numpy as np
+from high_order_spectra_analysis.engines.analytic import direct_projections
+from high_order_spectra_analysis.engines.telemetry import Monitor, timed
+
+
+DEFAULT_NUFFT_TOLERANCE = 1e-10
+# Oversampling of both uniform grids, relative to the bandwidth they must resolve
+OVERSAMPLING = 2
+# Frequencies per gathered block of the interpolation in frequency
+INTERPOLATION_BLOCK = 2**14
+
+
+def nufft_parameters(tolerance: float = DEFAULT_NUFFT_TOLERANCE) -> tuple[float, int]:
+    """Gaussian shape and spreading half-width of the type-3 transform for a tolerance
+
+    With R the oversampling and L = log(1/tolerance), both Gaussians are shaped so that
+    their aliased images are below exp(-L) after the deconvolutions, which amplify the
+    error by at most exp(2*beta), and truncated where they fall below the same level.
+
+    Args:
+        tolerance (float, optional): Error relative to mean(|powers|). Defaults to DEFAULT_NUFFT_TOLERANCE.
+
+    Returns:
+        tuple[float, int]: beta, the decay of a Gaussian over the band it resolves, and the half-width in grid points
+    """
+
+    if not 0 < tolerance < 1:
+        raise ValueError(f"The tolerance must be in (0, 1), got {tolerance}")
+
+    rate = np.log(1/tolerance)
+    beta = rate/(4*OVERSAMPLING*(OVERSAMPLING - 1) - 2)
+    width = int(np.ceil(np.sqrt(4*OVERSAMPLING**2*beta*(rate + 2*beta))/np.pi))
+
+    return beta, width
+
+
+def _fft_size(length: int) -> int:
+    # Smallest even 2^a*3^b*5^c at least length
+    best = 1 << (max(length, 2) - 1).bit_length()
+    power5 = 1
+    while power5 < best:
+        power35 = power5
+        while power35 < best:
+            size = power35
+            while size < length:
+                size *= 2
+            if size % 2 == 0:
+                best = min(best, size)
+            power35 *= 3
+        power5 *= 5
+
+    return best
+
+
+def nufft_projections(
+    powers: np.ndarray,
+    time: np.ndarray,
+    frequency_array: np.ndarray,
+    tolerance: float | None = None,
+    monitor: Monitor | None = None
+) -> np.ndarray:
+    """Complex projections of the signal powers at arbitrary frequencies and sample times, with a type-3 non-uniform FFT
+
+    Computes Z[k, i] = mean(powers[k] * exp(1j*2*pi*f_i*t_n)) for any time and frequency
+    arrays in O(N*w + M*log(M) + F*w), with w the spreading width set by the tolerance
+    and M about 4*R^2 times the product of the time span and of the frequency span. The
+    samples, centered in time, are spread with a Gaussian onto a uniform time grid fine
+    enough for the frequency span; the spread signal, premultiplied by the inverse of a
+    second Gaussian, is transformed by one FFT onto a uniform frequency grid; every
+    frequency is then interpolated from that grid with the second Gaussian, and the first
+    one is divided out. The absolute error stays below about tolerance*mean(|powers[k]|).
+    Small problems, where the direct evaluation is cheaper, are evaluated directly.
+
+    Args:
+        powers (np.ndarray): Signal powers, with shape (orders, samples).
+        time (np.ndarray): Time array of the samples, in any order and with any spacing.
+        frequency_array (np.ndarray): Frequencies to project onto, in any order and with any spacing.
+        tolerance (float | None, optional): Error relative to mean(|powers[k]|). Defaults to None, DEFAULT_NUFFT_TOLERANCE.
+        monitor (Monitor | None, optional): Receiver of the progress and of the stage timings. Defaults to None.
+
+    Returns:
+        np.ndarray: complex projections, with shape (orders, frequencies)
+    """
+
+    powers = np.atleast_2d(powers)
+    time = np.asarray(time, dtype=np.float64)
+    frequency_array = np.asarray(frequency_array, dtype=np.float64)
+    tolerance = DEFAULT_NUFFT_TOLERANCE if tolerance is None else tolerance
+
+    orders, signal_length = powers.shape
+    frequency_length = len(frequency_array)
+    beta, width = nufft_parameters(tolerance)
+    taps = np.arange(-width, width + 1)
+
+    if signal_length*frequency_length <= 4*(2*width + 1)*(signal_length + frequency_length):
+        return direct_projections(powers, time, frequency_array, monitor=monitor)
+
+    with timed(monitor, "basis"):
+        # Center both variables: t in [-time_half, time_half], f in [-frequency_half, frequency_half]
+        time_center = (time.max() + time.min())/2
+        frequency_center = (frequency_array.max() + frequency_array.min())/2
+        centered_time = time - time_center
+        centered_frequency = frequency_array - frequency_center
+        time_half = max(np.max(np.abs(centered_time)), np.finfo(np.float64).tiny)
+
+        # A single frequency still needs a band for the spreading Gaussian
+        frequency_half = max(np.max(np.abs(centered_frequency)), 1/time_half)
+
+        time_step = 1/(2*OVERSAMPLING*frequency_half)
+        grid_half = time_half + (width + 1)*time_step
+        grid_length = _fft_size(int(np.ceil(2*OVERSAMPLING*grid_half/time_step)))
+        frequency_step = 1/(grid_length*time_step)
+
+        # exp(-t^2/(2*time_width^2)) decays by exp(-beta) over the frequency band, exp(-f^2/(2*frequency_width^2)) over the grid
+        time_width2 = beta/(2*np.pi**2*frequency_half**2)
+        frequency_width2 = beta/(2*np.pi**2*grid_half**2)
+
+        # Spread the modulated samples onto t_m = (m - grid_length/2)*time_step
+        modulated = powers*np.exp(2j*np.pi*np.mod(frequency_center*centered_time, 1))
+        nearest = np.rint(centered_time/time_step).astype(np.int64)
+        indices = nearest[:, None] + taps
+        weights = np.exp(-(indices*time_step - centered_time[:, None])**2/(2*time_width2))
+        indices = (indices + grid_length//2).ravel()
+        weights = weights.ravel()
+
+    with timed(monitor, "reduction"):
+        grid = np.empty((orders, grid_length), dtype=np.complex128)
+        for row in range(orders):
+            values = np.repeat(modulated[row], len(taps))*weights
+            grid[row] = (
+                np.bincount(indices, weights=values.real, minlength=grid_length)
+                + 1j*np.bincount(indices, weights=values.imag, minlength=grid_length)
+            )
+
+        # H(l*frequency_step) = sum_m grid_m*exp(2*pi^2*frequency_width2*t_m^2)*exp(1j*2*pi*l*frequency_step*t_m)
+        grid_time = (np.arange(grid_length) - grid_length//2)*time_step
+        grid *= np.exp(2*np.pi**2*frequency_width2*grid_time**2)
+        transform = np.fft.ifft(grid, axis=1)*grid_length
+        transform[:, 1::2] *= -1
+
+    with timed(monitor, "basis"):
+        # Interpolation in frequency, then division by the transform of the spreading Gaussian
+        normalization = (
+            time_step*frequency_step/(2*np.pi*np.sqrt(frequency_width2*time_width2))
+            * np.exp(2*np.pi**2*time_width2*centered_frequency**2)
+            * np.exp(2j*np.pi*np.mod(frequency_array*time_center, 1))
+        )
+
+    projection = np.empty((orders, frequency_length), dtype=np.complex128)
+    for start in range(0, frequency_length, INTERPOLATION_BLOCK):
+        stop = min(start + INTERPOLATION_BLOCK, frequency_length)
+        frequencies = centered_frequency[start:stop]
+
+        with timed(monitor, "reduction"):
+            stencil = np.rint(frequencies/frequency_step).astype(np.int64)[:, None] + taps
+            kernel = np.exp(-(frequencies[:, None] - stencil*frequency_step)**2/(2*frequency_width2))
+            gathered = transform[:, np.mod(stencil, grid_length)]
+            projection[:, start:stop] = np.einsum("kfw,fw->kf", gathered, kernel)*normalization[start:stop]
+
+        if monitor is not None:
+            monitor.advance(stop - start)
+
+    return projection/signal_length
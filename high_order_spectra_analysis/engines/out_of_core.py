@@ -0,0 +1,159 @@
+import os
+from collections.abc import Iterator
+
+import numpy as np
+from high_order_spectra_analysis.engines.dispatch import projections, signal_powers
+from high_order_spectra_analysis.engines.telemetry import Monitor
+
+
+DEFAULT_BLOCK_SIZE = 2**20
+
+
+def is_out_of_core(signal) -> bool:
+    """Whether a signal is read block by block instead of being loaded in memory
+
+    Args:
+        signal: Signal, a path to a .npy file, a np.memmap, an iterator of chunks or an in-memory array.
+
+    Returns:
+        bool: True for .npy paths, memory maps and iterators of chunks
+    """
+
+    return isinstance(signal, (str, os.PathLike, np.memmap, Iterator))
+
+
+def open_signal(signal) -> np.ndarray | Iterator:
+    """Memory map of a .npy path, and the signal itself otherwise
+
+    Args:
+        signal: Signal, a path to a .npy file, a np.memmap, an iterator of chunks or an in-memory array.
+
+    Returns:
+        np.ndarray | Iterator: array (possibly memory mapped) or iterator of chunks
+    """
+
+    if isinstance(signal, (str, os.PathLike)):
+        return np.load(signal, mmap_mode="r")
+
+    return signal
+
+
+def signal_blocks(
+    signal: np.ndarray | Iterator,
+    block_size: int | None = None
+) -> Iterator[tuple[int, np.ndarray]]:
+    """Consecutive blocks of a signal along its time (last) axis
+
+    Args:
+        signal (np.ndarray | Iterator): Array, possibly memory mapped, or iterator of chunks, which are used as they come.
+        block_size (int | None, optional): Samples per block of an array. Defaults to None, DEFAULT_BLOCK_SIZE.
+
+    Yields:
+        tuple[int, np.ndarray]: index of the first sample of the block, block loaded in memory
+    """
+
+    if isinstance(signal, Iterator):
+        start = 0
+        for chunk in signal:
+            chunk = np.asarray(chunk)
+            yield start, chunk
+            start += chunk.shape[-1]
+        return
+
+    block_size = DEFAULT_BLOCK_SIZE if block_size is None else block_size
+
+    for start in range(0, signal.shape[-1], block_size):
+        yield start, np.asarray(signal[..., start:start + block_size])
+
+
+def out_of_core_projections(
+    signal: np.ndarray | Iterator,
+    frequency_sampling: float,
+    frequency_array: np.ndarray,
+    orders: tuple[int, ...],
+    time: np.ndarray | None = None,
+    block_size: int | None = None,
+    engine: str = "auto",
+    frequency_grid: tuple[float, float] | None = None,
+    monitor: Monitor | None = None,
+    **engine_options
+) -> tuple[np.ndarray, int, tuple[int, ...]]:
+    """Complex projections of the signal powers, accumulated one block of samples at a time
+
+    Only one block of samples and its powers are held in memory at once, on top of the
+    memory of the engine that reduces each block, so the peak memory does not depend on
+    the length of the recording. With the default time array, every block is projected
+    with a time axis starting at zero and rotated by exp(1j*2*pi*f*t_start) afterwards, so
+    blocks of the same length share the basis kept in a BasisCache.
+
+    Args:
+        signal (np.ndarray | Iterator): Array, possibly memory mapped, or iterator of chunks, with shape (samples,) or (channels, samples).
+        frequency_sampling (float): Frequency sampling of the signal.
+        frequency_array (np.ndarray): Frequencies to project onto.
+        orders (tuple[int, ...]): Signal powers to project.
+        time (np.ndarray | None, optional): Time array of the samples. Defaults to None, sample index over frequency_sampling.
+        block_size (int | None, optional): Samples per block of an array. Defaults to None, DEFAULT_BLOCK_SIZE.
+        engine (str, optional): Engine reducing each block. Defaults to "auto".
+        frequency_grid (tuple[float, float] | None, optional): Start and step the frequency array was generated from. Defaults to None.
+        monitor (Monitor | None, optional): Receiver of the progress, counted once per block, and of the stage timings. Defaults to None.
+        **engine_options: Other arguments of projections.
+
+    Returns:
+        tuple[np.ndarray, int, tuple[int, ...]]: complex projections with shape (orders*channels, frequencies), number of samples, shape of the channels
+    """
+
+    if engine == "scan":
+        raise ValueError("The scan engine needs the whole signal in memory, use a projection engine for out-of-core signals")
+
+    time_sampling = 1/frequency_sampling
+    frequencies = np.asarray(frequency_array, dtype=np.float64)
+
+    projection = None
+    signal_length = 0
+    channels_shape = ()
+
+    if monitor is not None:
+        block_count = None if isinstance(signal, Iterator) else -(-signal.shape[-1]//(DEFAULT_BLOCK_SIZE if block_size is None else block_size))
+        monitor.total = None if block_count is None else block_count*len(frequency_array)
+
+    for start, block in signal_blocks(signal, block_size):
+        length = block.shape[-1]
+        channels_shape = block.shape[:-1]
+
+        if time is None:
+            block_projection = projections(
+                signal_powers(block, orders, engine_options.get("dtype")),
+                np.arange(length)*time_sampling,
+                frequency_array,
+                engine=engine,
+                time_grid=(0.0, time_sampling),
+                frequency_grid=frequency_grid,
+                monitor=monitor,
+                **engine_options
+            )
+            block_projection *= np.exp(2j*np.pi*np.mod(frequencies*(start*time_sampling), 1))
+        else:
+            block_projection = projections(
+                signal_powers(block, orders, engine_options.get("dtype")),
+                np.asarray(time[start:start + length]),
+                frequency_array,
+                engine=engine,
+                frequency_grid=frequency_grid,
+                monitor=monitor,
+                **engine_options
+            )
+
+        block_projection *= length
+        if projection is None:
+            projection = block_projection
+        else:
+            projection += block_projection
+        signal_length += length
+
+    if projection is None:
+        raise ValueError("The signal has no samples")
+
+    if monitor is not None:
+        monitor.samples = signal_length
+
+    return projection/signal_length, signal_length, channels_shape
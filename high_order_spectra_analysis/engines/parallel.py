@@ -0,0 +1,193 @@
+import atexit
+import math
+import os
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+import numpy as np
+from high_order_spectra_analysis.engines.blocked import blocked_projections
+from high_order_spectra_analysis.engines.telemetry import Monitor, timed
+
+
+_POOLS: dict[int, ProcessPoolExecutor] = {}
+
+
+def resolve_jobs(n_jobs: int | None = None) -> int:
+    """Number of worker processes, one per CPU when not given
+
+    Args:
+        n_jobs (int | None, optional): Requested number of worker processes. Defaults to None.
+
+    Returns:
+        int: number of worker processes
+    """
+
+    if n_jobs is None:
+        return os.cpu_count() or 1
+
+    if n_jobs < 1:
+        raise ValueError(f"n_jobs must be positive, got {n_jobs}")
+
+    return n_jobs
+
+
+def get_pool(n_jobs: int | None = None) -> ProcessPoolExecutor:
+    """Persistent worker pool, created on first use and reused by later calls
+
+    A pool left broken by a worker that died, killed for lack of memory for instance, is
+    shut down and replaced by a new one, so one lost worker fails only the call it was in.
+
+    Args:
+        n_jobs (int | None, optional): Number of worker processes. Defaults to None, one per CPU.
+
+    Returns:
+        ProcessPoolExecutor: the pool
+    """
+
+    n_jobs = resolve_jobs(n_jobs)
+
+    if n_jobs in _POOLS and _POOLS[n_jobs]._broken:
+        _POOLS.pop(n_jobs).shutdown(wait=False, cancel_futures=True)
+
+    if n_jobs not in _POOLS:
+        _POOLS[n_jobs] = ProcessPoolExecutor(max_workers=n_jobs)
+
+    return _POOLS[n_jobs]
+
+
+@atexit.register
+def shutdown_pools() -> None:
+    """Stop every persistent worker pool"""
+
+    while _POOLS:
+        _, pool = _POOLS.popitem()
+        pool.shutdown(cancel_futures=True)
+
+
+def share_array(array: np.ndarray) -> tuple[shared_memory.SharedMemory, tuple]:
+    """Copy an array into a new shared memory block
+
+    Args:
+        array (np.ndarray): Array to share.
+
+    Returns:
+        tuple[shared_memory.SharedMemory, tuple]: the block, to be closed and unlinked by the caller, and the
+            (name, shape, dtype) description that attach_array takes
+    """
+
+    block = shared_memory.SharedMemory(create=True, size=max(array.nbytes, 1))
+    np.ndarray(array.shape, dtype=array.dtype, buffer=block.buf)[...] = array
+
+    return block, (block.name, array.shape, array.dtype.str)
+
+
+def attach_array(description: tuple) -> tuple[shared_memory.SharedMemory, np.ndarray]:
+    """Read-only view of an array shared by share_array, from another process
+
+    Args:
+        description (tuple): (name, shape, dtype) returned by share_array.
+
+    Returns:
+        tuple[shared_memory.SharedMemory, np.ndarray]: the block, to be closed once the view is no longer used, and the view
+    """
+
+    name, shape, dtype = description
+    # Pool workers share the resource tracker of the creating process, which unlinks the block
+    block = shared_memory.SharedMemory(name=name)
+
+    array = np.ndarray(shape, dtype=dtype, buffer=block.buf)
+    array.setflags(write=False)
+
+    return block, array
+
+
+def _projection_task(
+    powers_description: tuple,
+    time_description: tuple,
+    frequencies: np.ndarray,
+    dtype: np.dtype,
+    max_memory_bytes: int | None
+) -> np.ndarray:
+    powers_block, powers = attach_array(powers_description)
+    time_block, time = attach_array(time_description)
+
+    try:
+        return blocked_projections(powers, time, frequencies, dtype=dtype, max_memory_bytes=max_memory_bytes)
+    finally:
+        del powers, time
+        powers_block.close()
+        time_block.close()
+
+
+def parallel_projections(
+    powers: np.ndarray,
+    time: np.ndarray,
+    frequency_array: np.ndarray,
+    n_jobs: int | None = None,
+    chunk_size: int | None = None,
+    dtype: np.dtype = np.float64,
+    max_memory_bytes: int | None = None,
+    monitor: Monitor | None = None
+) -> np.ndarray:
+    """Complex projections of the signal powers, computed by a persistent pool of worker processes
+
+    The signal powers and the time array are placed once in shared memory, the frequency
+    array is split into contiguous chunks, and each worker reduces its chunk with the
+    blocked matrix product kernel. Chunks are merged by position, so the result does not
+    depend on the completion order. Each worker holds its own basis tiles, so
+    max_memory_bytes applies per worker.
+
+    Args:
+        powers (np.ndarray): Signal powers, with shape (orders, samples).
+        time (np.ndarray): Time array of the samples.
+        frequency_array (np.ndarray): Frequencies to project onto.
+        n_jobs (int | None, optional): Number of worker processes. Defaults to None, one per CPU.
+        chunk_size (int | None, optional): Frequencies per task. Defaults to None, four tasks per worker.
+        dtype (np.dtype, optional): Precision of the basis tiles and of the matrix products. Defaults to np.float64.
+        max_memory_bytes (int | None, optional): Memory budget of a basis tile, per worker. Defaults to None.
+        monitor (Monitor | None, optional): Receiver of the progress, reported as chunks complete, and of the time spent
+            waiting for the workers, as the reduction stage. Defaults to None.
+
+    Returns:
+        np.ndarray: complex projections, with shape (orders, frequencies)
+    """
+
+    powers = np.atleast_2d(powers)
+    frequency_array = np.asarray(frequency_array, dtype=np.float64)
+    frequency_length = len(frequency_array)
+
+    n_jobs = resolve_jobs(n_jobs)
+    pool = get_pool(n_jobs)
+    chunk_size = max(1, math.ceil(frequency_length/(4*n_jobs))) if chunk_size is None else chunk_size
+
+    powers_block, powers_description = share_array(np.ascontiguousarray(powers))
+    time_block, time_description = share_array(np.ascontiguousarray(time, dtype=np.float64))
+
+    try:
+        starts = range(0, frequency_length, chunk_size)
+        futures = [
+            pool.submit(
+                _projection_task,
+                powers_description,
+                time_description,
+                frequency_array[start:start + chunk_size],
+                dtype,
+                max_memory_bytes
+            )
+            for start in starts
+        ]
+
+        projection = np.zeros((powers.shape[0], frequency_length), dtype=np.complex128)
+        for start, future in zip(starts, futures):
+            with timed(monitor, "reduction"):
+                projection[:, start:start + chunk_size] = future.result()
+
+            if monitor is not None:
+                monitor.advance(min(chunk_size, frequency_length - start))
+
+    finally:
+        for block in (powers_block, time_block):
+            block.close()
+            block.unlink()
+
+    return projection
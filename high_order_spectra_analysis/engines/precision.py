@@ -0,0 +1,90 @@
+import numpy as np
+from high_order_spectra_analysis.engines.blocked import SUMMATION_BLOCK
+
+
+def phase_argument(
+    frequency: float,
+    time: np.ndarray,
+    dtype: np.dtype = np.float64,
+    scale: float = 1.0
+) -> np.ndarray:
+    """Phase argument 2*pi*scale*frequency*time, reduced modulo one turn in float64 and then cast to dtype
+
+    A float32 argument of cos(2*pi*f*t) loses every significant digit once f*t reaches
+    about 1e7 turns; reducing the turns to [0, 1) in float64 first keeps the error of the
+    cast argument below 2*pi*eps(dtype), whatever the length of the signal.
+
+    Args:
+        frequency (float): Frequency.
+        time (np.ndarray): Time array of the samples.
+        dtype (np.dtype, optional): Precision of the returned argument. Defaults to np.float64.
+        scale (float, optional): Multiplier of the frequency, 0.5 for the cos(pi*f*t) of tdbs. Defaults to 1.0.
+
+    Returns:
+        np.ndarray: phase argument in [0, 2*pi)
+    """
+
+    turns = np.mod(np.float64(scale)*np.float64(frequency)*np.asarray(time, dtype=np.float64), 1)
+
+    return (2*np.pi*turns).astype(dtype)
+
+
+def accuracy_bound(
+    signal: np.ndarray,
+    orders: tuple[int, ...] = (1, 2, 3, 4),
+    dtype: np.dtype = np.float32,
+    cumulative: bool = True,
+    summation_block: int = SUMMATION_BLOCK
+) -> np.ndarray:
+    """Bound of the absolute difference between the amplitudes computed in dtype and in float64
+
+    Bounds the error of the blocked, parallel and native engines, which evaluate the
+    signal powers and the cos/sin basis in dtype from a float64-reduced phase argument,
+    reduce at most summation_block samples per dtype dot product and accumulate the
+    blocks in float64. With u the unit roundoff of dtype, the projection of power k is
+    off by at most mean(|S|^k)*((k + 2*pi + 2)*u + gamma(summation_block)) plus the float64
+    accumulation over the blocks, and the maximum over the phase inherits that bound.
+    A cumulative amplitude, the product of the maxima of orders 1..k, is bounded by
+    expanding the product of the perturbed maxima. The bound is a worst case, the
+    observed error is usually orders of magnitude smaller; the phases are not bounded,
+    as a perturbation can move the maximum between two nearly equal phase grid values.
+
+    The bound does not describe the analytic, czt and nufft engines, which evaluate the
+    basis and accumulate in float64 whatever dtype: only the signal and its powers are
+    rounded to dtype there, an error of about k*u*mean(|S|^k) on the projection of power
+    k, plus the tolerance of the nufft engine.
+
+    Args:
+        signal (np.ndarray): Signal, with shape (samples,) or (channels, samples).
+        orders (tuple[int, ...], optional): Orders to bound. Defaults to (1, 2, 3, 4).
+        dtype (np.dtype, optional): Precision of the computation. Defaults to np.float32.
+        cumulative (bool, optional): Whether the amplitudes are cumulative. Defaults to True.
+        summation_block (int, optional): Samples per dtype dot product. Defaults to SUMMATION_BLOCK.
+
+    Returns:
+        np.ndarray: absolute bounds with shape (orders, [channels])
+    """
+
+    signal = np.asarray(signal, dtype=np.float64)
+    signal_length = signal.shape[-1]
+
+    def gamma(terms: int, roundoff: float) -> float:
+        # Worst case relative error of a recursive sum of terms values
+        return terms*roundoff/(1 - terms*roundoff)
+
+    roundoff = np.finfo(dtype).eps/2
+    block = min(summation_block, signal_length)
+    summation = gamma(block, roundoff) + gamma(-(-signal_length//block), np.finfo(np.float64).eps/2)
+
+    highest = max(int(order) for order in orders)
+    magnitude = np.abs(signal)
+    # scale[k - 1] bounds |Z_k|, error[k - 1] the error of the maximum of power k
+    scale = np.stack([np.mean(magnitude**power, axis=-1) for power in range(1, highest + 1)])
+    error = np.stack([
+        scale[power - 1]*((power + 2*np.pi + 2)*roundoff + summation) for power in range(1, highest + 1)
+    ])
+
+    if cumulative:
+        error = np.cumprod(scale + error, axis=0) - np.cumprod(scale, axis=0)
+
+    return error[[int(order) - 1 for order in orders]]
@@ -0,0 +1,228 @@
+import time as timer
+import tracemalloc
+from collections.abc import Callable
+from contextlib import contextmanager, nullcontext
+
+import progressbar
+
+
+class Telemetry:
+    """Receiver of the progress, stage timings and summary of a computation
+
+    The stages are "setup" (time and frequency grids, signal powers), "basis" (basis
+    evaluation), "reduction" (projection of the signal powers on the basis) and "argmax"
+    (maximization over the phase).
+
+    Every hook is a no-op: subclass it and override the hooks of interest to forward the
+    events to a progress bar, a log or a metrics system. progress_steps sets the
+    granularity of on_progress, called about that many times over a computation, and
+    track_memory traces the peak of the memory allocated during the computation with
+    tracemalloc, which slows the computation down.
+    """
+
+    progress_steps: int = 100
+    track_memory: bool = False
+
+    def on_progress(self, done: int, total: int | None) -> None:
+        """Called with the number of frequencies done and the total, when known"""
+
+    def on_stage(self, name: str, seconds: float) -> None:
+        """Called once per stage at the end of the computation, with the time spent in it"""
+
+    def on_summary(self, summary: dict) -> None:
+        """Called at the end of the computation, with the summary built by Monitor.close"""
+
+
+class CallbackTelemetry(Telemetry):
+    """Telemetry forwarding every event to plain functions
+
+    Args:
+        on_progress (Callable[[int, int | None], None] | None, optional): Progress hook. Defaults to None.
+        on_stage (Callable[[str, float], None] | None, optional): Stage timing hook. Defaults to None.
+        on_summary (Callable[[dict], None] | None, optional): Summary hook. Defaults to None.
+        progress_steps (int, optional): Approximate number of progress reports per computation. Defaults to 100.
+        track_memory (bool, optional): Trace the peak of allocated memory. Defaults to False.
+    """
+
+    def __init__(
+        self,
+        on_progress: Callable[[int, int | None], None] | None = None,
+        on_stage: Callable[[str, float], None] | None = None,
+        on_summary: Callable[[dict], None] | None = None,
+        progress_steps: int = 100,
+        track_memory: bool = False
+    ):
+        self.progress_callback = on_progress
+        self.stage_callback = on_stage
+        self.summary_callback = on_summary
+        self.progress_steps = progress_steps
+        self.track_memory = track_memory
+
+    def on_progress(self, done: int, total: int | None) -> None:
+        if self.progress_callback is not None:
+            self.progress_callback(done, total)
+
+    def on_stage(self, name: str, seconds: float) -> None:
+        if self.stage_callback is not None:
+            self.stage_callback(name, seconds)
+
+    def on_summary(self, summary: dict) -> None:
+        if self.summary_callback is not None:
+            self.summary_callback(summary)
+
+
+class ProgressBarTelemetry(Telemetry):
+    """Telemetry drawing the progress on a progressbar.ProgressBar, as enable_progress_bar does"""
+
+    def __init__(self):
+        self.bar = None
+
+    def on_progress(self, done: int, total: int | None) -> None:
+        if self.bar is None:
+            self.bar = progressbar.ProgressBar(max_value=progressbar.UnknownLength if total is None else total)
+
+        self.bar.update(done)
+
+    def on_summary(self, summary: dict) -> None:
+        if self.bar is not None:
+            self.bar.finish()
+            self.bar = None
+
+
+class Monitor:
+    """Progress and stage timings of one computation, forwarded to a Telemetry
+
+    The functions computing spectra create a Monitor only when a telemetry is given, and
+    the engines check for None before touching it, so the default costs nothing.
+
+    Args:
+        telemetry (Telemetry): Receiver of the events.
+        frequencies (int | None, optional): Number of frequencies, when known. Defaults to None.
+        samples (int | None, optional): Number of samples, when known. Defaults to None.
+    """
+
+    def __init__(
+        self,
+        telemetry: Telemetry,
+        frequencies: int | None = None,
+        samples: int | None = None
+    ):
+        self.telemetry = telemetry
+        self.frequencies = frequencies
+        self.samples = samples
+        # Progress is counted in frequencies, once per pass over the samples
+        self.total = frequencies
+        self.done = 0
+        self.timings = {}
+
+        self._next_report = 0
+        self._started_tracing = False
+
+        if telemetry.track_memory:
+            if tracemalloc.is_tracing():
+                tracemalloc.reset_peak()
+            else:
+                tracemalloc.start()
+                self._started_tracing = True
+
+        self.start = timer.perf_counter()
+        self._checkpoint = self.start
+
+    @contextmanager
+    def stage(self, name: str):
+        """Context adding the time spent inside it to the stage name"""
+
+        start = timer.perf_counter()
+        try:
+            yield
+        finally:
+            self.timings[name] = self.timings.get(name, 0.0) + timer.perf_counter() - start
+
+    def checkpoint(self, name: str | None = None) -> None:
+        """Add the time since the last checkpoint to the stage name, or discard it when name is None"""
+
+        now = timer.perf_counter()
+        if name is not None:
+            self.timings[name] = self.timings.get(name, 0.0) + now - self._checkpoint
+        self._checkpoint = now
+
+    def end_setup(self, frequencies: int | None, samples: int | None) -> None:
+        """Record the size of the computation and close the setup stage"""
+
+        self.frequencies = frequencies
+        self.total = frequencies
+        self.samples = samples
+        self.checkpoint("setup")
+
+    def advance(self, amount: int = 1) -> None:
+        """Count amount more frequencies as done, reporting at the granularity of the telemetry"""
+
+        self.done += amount
+
+        if self.done >= self._next_report or self.done == self.total:
+            self.telemetry.on_progress(self.done, self.total)
+            step = 1 if self.total is None else max(1, self.total//max(1, self.telemetry.progress_steps))
+            self._next_report = self.done + step
+
+    def close(self) -> dict:
+        """Report the stage timings and the summary of the computation
+
+        Returns:
+            dict: total seconds, seconds per stage, samples, frequencies, samples*bins per second and peak bytes (None
+                unless the telemetry tracks memory)
+        """
+
+        seconds = timer.perf_counter() - self.start
+
+        peak_bytes = None
+        if self.telemetry.track_memory:
+            peak_bytes = tracemalloc.get_traced_memory()[1]
+            if self._started_tracing:
+                tracemalloc.stop()
+
+        frequencies = self.done if self.frequencies is None else self.frequencies
+        work = None if self.samples is None else self.samples*frequencies
+
+        summary = dict(
+            seconds=seconds,
+            stages=dict(self.timings),
+            samples=self.samples,
+            frequencies=frequencies,
+            samples_bins_per_second=None if work is None or seconds == 0 else work/seconds,
+            peak_bytes=peak_bytes
+        )
+
+        for name, stage_seconds in self.timings.items():
+            self.telemetry.on_stage(name, stage_seconds)
+        self.telemetry.on_summary(summary)
+
+        return summary
+
+
+def start_monitor(
+    telemetry: Telemetry | None,
+    enable_progress_bar: bool = False
+) -> Monitor | None:
+    """Monitor of a computation, None when there is nothing to report to
+
+    Args:
+        telemetry (Telemetry | None): Receiver of the events.
+        enable_progress_bar (bool, optional): Draw a progress bar when no telemetry is given. Defaults to False.
+
+    Returns:
+        Monitor | None: the monitor
+    """
+
+    if telemetry is None and enable_progress_bar:
+        telemetry = ProgressBarTelemetry()
+
+    return None if telemetry is None else Monitor(telemetry)
+
+
+def timed(
+    monitor: Monitor | None,
+    name: str
+):
+    """Context timing the stage name on the monitor, doing nothing without one"""
+
+    return nullcontext() if monitor is None else monitor.stage(name)
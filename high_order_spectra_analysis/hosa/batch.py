@@ -0,0 +1,374 @@
+import argparse
+import glob
+import hashlib
+import json
+import os
+import sys
+import tempfile
+import time as timer
+import wave
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+import numpy as np
+from high_order_spectra_analysis.engines.dispatch import ENGINES
+from high_order_spectra_analysis.hosa.result import HosaResult
+from high_order_spectra_analysis.time_domain_high_order_spectra.tdhos import tdhos
+
+
+RAW_EXTENSIONS = (".bin", ".raw", ".dat")
+EXTENSIONS = (".npy", ".csv", ".wav") + RAW_EXTENSIONS
+
+MANIFEST = "manifest.jsonl"
+
+
+def read_recording(
+    path: str,
+    frequency_sampling: float | None = None,
+    raw_dtype: str | None = None,
+    channels: int | None = None
+) -> tuple[np.ndarray, float | None]:
+    """Signal of a recording file, with shape (samples,) or (channels, samples), and its sampling rate when the file has one
+
+    .npy files and raw binary files are memory mapped, so that tdhos reads them block
+    by block. A raw file takes its dtype, sampling rate and number of interleaved
+    channels from a JSON sidecar next to it (recording.bin.json, with the keys "dtype",
+    "frequency_sampling" and "channels"), or from the arguments. CSV files hold one
+    channel per column, after an optional header line, and WAV files are PCM, scaled to
+    [-1, 1).
+
+    Args:
+        path (str): Recording file.
+        frequency_sampling (float | None, optional): Sampling rate of files without one. Defaults to None.
+        raw_dtype (str | None, optional): Sample dtype of raw files without a sidecar. Defaults to None.
+        channels (int | None, optional): Interleaved channels of raw files without a sidecar. Defaults to None, one.
+
+    Returns:
+        tuple[np.ndarray, float | None]: signal, sampling rate of the file or frequency_sampling
+    """
+
+    extension = os.path.splitext(path)[1].lower()
+
+    if extension == ".npy":
+        return np.load(path, mmap_mode="r"), frequency_sampling
+
+    if extension in RAW_EXTENSIONS:
+        metadata = {}
+        if os.path.exists(path + ".json"):
+            with open(path + ".json") as file:
+                metadata = json.load(file)
+
+        dtype = metadata.get("dtype", raw_dtype)
+        if dtype is None:
+            raise ValueError(f"The dtype of the raw file {path} is unknown, add a {path}.json sidecar or pass --raw-dtype")
+
+        channels = int(metadata.get("channels", 1 if channels is None else channels))
+        signal = np.memmap(path, dtype=np.dtype(dtype), mode="r")
+        signal = signal[:len(signal) - len(signal) % channels].reshape(-1, channels).T
+
+        return signal[0] if channels == 1 else signal, metadata.get("frequency_sampling", frequency_sampling)
+
+    if extension == ".csv":
+        with open(path) as file:
+            first_line = file.readline()
+
+        try:
+            [float(value) for value in first_line.split(",")]
+            header = 0
+        except ValueError:
+            header = 1
+
+        signal = np.loadtxt(path, delimiter=",", skiprows=header, ndmin=2).T
+
+        return signal[0] if signal.shape[0] == 1 else signal, frequency_sampling
+
+    if extension == ".wav":
+        with wave.open(path, "rb") as file:
+            width = file.getsampwidth()
+            channels = file.getnchannels()
+            rate = file.getframerate()
+            frames = file.readframes(file.getnframes())
+
+        if width == 1:
+            # 8 bit PCM is unsigned
+            signal = (np.frombuffer(frames, dtype=np.uint8).astype(np.float64) - 128)/128
+        elif width == 3:
+            data = np.frombuffer(frames, dtype=np.uint8).reshape(-1, 3)
+            samples = data[:, 0].astype(np.int32) | data[:, 1].astype(np.int32) << 8 | data[:, 2].astype(np.int32) << 16
+            signal = np.where(samples >= 2**23, samples - 2**24, samples)/2.0**23
+        else:
+            signal = np.frombuffer(frames, dtype=f"<i{width}")/2.0**(8*width - 1)
+
+        signal = signal.reshape(-1, channels).T
+
+        return signal[0] if channels == 1 else signal, float(rate)
+
+    raise ValueError(f"Unknown recording format '{extension}', expected one of {EXTENSIONS}")
+
+
+def find_recordings(inputs: list[str]) -> list[str]:
+    """Recording files of directories, glob patterns and file paths, sorted and without duplicates
+
+    Args:
+        inputs (list[str]): Directories (searched recursively for the known extensions), glob patterns or files.
+
+    Returns:
+        list[str]: absolute paths of the recordings
+    """
+
+    paths = set()
+    for entry in inputs:
+        if os.path.isdir(entry):
+            for root, _, files in os.walk(entry):
+                paths.update(os.path.join(root, name) for name in files if os.path.splitext(name)[1].lower() in EXTENSIONS)
+        else:
+            paths.update(path for path in glob.glob(entry, recursive=True) if os.path.isfile(path))
+
+    return sorted(os.path.abspath(path) for path in paths)
+
+
+def output_path(
+    path: str,
+    output_directory: str,
+    common: str
+) -> str:
+    """Result file of a recording, mirroring its location under the common directory of the inputs"""
+
+    relative = os.path.relpath(path, common)
+
+    return os.path.join(output_directory, relative + ".npz")
+
+
+def parameters_digest(parameters: dict) -> str:
+    """Hash of the analysis parameters, stored in the manifest to detect changed settings on resume"""
+
+    return hashlib.blake2b(json.dumps(parameters, sort_keys=True).encode(), digest_size=16).hexdigest()
+
+
+def process_recording(
+    path: str,
+    output: str,
+    parameters: dict,
+    threads: int = 1
+) -> dict:
+    """Compute and save the spectra of one recording, in a worker process
+
+    The result is written to a temporary file renamed into place, so an interrupted run
+    never leaves a partial result behind.
+
+    Args:
+        path (str): Recording file.
+        output (str): Result file, a HosaResult saved as .npz.
+        parameters (dict): Parameters of the analysis, as built by main.
+        threads (int, optional): Threads of the "native" engine, the share of the CPUs of one worker. Defaults to 1.
+
+    Returns:
+        dict: manifest record of the recording
+    """
+
+    start = timer.perf_counter()
+
+    signal, frequency_sampling = read_recording(
+        path,
+        frequency_sampling=parameters["frequency_sampling"],
+        raw_dtype=parameters["raw_dtype"],
+        channels=parameters["channels"]
+    )
+
+    if frequency_sampling is None:
+        raise ValueError(f"The sampling rate of {path} is unknown, pass --fs")
+
+    frequency_array, amplitude, phase = tdhos(
+        signal,
+        frequency_sampling,
+        fmin=parameters["fmin"],
+        fmax=parameters["fmax"],
+        freq_step=parameters["freq_step"],
+        phase_step=parameters["phase_step"],
+        dtype=getattr(np, parameters["dtype"]),
+        enable_progress_bar=False,
+        engine=parameters["engine"],
+        exact_phase=parameters["exact_phase"],
+        max_memory_bytes=parameters["max_memory_bytes"],
+        n_jobs=threads,
+        orders=tuple(parameters["orders"]),
+        cumulative=parameters["cumulative"],
+        block_size=parameters["block_size"] if isinstance(signal, np.memmap) else None
+    )
+
+    os.makedirs(os.path.dirname(output), exist_ok=True)
+    descriptor, temporary = tempfile.mkstemp(dir=os.path.dirname(output), suffix=".tmp")
+    try:
+        with os.fdopen(descriptor, "wb") as file:
+            HosaResult.from_arrays(frequency_array, parameters["orders"], amplitude, phase, parameters["cumulative"]).save(file)
+        os.replace(temporary, output)
+    except BaseException:
+        os.unlink(temporary)
+        raise
+
+    return {
+        "file": path,
+        "output": output,
+        "status": "done",
+        "frequency_sampling": frequency_sampling,
+        "samples": int(signal.shape[-1]),
+        "seconds": timer.perf_counter() - start
+    }
+
+
+def read_manifest(path: str) -> dict[str, dict]:
+    """Last record of every recording in a manifest, skipping a truncated last line"""
+
+    records = {}
+    if not os.path.exists(path):
+        return records
+
+    with open(path) as file:
+        for line in file:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            records[record["file"]] = record
+
+    return records
+
+
+def run_batch(
+    inputs: list[str],
+    output_directory: str,
+    parameters: dict,
+    n_jobs: int | None = None,
+    log=sys.stderr
+) -> int:
+    """Spectra of every recording of the inputs, in parallel over files, resuming from the manifest of the output directory
+
+    A recording is skipped when the manifest has a "done" record for it with the same
+    size, modification time and parameters, and its result file still exists. Every
+    finished or failed recording is appended to the manifest as soon as it completes,
+    and at most n_jobs recordings are in flight, which bounds the memory to n_jobs
+    analyses. The CPUs are split between the workers, so the threads of the "native"
+    engine do not multiply with the worker processes.
+
+    Args:
+        inputs (list[str]): Directories, glob patterns or files.
+        output_directory (str): Directory of the results and of the manifest.
+        parameters (dict): Parameters of the analysis, as built by main.
+        n_jobs (int | None, optional): Worker processes. Defaults to None, one per CPU.
+        log (optional): Stream of the progress lines. Defaults to sys.stderr.
+
+    Returns:
+        int: number of recordings that failed
+    """
+
+    paths = find_recordings(inputs)
+    if not paths:
+        raise ValueError(f"No recordings found in {inputs}")
+
+    os.makedirs(output_directory, exist_ok=True)
+    manifest_path = os.path.join(output_directory, MANIFEST)
+    manifest = read_manifest(manifest_path)
+    digest = parameters_digest(parameters)
+    common = os.path.dirname(paths[0]) if len(paths) == 1 else os.path.commonpath(paths)
+
+    todo = []
+    for path in paths:
+        status = os.stat(path)
+        identity = {"size": status.st_size, "mtime": status.st_mtime, "parameters": digest}
+        output = output_path(path, output_directory, common)
+        record = manifest.get(path)
+
+        if record is not None and record["status"] == "done" and all(record.get(key) == value for key, value in identity.items()) and os.path.exists(record["output"]):
+            continue
+
+        todo.append((path, output, identity))
+
+    print(f"{len(paths) - len(todo)} of {len(paths)} recordings already done", file=log)
+
+    failures = 0
+    n_jobs = os.cpu_count() if n_jobs is None else n_jobs
+    threads = max(1, (os.cpu_count() or 1)//n_jobs)
+
+    with open(manifest_path, "a") as manifest_file, ProcessPoolExecutor(max_workers=n_jobs) as executor:
+        queue = iter(todo)
+        running = {}
+
+        def submit_next() -> None:
+            for path, output, identity in queue:
+                running[executor.submit(process_recording, path, output, parameters, threads)] = (path, output, identity)
+                return
+
+        for _ in range(n_jobs):
+            submit_next()
+
+        while running:
+            finished, _ = wait(running, return_when=FIRST_COMPLETED)
+
+            for future in finished:
+                path, output, identity = running.pop(future)
+
+                try:
+                    record = future.result()
+                except Exception as error:
+                    record = {"file": path, "output": output, "status": "error", "error": f"{type(error).__name__}: {error}"}
+                    failures += 1
+
+                record.update(identity)
+                manifest_file.write(json.dumps(record) + "\n")
+                manifest_file.flush()
+                os.fsync(manifest_file.fileno())
+
+                print(f"{record['status']}: {path}" + (f" ({record['error']})" if "error" in record else ""), file=log)
+                submit_next()
+
+    return failures
+
+
+def main(argv: list[str] | None = None) -> int:
+    """Batch analysis of recordings from the command line
+
+    Returns:
+        int: exit status, 1 when any recording failed
+    """
+
+    parser = argparse.ArgumentParser(description="Time domain high order spectra of directories of recordings (.npy, raw binary, CSV, WAV)")
+    parser.add_argument("inputs", nargs="+", help="directories, glob patterns or recording files")
+    parser.add_argument("--output", "-o", required=True, help="directory of the results and of the manifest")
+    parser.add_argument("--orders", nargs="+", type=int, default=(1, 2, 3, 4))
+    parser.add_argument("--no-cumulative", action="store_true", help="do not multiply the maxima of orders 1..k into order k")
+    parser.add_argument("--fmin", type=float, default=None)
+    parser.add_argument("--fmax", type=float, default=None)
+    parser.add_argument("--freq-step", type=float, default=1e-3)
+    parser.add_argument("--phase-step", type=float, default=1e-3)
+    parser.add_argument("--exact-phase", action="store_true")
+    parser.add_argument("--dtype", default="float64", choices=("float64", "float32"))
+    parser.add_argument("--engine", default="auto", choices=tuple(engine for engine in ENGINES if engine != "scan"))
+    parser.add_argument("--fs", type=float, default=None, help="sampling rate of the files without one")
+    parser.add_argument("--raw-dtype", default=None, help="sample dtype of raw files without a .json sidecar")
+    parser.add_argument("--channels", type=int, default=None, help="interleaved channels of raw files without a .json sidecar")
+    parser.add_argument("--jobs", "-j", type=int, default=None, help="worker processes, one per CPU by default")
+    parser.add_argument("--block-size", type=int, default=None, help="samples per block of memory mapped recordings")
+    parser.add_argument("--max-memory", type=int, default=None, help="memory budget in bytes of a basis tile")
+    arguments = parser.parse_args(argv)
+
+    parameters = {
+        "orders": [int(order) for order in arguments.orders],
+        "cumulative": not arguments.no_cumulative,
+        "fmin": arguments.fmin,
+        "fmax": arguments.fmax,
+        "freq_step": arguments.freq_step,
+        "phase_step": arguments.phase_step,
+        "exact_phase": arguments.exact_phase,
+        "dtype": arguments.dtype,
+        "engine": arguments.engine,
+        "frequency_sampling": arguments.fs,
+        "raw_dtype": arguments.raw_dtype,
+        "channels": arguments.channels,
+        "block_size": arguments.block_size,
+        "max_memory_bytes": arguments.max_memory
+    }
+
+    return int(run_batch(arguments.inputs, arguments.output, parameters, n_jobs=arguments.jobs) > 0)
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -1,8 +1,23 @@
+from collections.abc import Iterator
+
 import numpy as np
 from high_order_spectra_analysis.time_domain_spectrum.tds import tds
 from high_order_spectra_analysis.time_domain_bispectrum.tdbs import tdbs
+from high_order_spectra_analysis.time_domain_bispectrum.bispectrum2d import Bispectrum2D, tdbs2d
 from high_order_spectra_analysis.time_domain_trispectrum.tdts import tdts
 from high_order_spectra_analysis.time_domain_tetraspectrum.tdqs import tdqs
+from high_order_spectra_analysis.time_domain_high_order_spectra.tdhos import frequency_grid_of, tdhos
+from high_order_spectra_analysis.time_domain_high_order_spectra.adaptive import SpectralPeaks, adaptive_tdhos
+from high_order_spectra_analysis.time_domain_high_order_spectra.segmented import segmented_tdhos
+from high_order_spectra_analysis.time_domain_high_order_spectra.cross import cross_tdhos
+from high_order_spectra_analysis.time_domain_high_order_spectra.surrogates import SurrogateTest, surrogate_test
+from high_order_spectra_analysis.engines.cache import DEFAULT_CACHE_BYTES, BasisCache, ResultCache, signal_digest
+from high_order_spectra_analysis.engines.dispatch import check_engine, resolve_engine
+from high_order_spectra_analysis.engines.precision import accuracy_bound
+from high_order_spectra_analysis.engines.out_of_core import is_out_of_core, open_signal
+from high_order_spectra_analysis.hosa.result import HosaResult
+from high_order_spectra_analysis.hosa.shards import SHARD_FORMAT, range_slice, shard_digest, shard_slice, write_shard
+from high_order_spectra_analysis.engines.telemetry import Telemetry
 
 
 class Tdhosa:
@@ -16,8 +31,20 @@ class Tdhosa:
         freq_step: float = 1e-3,
         phase_step: float = 1e-3,
         dtype: np.dtype = np.float64,
-        enable_progress_bar: bool = True
+        enable_progress_bar: bool = True,
+        engine: str = "auto",
+        exact_phase: bool = False,
+        max_memory_bytes: int | None = None,
+        orders: tuple[int, ...] = (1, 2, 3, 4),
+        cache_max_bytes: int = DEFAULT_CACHE_BYTES,
+        n_jobs: int | None = None,
+        chunk_size: int | None = None,
+        block_size: int | None = None,
+        telemetry: Telemetry | None = None,
+        result_cache: ResultCache | None = None
     ):
+        check_engine(engine)
+
         self.frequency_sampling = frequency_sampling
         self.frequency_array = frequency_array
         self.fmin = fmin
@@ -26,6 +53,16 @@ class Tdhosa:
         self.phase_step = phase_step
         self.dtype = dtype
         self.enable_progress_bar = enable_progress_bar
+        self.engine = engine
+        self.exact_phase = exact_phase
+        self.max_memory_bytes = max_memory_bytes
+        self.orders = orders
+        self.basis_cache = BasisCache(max_bytes=cache_max_bytes)
+        self.n_jobs = n_jobs
+        self.chunk_size = chunk_size
+        self.block_size = block_size
+        self.telemetry = telemetry
+        self.result_cache = result_cache
 
 
     def run_tds(
@@ -42,7 +79,14 @@ class Tdhosa:
             freq_step=self.freq_step, 
             phase_step=self.phase_step, 
             dtype=self.dtype, 
-            enable_progress_bar=self.enable_progress_bar
+            enable_progress_bar=self.enable_progress_bar,
+            engine=self.engine,
+            exact_phase=self.exact_phase,
+            max_memory_bytes=self.max_memory_bytes,
+            basis_cache=self.basis_cache,
+            n_jobs=self.n_jobs,
+            chunk_size=self.chunk_size,
+            telemetry=self.telemetry
         )
         
     
@@ -60,15 +104,26 @@ class Tdhosa:
             freq_step=self.freq_step, 
             phase_step=self.phase_step, 
             dtype=self.dtype, 
-            enable_progress_bar=self.enable_progress_bar
+            enable_progress_bar=self.enable_progress_bar,
+            engine=self.engine,
+            exact_phase=self.exact_phase,
+            max_memory_bytes=self.max_memory_bytes,
+            basis_cache=self.basis_cache,
+            n_jobs=self.n_jobs,
+            chunk_size=self.chunk_size,
+            telemetry=self.telemetry
         )
         
     
     def run_tdts(
         self, 
-        signal: np.ndarray
+        signal: np.ndarray,
+        checkpoint: str | None = None
     ) -> tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray, np.ndarray, np.ndarray, np.ndarray]: 
         
+        if self.result_cache is not None:
+            return self._cached_result(signal, (1, 2, 3), True, checkpoint).as_tuple()
+
         return tdts(
             signal, 
             self.frequency_sampling, 
@@ -78,14 +133,27 @@ class Tdhosa:
             freq_step=self.freq_step, 
             phase_step=self.phase_step, 
             dtype=self.dtype, 
-            enable_progress_bar=self.enable_progress_bar
+            enable_progress_bar=self.enable_progress_bar,
+            engine=self.engine,
+            exact_phase=self.exact_phase,
+            max_memory_bytes=self.max_memory_bytes,
+            basis_cache=self.basis_cache,
+            n_jobs=self.n_jobs,
+            chunk_size=self.chunk_size,
+            telemetry=self.telemetry,
+            block_size=self.block_size,
+            checkpoint=checkpoint
         )
         
     def run_tdqs(
         self, 
-        signal: np.ndarray
+        signal: np.ndarray,
+        checkpoint: str | None = None
     ) -> tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray, np.ndarray, np.ndarray, np.ndarray, np.ndarray, np.ndarray]: 
         
+        if self.result_cache is not None:
+            return self._cached_result(signal, (1, 2, 3, 4), True, checkpoint).as_tuple()
+
         return tdqs(
             signal, 
             self.frequency_sampling, 
@@ -95,5 +163,556 @@ class Tdhosa:
             freq_step=self.freq_step, 
             phase_step=self.phase_step, 
             dtype=self.dtype, 
-            enable_progress_bar=self.enable_progress_bar
-        )
\ No newline at end of file
+            enable_progress_bar=self.enable_progress_bar,
+            engine=self.engine,
+            exact_phase=self.exact_phase,
+            max_memory_bytes=self.max_memory_bytes,
+            basis_cache=self.basis_cache,
+            n_jobs=self.n_jobs,
+            chunk_size=self.chunk_size,
+            telemetry=self.telemetry,
+            block_size=self.block_size,
+            checkpoint=checkpoint
+        )
+
+    def run_tdhos(
+        self, 
+        signal: np.ndarray,
+        orders: tuple[int, ...] | None = None,
+        cumulative: bool = True,
+        checkpoint: str | None = None,
+        time: np.ndarray | None = None
+    ) -> tuple[np.ndarray, np.ndarray, np.ndarray]: 
+        
+        orders = self.orders if orders is None else orders
+
+        if self.result_cache is not None:
+            result = self._cached_result(signal, orders, cumulative, checkpoint, time=time)
+            return result.frequency_array, result.amplitudes, result.phases
+
+        return self._tdhos(signal, orders, cumulative, checkpoint, time=time)
+
+    def _tdhos(
+        self, 
+        signal: np.ndarray,
+        orders: tuple[int, ...],
+        cumulative: bool,
+        checkpoint: str | None = None,
+        frequency_array: np.ndarray | None = None,
+        time: np.ndarray | None = None
+    ) -> tuple[np.ndarray, np.ndarray, np.ndarray]: 
+
+        return tdhos(
+            signal, 
+            self.frequency_sampling, 
+            time=time,
+            frequency_array=self.frequency_array if frequency_array is None else frequency_array, 
+            fmin=self.fmin, 
+            fmax=self.fmax, 
+            freq_step=self.freq_step, 
+            phase_step=self.phase_step, 
+            dtype=self.dtype, 
+            enable_progress_bar=self.enable_progress_bar,
+            engine=self.engine,
+            exact_phase=self.exact_phase,
+            max_memory_bytes=self.max_memory_bytes,
+            basis_cache=self.basis_cache,
+            n_jobs=self.n_jobs,
+            chunk_size=self.chunk_size,
+            telemetry=self.telemetry,
+            block_size=self.block_size,
+            orders=orders,
+            cumulative=cumulative,
+            checkpoint=checkpoint
+        )
+
+    def _cached_result(
+        self, 
+        signal: np.ndarray,
+        orders: tuple[int, ...],
+        cumulative: bool,
+        checkpoint: str | None = None,
+        time: np.ndarray | None = None
+    ) -> HosaResult: 
+        """Complete HosaResult of the orders, memory mapped from the result cache or computed and stored in it"""
+
+        orders = tuple(int(order) for order in orders)
+        signal = open_signal(signal) if is_out_of_core(signal) else np.asarray(signal)
+
+        # An iterator of chunks cannot be hashed without consuming it
+        if isinstance(signal, Iterator):
+            frequency_array, amplitude, phase = self._tdhos(signal, orders, cumulative, checkpoint, time=time)
+            return HosaResult.from_arrays(frequency_array, orders, amplitude, phase, cumulative)
+
+        frequency_array, _ = frequency_grid_of(
+            signal.shape[-1], self.frequency_sampling, self.frequency_array, self.fmin, self.fmax, self.freq_step, self.dtype
+        )
+        key = self.result_cache.key(
+            signal,
+            self.frequency_sampling,
+            frequency_array,
+            self.phase_step,
+            self.dtype,
+            orders,
+            cumulative,
+            resolve_engine(self.engine),
+            self.exact_phase,
+            time=time
+        )
+
+        buffer = self.result_cache.get(key)
+        if buffer is not None:
+            return HosaResult(frequency_array, orders, buffer, cumulative=cumulative)
+
+        frequency_array, amplitude, phase = self._tdhos(signal, orders, cumulative, checkpoint, time=time)
+        result = HosaResult.from_arrays(frequency_array, orders, amplitude, phase, cumulative)
+        self.result_cache.put(key, result.buffer)
+
+        return result
+
+    def run(
+        self, 
+        signal: np.ndarray,
+        orders: tuple[int, ...] | None = None,
+        cumulative: bool = True,
+        time: np.ndarray | None = None
+    ) -> HosaResult: 
+        """High order spectra as a HosaResult, each order computed when it is first accessed
+
+        The signal is kept by the result until every order is computed. An iterator of chunks can
+        only be read once, so its orders are all computed here, as are all the orders when the
+        instance has a result cache.
+
+        Args:
+            signal (np.ndarray): Signal, with shape (samples,) or (channels, samples), or any out-of-core signal accepted by tdhos.
+            orders (tuple[int, ...] | None, optional): Orders of the result. Defaults to None, which uses the orders of the instance.
+            cumulative (bool, optional): Multiply the maxima of orders 1..k into the amplitude of order k. Defaults to True.
+            time (np.ndarray | None, optional): Time array of the samples, for irregular sample times such as jittered
+                timestamps or dropped samples, which the "auto" engine evaluates with the "nufft" one. Defaults to None, the
+                uniform grid of the frequency sampling.
+
+        Returns:
+            HosaResult: the result, with nothing computed yet unless the signal is an iterator
+        """
+
+        orders = tuple(int(order) for order in (self.orders if orders is None else orders))
+
+        if self.result_cache is not None:
+            return self._cached_result(signal, orders, cumulative, time=time)
+
+        signal = open_signal(signal) if is_out_of_core(signal) else np.asarray(signal)
+
+        if isinstance(signal, Iterator):
+            frequency_array, amplitude, phase = self._tdhos(signal, orders, cumulative, time=time)
+            return HosaResult.from_arrays(frequency_array, orders, amplitude, phase, cumulative)
+
+        frequency_array, _ = frequency_grid_of(
+            signal.shape[-1], self.frequency_sampling, self.frequency_array, self.fmin, self.fmax, self.freq_step, self.dtype
+        )
+
+        def compute(powers: tuple[int, ...]) -> tuple[np.ndarray, np.ndarray]:
+            _, maxima, phases = self._tdhos(signal, powers, False, time=time)
+            return maxima, phases
+
+        return HosaResult.empty(
+            frequency_array,
+            orders,
+            compute,
+            channels_shape=signal.shape[:-1],
+            cumulative=cumulative,
+            dtype=self.dtype
+        )
+
+    def run_shard(
+        self, 
+        signal: np.ndarray,
+        path: str,
+        shard_index: int | None = None,
+        shard_count: int | None = None,
+        frequency_range: tuple[float, float] | None = None,
+        orders: tuple[int, ...] | None = None,
+        cumulative: bool = True
+    ) -> HosaResult: 
+        """High order spectra of one shard of the frequency array, saved with the description of the shard
+
+        The shard is either one of shard_count contiguous parts of the frequency array of
+        the instance, or the frequencies in an explicit [low, high) range. The saved file
+        holds the spectra of the shard as a HosaResult, with its position in the full
+        frequency array and a digest of every parameter of the analysis, from which
+        merge_shards checks and assembles the shards computed by any number of processes.
+
+        Args:
+            signal (np.ndarray): Signal, with shape (samples,) or (channels, samples), or an out-of-core signal other than an iterator.
+            path (str): Shard file, written to a temporary file renamed into place.
+            shard_index (int | None, optional): Index of the shard, from 0 to shard_count - 1. Defaults to None.
+            shard_count (int | None, optional): Number of shards. Defaults to None.
+            frequency_range (tuple[float, float] | None, optional): Frequencies of the shard, instead of an index and count. Defaults to None.
+            orders (tuple[int, ...] | None, optional): Orders to compute. Defaults to None, which uses the orders of the instance.
+            cumulative (bool, optional): Multiply the maxima of orders 1..k into the amplitude of order k. Defaults to True.
+
+        Returns:
+            HosaResult: spectra of the frequencies of the shard
+        """
+
+        if (frequency_range is None) == (shard_index is None or shard_count is None):
+            raise ValueError("Pass either shard_index and shard_count or frequency_range")
+
+        orders = tuple(int(order) for order in (self.orders if orders is None else orders))
+        signal = open_signal(signal) if is_out_of_core(signal) else np.asarray(signal)
+
+        if isinstance(signal, Iterator):
+            raise ValueError("A shard needs a signal that can be read again, not an iterator of chunks")
+
+        full_frequency_array, _ = frequency_grid_of(
+            signal.shape[-1], self.frequency_sampling, self.frequency_array, self.fmin, self.fmax, self.freq_step, self.dtype
+        )
+
+        if frequency_range is None:
+            shard = shard_slice(len(full_frequency_array), shard_index, shard_count)
+        else:
+            shard = range_slice(full_frequency_array, frequency_range)
+
+        frequency_array = full_frequency_array[shard]
+
+        if len(frequency_array):
+            _, amplitude, phase = self._tdhos(signal, orders, cumulative, frequency_array=frequency_array)
+            result = HosaResult.from_arrays(frequency_array, orders, amplitude, phase, cumulative)
+        else:
+            result = HosaResult(
+                frequency_array, orders, np.empty((len(orders), 2) + signal.shape[:-1] + (0,), dtype=self.dtype), cumulative=cumulative
+            )
+
+        signal_hash = signal_digest(signal)
+        metadata = {
+            "format": SHARD_FORMAT,
+            "digest": shard_digest(
+                signal_hash,
+                self.frequency_sampling,
+                full_frequency_array,
+                self.phase_step,
+                self.dtype,
+                orders,
+                cumulative,
+                self.exact_phase
+            ),
+            "start": shard.start,
+            "stop": shard.stop,
+            "frequencies": len(full_frequency_array),
+            "shard_index": shard_index,
+            "shard_count": shard_count,
+            "signal_digest": signal_hash,
+            "frequency_sampling": float(self.frequency_sampling),
+            "phase_step": self.phase_step,
+            "dtype": np.dtype(self.dtype).name,
+            "orders": list(orders),
+            "cumulative": cumulative,
+            "exact_phase": self.exact_phase,
+            "engine": resolve_engine(self.engine)
+        }
+        write_shard(path, result, metadata)
+
+        return result
+
+    def run_batch(
+        self, 
+        signals: np.ndarray,
+        orders: tuple[int, ...] | None = None,
+        cumulative: bool = True,
+        time: np.ndarray | None = None
+    ) -> tuple[np.ndarray, np.ndarray, np.ndarray]: 
+        """High order spectra of a batch of channels sharing the sampling rate and length
+
+        Args:
+            signals (np.ndarray): Signals with shape (channels, samples), C- or F-contiguous.
+            orders (tuple[int, ...] | None, optional): Orders to compute. Defaults to None, which uses the orders of the instance.
+            cumulative (bool, optional): Multiply the maxima of orders 1..k into the amplitude of order k. Defaults to True.
+            time (np.ndarray | None, optional): Time array shared by every channel. Defaults to None, the uniform grid of the
+                frequency sampling.
+
+        Returns:
+            tuple[np.ndarray, np.ndarray, np.ndarray]: frequency array, amplitude array and phase array, the last two with shape (orders, channels, frequencies)
+        """
+
+        if np.ndim(signals) != 2:
+            raise ValueError(f"Expected signals with shape (channels, samples), got shape {np.shape(signals)}")
+
+        return self.run_tdhos(signals, orders=orders, cumulative=cumulative, time=time)
+
+    def run_cross(
+        self, 
+        signals: np.ndarray,
+        pairs: np.ndarray | None = None,
+        order: int = 2
+    ) -> tuple[np.ndarray, np.ndarray, np.ndarray]: 
+        """Cross high order spectra of channel pairs, mean(x_i * x_j * cos(2*pi*f*t + phi)) maximized over the phase
+
+        Args:
+            signals (np.ndarray): Signals with shape (channels, samples).
+            pairs (np.ndarray | None, optional): Channel indices with shape (pairs, order), (i, j) for a cross-bispectrum and
+                (i, j, k) for a cross-trispectrum. Defaults to None, every combination of order distinct channels.
+            order (int, optional): Channels per product when pairs is None. Defaults to 2.
+
+        Returns:
+            tuple[np.ndarray, np.ndarray, np.ndarray]: frequency array, amplitude array and phase array, the last two with shape (pairs, frequencies)
+        """
+
+        return cross_tdhos(
+            signals,
+            self.frequency_sampling,
+            pairs=pairs,
+            order=order,
+            frequency_array=self.frequency_array,
+            fmin=self.fmin,
+            fmax=self.fmax,
+            freq_step=self.freq_step,
+            phase_step=self.phase_step,
+            dtype=self.dtype,
+            enable_progress_bar=self.enable_progress_bar,
+            exact_phase=self.exact_phase,
+            max_memory_bytes=self.max_memory_bytes,
+            telemetry=self.telemetry
+        )
+
+    def run_surrogate_test(
+        self, 
+        signal: np.ndarray,
+        count: int = 1000,
+        method: str = "phase",
+        alphas: tuple[float, ...] = (0.05,),
+        seed: int | None = None,
+        pairs: np.ndarray | None = None,
+        orders: tuple[int, ...] | None = None,
+        cumulative: bool = True,
+        block_size: int | None = None,
+        keep_null: bool = False
+    ) -> SurrogateTest: 
+        """Per-frequency p-values and thresholds of the spectra of a signal, against count phase randomized or time shifted surrogates
+
+        Args:
+            signal (np.ndarray): Signal, with shape (samples,) or (channels, samples).
+            count (int, optional): Number of surrogates. Defaults to 1000.
+            method (str, optional): "phase" or "shift", which requires pairs. Defaults to "phase".
+            alphas (tuple[float, ...], optional): Significance levels of the thresholds. Defaults to (0.05,).
+            seed (int | None, optional): Seed of the surrogates. Defaults to None, a fresh seed returned with the result.
+            pairs (np.ndarray | None, optional): Channel indices with shape (pairs, order), to test cross spectra. Defaults to None.
+            orders (tuple[int, ...] | None, optional): Orders to test. Defaults to None, which uses the orders of the instance.
+            cumulative (bool, optional): Test the cumulative amplitudes. Defaults to True.
+            block_size (int | None, optional): Surrogates per block. Defaults to None, as many as fit in max_memory_bytes.
+            keep_null (bool, optional): Return the spectra of every surrogate, count times the size of the spectra. Defaults to False.
+
+        Returns:
+            SurrogateTest: spectra of the signal, p-values, thresholds and null distribution
+        """
+
+        return surrogate_test(
+            signal,
+            self.frequency_sampling,
+            count=count,
+            method=method,
+            alphas=alphas,
+            seed=seed,
+            pairs=pairs,
+            frequency_array=self.frequency_array,
+            fmin=self.fmin,
+            fmax=self.fmax,
+            freq_step=self.freq_step,
+            phase_step=self.phase_step,
+            dtype=self.dtype,
+            enable_progress_bar=self.enable_progress_bar,
+            engine=self.engine,
+            exact_phase=self.exact_phase,
+            max_memory_bytes=self.max_memory_bytes,
+            orders=self.orders if orders is None else orders,
+            cumulative=cumulative,
+            n_jobs=self.n_jobs,
+            block_size=block_size,
+            keep_null=keep_null,
+            telemetry=self.telemetry
+        )
+
+    def run_adaptive(
+        self, 
+        signal: np.ndarray,
+        coarse_step: float | None = None,
+        n_peaks: int = 5,
+        threshold: float = 0.0,
+        refinement: str = "parabolic",
+        dense: bool = False,
+        orders: tuple[int, ...] | None = None,
+        cumulative: bool = True
+    ) -> tuple[SpectralPeaks, np.ndarray | None, np.ndarray | None]: 
+        """Peaks of the high order spectra, searched on a coarse grid and refined to freq_step around each candidate
+
+        Args:
+            signal (np.ndarray): Signal, with shape (samples,) or (channels, samples).
+            coarse_step (float | None, optional): Frequency step of the coarse grid. Defaults to None, 0.5/duration.
+            n_peaks (int, optional): Maximum number of peaks per order and channel. Defaults to 5.
+            threshold (float, optional): Minimum amplitude of a peak, relative to the largest amplitude of its order. Defaults to 0.0.
+            refinement (str, optional): "grid", "golden" or "parabolic". Defaults to "parabolic".
+            dense (bool, optional): Also return the spectra interpolated on the whole freq_step grid. Defaults to False.
+            orders (tuple[int, ...] | None, optional): Orders to search. Defaults to None, which uses the orders of the instance.
+            cumulative (bool, optional): Multiply the maxima of orders 1..k into the amplitude of order k. Defaults to True.
+
+        Returns:
+            tuple[SpectralPeaks, np.ndarray | None, np.ndarray | None]: peaks, and the dense frequency and amplitude arrays when dense is True
+        """
+
+        return adaptive_tdhos(
+            signal, 
+            self.frequency_sampling, 
+            fmin=self.fmin, 
+            fmax=self.fmax, 
+            freq_step=self.freq_step, 
+            coarse_step=coarse_step,
+            phase_step=self.phase_step, 
+            dtype=self.dtype, 
+            engine=self.engine,
+            exact_phase=self.exact_phase,
+            max_memory_bytes=self.max_memory_bytes,
+            basis_cache=self.basis_cache,
+            n_jobs=self.n_jobs,
+            chunk_size=self.chunk_size,
+            telemetry=self.telemetry,
+            orders=self.orders if orders is None else orders,
+            cumulative=cumulative,
+            n_peaks=n_peaks,
+            threshold=threshold,
+            refinement=refinement,
+            dense=dense
+        )
+
+    def run_segmented(
+        self, 
+        signal: np.ndarray,
+        segment_length: int,
+        overlap: int | None = None,
+        orders: tuple[int, ...] | None = None,
+        cumulative: bool = True
+    ) -> tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray, np.ndarray]: 
+        """Segment-averaged high order spectra, all segments reduced against one shared basis
+
+        The amplitude is the mean of the per-segment amplitudes, Welch-style; the phase is the one of the coherent mean of the
+        segment projections, referred to the time origin of the signal.
+
+        Args:
+            signal (np.ndarray): Signal, with shape (samples,) or (channels, samples).
+            segment_length (int): Samples per segment.
+            overlap (int | None, optional): Samples shared by consecutive segments. Defaults to None, half of segment_length.
+            orders (tuple[int, ...] | None, optional): Orders to compute. Defaults to None, which uses the orders of the instance.
+            cumulative (bool, optional): Multiply the maxima of orders 1..k into the amplitude of order k. Defaults to True.
+
+        Returns:
+            tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray, np.ndarray]: frequency array, mean of the per-segment amplitudes, phase of the
+                coherent mean projection, variance of the per-segment amplitudes and per-segment amplitudes
+        """
+
+        return segmented_tdhos(
+            signal, 
+            self.frequency_sampling, 
+            segment_length,
+            overlap=overlap,
+            frequency_array=self.frequency_array, 
+            fmin=self.fmin, 
+            fmax=self.fmax, 
+            freq_step=self.freq_step, 
+            phase_step=self.phase_step, 
+            dtype=self.dtype, 
+            engine=self.engine,
+            exact_phase=self.exact_phase,
+            max_memory_bytes=self.max_memory_bytes,
+            basis_cache=self.basis_cache,
+            n_jobs=self.n_jobs,
+            chunk_size=self.chunk_size,
+            telemetry=self.telemetry,
+            orders=self.orders if orders is None else orders,
+            cumulative=cumulative
+        )
+
+    def run_bispectrum2d(
+        self, 
+        signal: np.ndarray,
+        segment_length: int | None = None,
+        overlap: int | None = None,
+        pairs: np.ndarray | None = None,
+        freq_step: float | None = None
+    ) -> Bispectrum2D: 
+        """Bispectrum over the principal domain of the (f1, f2) plane, or at candidate (f1, f2) pairs
+
+        Args:
+            signal (np.ndarray): Signal, with shape (samples,).
+            segment_length (int | None, optional): Samples per segment. Defaults to None, a single segment with the whole signal.
+            overlap (int | None, optional): Samples shared by consecutive segments. Defaults to None, half of segment_length.
+            pairs (np.ndarray | None, optional): Candidate (f1, f2) pairs, in Hz, with shape (pairs, 2). Defaults to None, the
+                whole principal domain.
+            freq_step (float | None, optional): Step of the (f1, f2) grid, independent of the step of the instance. Defaults to
+                None, the resolution of a segment.
+
+        Returns:
+            Bispectrum2D: pairs, amplitude, biphase and squared bicoherence, with full_plane building the symmetric view
+        """
+
+        return tdbs2d(
+            signal,
+            self.frequency_sampling,
+            segment_length=segment_length,
+            overlap=overlap,
+            pairs=pairs,
+            fmin=self.fmin,
+            fmax=self.fmax,
+            freq_step=freq_step,
+            dtype=self.dtype,
+            enable_progress_bar=self.enable_progress_bar,
+            engine="auto" if self.engine == "scan" else self.engine,
+            max_memory_bytes=self.max_memory_bytes,
+            basis_cache=self.basis_cache,
+            n_jobs=self.n_jobs,
+            chunk_size=self.chunk_size,
+            telemetry=self.telemetry
+        )
+
+    def accuracy_bound(
+        self, 
+        signal: np.ndarray,
+        orders: tuple[int, ...] | None = None,
+        cumulative: bool = True
+    ) -> np.ndarray: 
+        """Bound of the absolute difference between the amplitudes computed in the dtype of the instance and in float64
+
+        The bound covers the "blocked", "parallel" and "native" engines; the "analytic", "czt" and "nufft" engines
+        compute in float64 and round only the signal and its powers to dtype.
+
+        Args:
+            signal (np.ndarray): Signal, with shape (samples,) or (channels, samples).
+            orders (tuple[int, ...] | None, optional): Orders to bound. Defaults to None, which uses the orders of the instance.
+            cumulative (bool, optional): Whether the amplitudes are cumulative. Defaults to True.
+
+        Returns:
+            np.ndarray: absolute bounds with shape (orders, [channels]), zero in float64
+        """
+
+        orders = self.orders if orders is None else orders
+
+        if np.dtype(self.dtype) == np.float64:
+            return np.zeros((len(orders),) + np.shape(signal)[:-1])
+
+        return accuracy_bound(signal, orders, self.dtype, cumulative)
+
+    def cache_info(self) -> dict[str, int]:
+        """Counters of the basis cache
+
+        Returns:
+            dict[str, int]: hits, misses, number of cached tables, cached bytes and byte limit
+        """
+
+        return {
+            "hits": self.basis_cache.hits,
+            "misses": self.basis_cache.misses,
+            "entries": len(self.basis_cache),
+            "bytes": self.basis_cache.current_bytes,
+            "max_bytes": self.basis_cache.max_bytes
+        }
+
+    def clear_cache(self) -> None:
+        """Drop the cached basis tables"""
+
+        self.basis_cache.clear()
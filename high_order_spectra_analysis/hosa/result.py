@@ -0,0 +1,312 @@
+import struct
+import zipfile
+from collections.abc import Callable
+
+import numpy as np
+
+# Order of each named spectrum
+ORDER_NAMES = {"spectrum": 1, "bispectrum": 2, "trispectrum": 3, "tetraspectrum": 4}
+
+
+def npz_memmap(
+    path: str,
+    name: str,
+    mmap_mode: str = "r"
+) -> np.memmap:
+    """Memory map of an array stored uncompressed in a .npz file, as written by np.savez
+
+    Args:
+        path (str): .npz file.
+        name (str): Name of the array in the file.
+        mmap_mode (str, optional): Mode of the memory map. Defaults to "r".
+
+    Returns:
+        np.memmap: the array, read from the file on access
+    """
+
+    with zipfile.ZipFile(path) as archive:
+        info = archive.getinfo(name + ".npy")
+        if info.compress_type != zipfile.ZIP_STORED:
+            raise ValueError(f"{name} is compressed in {path} and cannot be memory mapped")
+
+        with archive.open(info) as member:
+            version = np.lib.format.read_magic(member)
+            read_header = np.lib.format.read_array_header_1_0 if version == (1, 0) else np.lib.format.read_array_header_2_0
+            shape, fortran_order, dtype = read_header(member)
+            array_offset = member.tell()
+
+    # The data of a stored member follows its local file header
+    with open(path, "rb") as file:
+        file.seek(info.header_offset + 26)
+        name_length, extra_length = struct.unpack("<HH", file.read(4))
+
+    offset = info.header_offset + 30 + name_length + extra_length + array_offset
+
+    return np.memmap(path, dtype=dtype, mode=mmap_mode, offset=offset, shape=shape, order="F" if fortran_order else "C")
+
+
+class HosaResult:
+    """High order spectra of one signal, stored in a single contiguous buffer
+
+    The amplitude and phase of every order live in one array with shape
+    (orders, 2, [channels,] frequencies), amplitudes at [:, 0] and phases at [:, 1],
+    and every accessor returns a view of it. The orders are computed on first access:
+    an order that is never read is never evaluated, and the orders missing when several
+    are needed at once are evaluated together, sharing the basis evaluation. With
+    cumulative amplitudes, the amplitude of order k is the product of the maxima of
+    orders 1..k, so reading order k after order j < k evaluates only the powers j+1..k.
+
+    Args:
+        frequency_array (np.ndarray): Frequency array.
+        orders (tuple[int, ...]): Orders of the result, in the order of the buffer rows.
+        buffer (np.ndarray): Amplitudes and phases, with shape (orders, 2, [channels,] frequencies).
+        computed (np.ndarray | None, optional): Whether each order of the buffer holds its spectrum. Defaults to None, all of them.
+        cumulative (bool, optional): Whether the amplitude of order k is the product of the maxima of orders 1..k. Defaults to True.
+        compute (Callable[[tuple[int, ...]], tuple[np.ndarray, np.ndarray]] | None, optional): Returns the per-power maxima and
+            phases, with shape (powers, [channels,] frequencies), of the given signal powers. Defaults to None, for a complete result.
+    """
+
+    __slots__ = ("frequency_array", "orders", "cumulative", "buffer", "computed", "_compute")
+
+    def __init__(
+        self,
+        frequency_array: np.ndarray,
+        orders: tuple[int, ...],
+        buffer: np.ndarray,
+        computed: np.ndarray | None = None,
+        cumulative: bool = True,
+        compute: Callable[[tuple[int, ...]], tuple[np.ndarray, np.ndarray]] | None = None
+    ):
+        if buffer.shape[:2] != (len(orders), 2) or buffer.shape[-1] != len(frequency_array):
+            raise ValueError(
+                f"Expected a buffer with shape ({len(orders)}, 2, [channels,] {len(frequency_array)}), got shape {buffer.shape}"
+            )
+
+        self.frequency_array = frequency_array
+        self.orders = tuple(int(order) for order in orders)
+        self.cumulative = cumulative
+        self.buffer = buffer
+        self.computed = np.ones(len(orders), dtype=bool) if computed is None else np.asarray(computed, dtype=bool)
+        self._compute = compute
+
+    @classmethod
+    def empty(
+        cls,
+        frequency_array: np.ndarray,
+        orders: tuple[int, ...],
+        compute: Callable[[tuple[int, ...]], tuple[np.ndarray, np.ndarray]],
+        channels_shape: tuple[int, ...] = (),
+        cumulative: bool = True,
+        dtype: np.dtype = np.float64
+    ) -> "HosaResult":
+        """Result whose orders are computed on first access
+
+        Args:
+            frequency_array (np.ndarray): Frequency array.
+            orders (tuple[int, ...]): Orders of the result.
+            compute (Callable[[tuple[int, ...]], tuple[np.ndarray, np.ndarray]]): Per-power maxima and phases of the given signal powers.
+            channels_shape (tuple[int, ...], optional): Shape of the channels of the signal. Defaults to (), a single signal.
+            cumulative (bool, optional): Multiply the maxima of orders 1..k into the amplitude of order k. Defaults to True.
+            dtype (np.dtype, optional): Precision of the buffer. Defaults to np.float64.
+
+        Returns:
+            HosaResult: the result, with nothing computed yet
+        """
+
+        buffer = np.empty((len(orders), 2) + tuple(channels_shape) + (len(frequency_array),), dtype=dtype)
+
+        return cls(frequency_array, orders, buffer, np.zeros(len(orders), dtype=bool), cumulative, compute)
+
+    @classmethod
+    def from_arrays(
+        cls,
+        frequency_array: np.ndarray,
+        orders: tuple[int, ...],
+        amplitude: np.ndarray,
+        phase: np.ndarray,
+        cumulative: bool = True
+    ) -> "HosaResult":
+        """Result holding the amplitude and phase arrays returned by tdhos
+
+        Args:
+            frequency_array (np.ndarray): Frequency array.
+            orders (tuple[int, ...]): Orders of the rows of amplitude and phase.
+            amplitude (np.ndarray): Amplitudes, with shape (orders, [channels,] frequencies).
+            phase (np.ndarray): Phases, with the same shape.
+            cumulative (bool, optional): Whether the amplitudes are cumulative. Defaults to True.
+
+        Returns:
+            HosaResult: the complete result
+        """
+
+        buffer = np.empty((amplitude.shape[0], 2) + amplitude.shape[1:], dtype=amplitude.dtype)
+        buffer[:, 0] = amplitude
+        buffer[:, 1] = phase
+
+        return cls(frequency_array, orders, buffer, cumulative=cumulative)
+
+    def _row(self, order: int) -> int:
+        if order not in self.orders:
+            raise ValueError(f"Order {order} is not in the orders of the result {self.orders}")
+
+        return self.orders.index(order)
+
+    def compute(self, orders: tuple[int, ...] | None = None) -> "HosaResult":
+        """Compute the given orders that are not computed yet, in one evaluation
+
+        Args:
+            orders (tuple[int, ...] | None, optional): Orders to compute. Defaults to None, every order of the result.
+
+        Returns:
+            HosaResult: the result itself
+        """
+
+        orders = self.orders if orders is None else tuple(int(order) for order in orders)
+        missing = [order for order in orders if not self.computed[self._row(order)]]
+
+        if not missing:
+            return self
+
+        if self._compute is None:
+            raise ValueError(f"Orders {tuple(missing)} were not computed and the result has no signal to compute them from")
+
+        if not self.cumulative:
+            maxima, phases = self._compute(tuple(sorted(missing)))
+
+            for index, order in enumerate(sorted(missing)):
+                row = self._row(order)
+                self.buffer[row, 0] = maxima[index]
+                self.buffer[row, 1] = phases[index]
+                self.computed[row] = True
+
+            return self
+
+        # Start the product from the highest computed order below the missing ones
+        target = max(missing)
+        known = [order for order in self.orders if self.computed[self._row(order)] and order < min(missing)]
+        start = max(known, default=0)
+        powers = tuple(range(start + 1, target + 1))
+
+        maxima, phases = self._compute(powers)
+
+        amplitude = self.buffer[self._row(start), 0] if start > 0 else 1
+        for index, power in enumerate(powers):
+            amplitude = amplitude*maxima[index]
+
+            if power in self.orders and not self.computed[self._row(power)]:
+                row = self._row(power)
+                self.buffer[row, 0] = amplitude
+                self.buffer[row, 1] = phases[index]
+                self.computed[row] = True
+
+        return self
+
+    def amplitude(self, order: int) -> np.ndarray:
+        """Amplitude of an order, as a view of the buffer with shape ([channels,] frequencies)"""
+
+        self.compute((order,))
+
+        return self.buffer[self._row(order), 0]
+
+    def phase(self, order: int) -> np.ndarray:
+        """Phase of an order, as a view of the buffer with shape ([channels,] frequencies)"""
+
+        self.compute((order,))
+
+        return self.buffer[self._row(order), 1]
+
+    @property
+    def amplitudes(self) -> np.ndarray:
+        """Amplitudes of every order, as a view of the buffer with shape (orders, [channels,] frequencies)"""
+
+        return self.compute().buffer[:, 0]
+
+    @property
+    def phases(self) -> np.ndarray:
+        """Phases of every order, as a view of the buffer with shape (orders, [channels,] frequencies)"""
+
+        return self.compute().buffer[:, 1]
+
+    @property
+    def spectrum(self) -> np.ndarray:
+        return self.amplitude(ORDER_NAMES["spectrum"])
+
+    @property
+    def phase_spectrum(self) -> np.ndarray:
+        return self.phase(ORDER_NAMES["spectrum"])
+
+    @property
+    def bispectrum(self) -> np.ndarray:
+        return self.amplitude(ORDER_NAMES["bispectrum"])
+
+    @property
+    def phase_bispectrum(self) -> np.ndarray:
+        return self.phase(ORDER_NAMES["bispectrum"])
+
+    @property
+    def trispectrum(self) -> np.ndarray:
+        return self.amplitude(ORDER_NAMES["trispectrum"])
+
+    @property
+    def phase_trispectrum(self) -> np.ndarray:
+        return self.phase(ORDER_NAMES["trispectrum"])
+
+    @property
+    def tetraspectrum(self) -> np.ndarray:
+        return self.amplitude(ORDER_NAMES["tetraspectrum"])
+
+    @property
+    def phase_tetraspectrum(self) -> np.ndarray:
+        return self.phase(ORDER_NAMES["tetraspectrum"])
+
+    def as_tuple(self) -> tuple[np.ndarray, ...]:
+        """Frequency array followed by the amplitude and phase of every order, in the layout returned by tds, tdbs, tdts and tdqs"""
+
+        self.compute()
+
+        return (self.frequency_array,) + tuple(self.buffer[row, part] for row in range(len(self.orders)) for part in (0, 1))
+
+    def save(self, path: str) -> None:
+        """Save the buffer as is, with the frequency array and the computed orders, to one uncompressed .npz file
+
+        Args:
+            path (str): Path of the file.
+        """
+
+        np.savez(
+            path,
+            buffer=self.buffer,
+            frequency_array=self.frequency_array,
+            orders=np.asarray(self.orders),
+            computed=self.computed,
+            cumulative=np.asarray(self.cumulative)
+        )
+
+    @classmethod
+    def load(cls, path: str, mmap_mode: str | None = None) -> "HosaResult":
+        """Result saved by save. Orders that were not computed before saving cannot be computed anymore
+
+        Args:
+            path (str): Path of the file.
+            mmap_mode (str | None, optional): Memory map the buffer in this mode instead of reading it. Defaults to None.
+
+        Returns:
+            HosaResult: the result
+        """
+
+        with np.load(path) as data:
+            return cls(
+                data["frequency_array"],
+                tuple(data["orders"].tolist()),
+                data["buffer"] if mmap_mode is None else npz_memmap(path, "buffer", mmap_mode),
+                data["computed"],
+                bool(data["cumulative"])
+            )
+
+    def __repr__(self) -> str:
+        computed = tuple(order for order, done in zip(self.orders, self.computed) if done)
+
+        return (
+            f"HosaResult(orders={self.orders}, computed={computed}, frequencies={len(self.frequency_array)}, "
+            f"channels={self.buffer.shape[2:-1]}, dtype={self.buffer.dtype})"
+        )
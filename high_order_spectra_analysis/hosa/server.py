@@ -0,0 +1,668 @@
+import argparse
+import asyncio
+import base64
+import itertools
+import json
+import socket
+import time as timer
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+
+import numpy as np
+from high_order_spectra_analysis.engines.cache import DEFAULT_CACHE_BYTES, BasisCache, array_key
+from high_order_spectra_analysis.engines.analytic import maximize_phase
+from high_order_spectra_analysis.engines.dispatch import check_engine, projections, signal_powers
+from high_order_spectra_analysis.time_domain_high_order_spectra.tdhos import frequency_grid_of, required_orders, tdhos
+
+
+DEFAULT_PORT = 8765
+
+# Latencies kept for the metrics
+LATENCY_WINDOW = 1024
+
+DTYPES = ("float64", "float32")
+
+
+def encode_array(array: np.ndarray) -> dict:
+    """JSON description of an array: little-endian dtype, shape and base64 of its bytes"""
+
+    array = np.ascontiguousarray(array)
+    array = array.astype(array.dtype.newbyteorder("<"), copy=False)
+
+    return {"dtype": array.dtype.str, "shape": list(array.shape), "data": base64.b64encode(array.tobytes()).decode("ascii")}
+
+
+def decode_array(description: dict) -> np.ndarray:
+    """Array of a description built by encode_array"""
+
+    data = base64.b64decode(description["data"])
+
+    return np.frombuffer(data, dtype=np.dtype(description["dtype"])).reshape(description["shape"])
+
+
+@dataclass
+class Job:
+    """Spectrum job received by the server"""
+
+    id: str
+    signal: np.ndarray
+    frequency_sampling: float
+    frequency_array: np.ndarray
+    frequency_grid: tuple[float, float] | None
+    orders: tuple[int, ...]
+    cumulative: bool
+    phase_step: float
+    dtype: str
+    exact_phase: bool
+    writer: asyncio.StreamWriter
+    submitted: float = field(default_factory=timer.perf_counter)
+    started: float | None = None
+    cancelled: bool = False
+
+    @property
+    def key(self) -> tuple:
+        """Jobs with the same key share the basis and are evaluated together"""
+
+        return (
+            float(self.frequency_sampling),
+            self.signal.shape[-1],
+            array_key(self.frequency_array, self.frequency_grid),
+            self.dtype,
+            float(self.phase_step),
+            self.exact_phase
+        )
+
+
+def evaluate_batch(
+    jobs: list[Job],
+    engine: str = "auto",
+    basis_cache: BasisCache | None = None,
+    max_memory_bytes: int | None = None
+) -> list[tuple[np.ndarray, np.ndarray]]:
+    """Spectra of jobs sharing a key, in one multichannel evaluation against a single basis
+
+    Every job signal becomes one or more channels of the batch, and the signal powers of
+    the union of the orders of the jobs are evaluated once, without cumulative products,
+    which each job then takes over its own orders.
+
+    Args:
+        jobs (list[Job]): Jobs with the same key.
+        engine (str, optional): Projection engine, as in tdhos. Defaults to "auto".
+        basis_cache (BasisCache | None, optional): Cache keeping the basis tiles or chirp-z twiddles between batches. Defaults to None.
+        max_memory_bytes (int | None, optional): Memory budget of a basis tile of the "blocked" engine. Defaults to None, 256 MiB.
+
+    Returns:
+        list[tuple[np.ndarray, np.ndarray]]: amplitude and phase of every job, with shape (orders, [channels,] frequencies)
+    """
+
+    first = jobs[0]
+    signal_length = first.signal.shape[-1]
+    powers = tuple(sorted(set(itertools.chain.from_iterable(required_orders(job.orders, job.cumulative) for job in jobs))))
+
+    signals = np.concatenate([job.signal.reshape(-1, signal_length) for job in jobs])
+
+    if engine == "scan":
+        _, maxima, phases = tdhos(
+            signals,
+            first.frequency_sampling,
+            frequency_array=first.frequency_array,
+            phase_step=first.phase_step,
+            dtype=getattr(np, first.dtype),
+            enable_progress_bar=False,
+            engine=engine,
+            exact_phase=first.exact_phase,
+            orders=powers,
+            cumulative=False
+        )
+
+    else:
+        # The projections are evaluated directly, tdhos would rebuild the frequency grid of the jobs
+        dtype = getattr(np, first.dtype)
+        time_sampling = 1/first.frequency_sampling
+        time = np.arange(0, signal_length*time_sampling, time_sampling)[0:signal_length]
+
+        projection = projections(
+            signal_powers(signals, powers, dtype),
+            time,
+            first.frequency_array,
+            engine=engine,
+            time_grid=(0.0, time_sampling),
+            frequency_grid=first.frequency_grid,
+            dtype=dtype,
+            max_memory_bytes=max_memory_bytes,
+            cache=basis_cache
+        )
+
+        phi_grid = None if first.exact_phase else np.arange(0, 2*np.pi, first.phase_step).astype(dtype)
+
+        maxima, phases = maximize_phase(projection.reshape(-1), phi_array=phi_grid)
+        maxima = maxima.reshape((len(powers), signals.shape[0], len(first.frequency_array)))
+        phases = phases.reshape((len(powers), signals.shape[0], len(first.frequency_array)))
+
+    results = []
+    channel = 0
+    for job in jobs:
+        channels = job.signal.reshape(-1, signal_length).shape[0]
+        job_maxima = maxima[:, channel:channel + channels]
+        job_phases = phases[:, channel:channel + channels]
+        channel += channels
+
+        amplitude = np.stack([
+            np.prod(job_maxima[[powers.index(power) for power in range(1, order + 1)]], axis=0)
+            if job.cumulative else job_maxima[powers.index(order)]
+            for order in job.orders
+        ])
+        phase = np.stack([job_phases[powers.index(order)] for order in job.orders])
+
+        shape = (len(job.orders),) + job.signal.shape[:-1] + (len(job.frequency_array),)
+        results.append((amplitude.reshape(shape), phase.reshape(shape)))
+
+    return results
+
+
+class HosaServer:
+    """Local analysis service computing high order spectra for many clients
+
+    Clients connect over TCP on localhost, or over a unix socket, and exchange JSON
+    messages, one per line, with arrays encoded by encode_array. A "submit" message
+    queues a job; jobs pending together with the same sampling rate, signal length,
+    frequency grid, dtype and phase settings are grouped, after batch_window seconds,
+    into one multichannel evaluation against a single basis on a shared pool of worker
+    threads, which also share one basis cache between batches. Results are streamed back
+    to the submitting connection as each batch completes, in completion order.
+
+    Messages from a client:
+        {"type": "submit", "id", "signal", "frequency_sampling", and optionally "orders", "cumulative",
+            "frequency_array", "fmin", "fmax", "freq_step", "phase_step", "dtype", "exact_phase"}
+        {"type": "cancel", "id"}: a pending job is dropped, a running one is discarded when its batch completes
+        {"type": "metrics"}
+
+    Messages to a client:
+        {"type": "accepted", "id", "queue_depth"}
+        {"type": "result", "id", "frequency_array", "amplitude", "phase", "latency", "queue_seconds", "batch_size"}
+        {"type": "cancelled", "id"}, {"type": "error", "id", "message"}, {"type": "metrics", ...}
+
+    Args:
+        host (str, optional): Address to listen on. Defaults to "127.0.0.1".
+        port (int, optional): TCP port, 0 for any free port. Defaults to DEFAULT_PORT.
+        path (str | None, optional): Listen on this unix socket instead of TCP. Defaults to None.
+        engine (str, optional): Projection engine of the evaluations ("scan" is not supported). Defaults to "auto".
+        n_workers (int, optional): Batches evaluated at the same time. Defaults to 1, which leaves the cores to the engine.
+        batch_window (float, optional): Seconds a job waits for others to share its batch. Defaults to 0.005.
+        max_batch_jobs (int, optional): Largest number of jobs per batch. Defaults to 64.
+        max_memory_bytes (int | None, optional): Memory budget of a basis tile of the "blocked" engine. Defaults to None, 256 MiB.
+        cache_max_bytes (int, optional): Memory budget of the shared basis cache. Defaults to DEFAULT_CACHE_BYTES.
+    """
+
+    def __init__(
+        self,
+        host: str = "127.0.0.1",
+        port: int = DEFAULT_PORT,
+        path: str | None = None,
+        engine: str = "auto",
+        n_workers: int = 1,
+        batch_window: float = 0.005,
+        max_batch_jobs: int = 64,
+        max_memory_bytes: int | None = None,
+        cache_max_bytes: int = DEFAULT_CACHE_BYTES
+    ):
+        check_engine(engine)
+
+        if engine == "scan":
+            raise ValueError("The job server needs a projection engine, not 'scan'")
+
+        self.host = host
+        self.port = port
+        self.path = path
+        self.engine = engine
+        self.n_workers = n_workers
+        self.batch_window = batch_window
+        self.max_batch_jobs = max_batch_jobs
+        self.max_memory_bytes = max_memory_bytes
+        self.basis_cache = BasisCache(max_bytes=cache_max_bytes)
+
+        self.pending: dict[str, Job] = {}
+        self.running: dict[str, Job] = {}
+        self.counters = {"submitted": 0, "completed": 0, "cancelled": 0, "failed": 0, "batches": 0, "batched_jobs": 0}
+        self.latencies = deque(maxlen=LATENCY_WINDOW)
+        self.queue_latencies = deque(maxlen=LATENCY_WINDOW)
+
+        self._server = None
+        self._dispatcher = None
+        self._executor = None
+        self._wakeup = None
+        self._slots = None
+        self._batches = set()
+
+    @property
+    def address(self) -> tuple[str, int] | str:
+        """Address the server listens on, (host, port) or the unix socket path"""
+
+        if self.path is not None:
+            return self.path
+
+        return self._server.sockets[0].getsockname()[:2]
+
+    async def start(self) -> None:
+        """Start listening and dispatching jobs"""
+
+        self._executor = ThreadPoolExecutor(max_workers=self.n_workers)
+        self._wakeup = asyncio.Event()
+        self._slots = asyncio.Semaphore(self.n_workers)
+
+        if self.path is None:
+            self._server = await asyncio.start_server(self._handle, self.host, self.port, limit=2**31 - 1)
+        else:
+            self._server = await asyncio.start_unix_server(self._handle, self.path, limit=2**31 - 1)
+
+        self._dispatcher = asyncio.create_task(self._dispatch())
+
+    async def serve_forever(self) -> None:
+        """Start, then serve until cancelled"""
+
+        if self._server is None:
+            await self.start()
+
+        try:
+            await self._server.serve_forever()
+        finally:
+            await self.close()
+
+    async def close(self) -> None:
+        """Stop listening, cancel the pending jobs and wait for the running batches"""
+
+        if self._server is None:
+            return
+
+        self._server.close()
+        self._dispatcher.cancel()
+
+        for job in list(self.pending.values()):
+            self._cancel(job)
+
+        if self._batches:
+            await asyncio.gather(*self._batches, return_exceptions=True)
+
+        self._executor.shutdown(wait=True)
+        self._server = None
+
+    def metrics(self) -> dict:
+        """Queue depth, job counters, mean batch size and latency statistics over the last LATENCY_WINDOW jobs
+
+        Returns:
+            dict: the metrics
+        """
+
+        def statistics(values: deque) -> dict:
+            if not values:
+                return {"mean": None, "p50": None, "p95": None, "max": None}
+
+            values = np.asarray(values)
+            return {
+                "mean": float(np.mean(values)),
+                "p50": float(np.percentile(values, 50)),
+                "p95": float(np.percentile(values, 95)),
+                "max": float(np.max(values))
+            }
+
+        batches = self.counters["batches"]
+
+        return {
+            "queue_depth": len(self.pending),
+            "running": len(self.running),
+            **self.counters,
+            "mean_batch_size": None if batches == 0 else self.counters["batched_jobs"]/batches,
+            "latency_seconds": statistics(self.latencies),
+            "queue_seconds": statistics(self.queue_latencies),
+            "cache": {"hits": self.basis_cache.hits, "misses": self.basis_cache.misses, "bytes": self.basis_cache.current_bytes}
+        }
+
+    def _send(self, writer: asyncio.StreamWriter, message: dict) -> None:
+        if not writer.is_closing():
+            writer.write(json.dumps(message).encode() + b"\n")
+
+    def _cancel(self, job: Job) -> None:
+        job.cancelled = True
+        self.pending.pop(job.id, None)
+        self.counters["cancelled"] += 1
+        self._send(job.writer, {"type": "cancelled", "id": job.id})
+
+    def _job(self, message: dict, writer: asyncio.StreamWriter) -> Job:
+        signal = np.asarray(decode_array(message["signal"]), dtype=np.float64)
+        dtype = message.get("dtype", "float64")
+
+        if dtype not in DTYPES:
+            raise ValueError(f"Unknown dtype '{dtype}', expected one of {DTYPES}")
+
+        if signal.ndim == 0 or signal.shape[-1] == 0:
+            raise ValueError("The signal must have at least one sample")
+
+        frequency_array = message.get("frequency_array")
+        frequency_array, frequency_grid = frequency_grid_of(
+            signal.shape[-1],
+            message["frequency_sampling"],
+            None if frequency_array is None else decode_array(frequency_array),
+            message.get("fmin"),
+            message.get("fmax"),
+            message.get("freq_step", 1e-3),
+            getattr(np, dtype)
+        )
+        orders = tuple(int(order) for order in message.get("orders", (1, 2, 3, 4)))
+        cumulative = bool(message.get("cumulative", True))
+        required_orders(orders, cumulative)
+
+        return Job(
+            id=str(message["id"]),
+            signal=signal,
+            frequency_sampling=float(message["frequency_sampling"]),
+            frequency_array=frequency_array,
+            frequency_grid=frequency_grid,
+            orders=orders,
+            cumulative=cumulative,
+            phase_step=float(message.get("phase_step", 1e-3)),
+            dtype=dtype,
+            exact_phase=bool(message.get("exact_phase", False)),
+            writer=writer
+        )
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            while line := await reader.readline():
+                message = None
+                try:
+                    message = json.loads(line)
+                    if not isinstance(message, dict):
+                        raise ValueError(f"Expected a JSON object, got {type(message).__name__}")
+                    kind = message.get("type")
+
+                    if kind == "submit":
+                        job = self._job(message, writer)
+                        if job.id in self.pending or job.id in self.running:
+                            raise ValueError(f"Job '{job.id}' is already queued")
+                        self.pending[job.id] = job
+                        self.counters["submitted"] += 1
+                        self._send(writer, {"type": "accepted", "id": job.id, "queue_depth": len(self.pending)})
+                        self._wakeup.set()
+
+                    elif kind == "cancel":
+                        job_id = str(message["id"])
+                        job = self.pending.get(job_id) or self.running.get(job_id)
+                        if job is None or job.writer is not writer:
+                            raise ValueError(f"No queued job '{job_id}' on this connection")
+                        if job_id in self.pending:
+                            self._cancel(job)
+                        else:
+                            # Running batches cannot be interrupted, the result is dropped when it completes
+                            job.cancelled = True
+
+                    elif kind == "metrics":
+                        self._send(writer, {"type": "metrics", **self.metrics()})
+
+                    else:
+                        raise ValueError(f"Unknown message type '{kind}'")
+
+                except (ValueError, KeyError, TypeError) as error:
+                    job_id = message.get("id") if isinstance(message, dict) else None
+                    self._send(writer, {"type": "error", "id": job_id, "message": str(error)})
+
+                await writer.drain()
+
+        except ConnectionError:
+            pass
+
+        finally:
+            # The jobs of a closed connection have nobody to report to
+            for job in list(self.pending.values()):
+                if job.writer is writer:
+                    self._cancel(job)
+            for job in self.running.values():
+                if job.writer is writer:
+                    job.cancelled = True
+            writer.close()
+
+    async def _dispatch(self) -> None:
+        while True:
+            await self._wakeup.wait()
+            self._wakeup.clear()
+
+            # Let the jobs arriving together gather before grouping them
+            await asyncio.sleep(self.batch_window)
+
+            groups: dict[tuple, list[Job]] = {}
+            for job in self.pending.values():
+                groups.setdefault(job.key, []).append(job)
+
+            for group in groups.values():
+                for start in range(0, len(group), self.max_batch_jobs):
+                    batch = group[start:start + self.max_batch_jobs]
+                    for job in batch:
+                        del self.pending[job.id]
+                        self.running[job.id] = job
+
+                    task = asyncio.create_task(self._run(batch))
+                    self._batches.add(task)
+                    task.add_done_callback(self._batches.discard)
+
+    async def _run(self, batch: list[Job]) -> None:
+        async with self._slots:
+            # Jobs cancelled while the batch waited for a worker
+            for job in batch:
+                if job.cancelled:
+                    self.running.pop(job.id, None)
+                    self.counters["cancelled"] += 1
+                    self._send(job.writer, {"type": "cancelled", "id": job.id})
+
+            batch = [job for job in batch if not job.cancelled]
+            if not batch:
+                return
+
+            started = timer.perf_counter()
+            for job in batch:
+                job.started = started
+
+            self.counters["batches"] += 1
+            self.counters["batched_jobs"] += len(batch)
+
+            try:
+                results = await asyncio.get_running_loop().run_in_executor(
+                    self._executor, evaluate_batch, batch, self.engine, self.basis_cache, self.max_memory_bytes
+                )
+            except Exception as error:
+                for job in batch:
+                    self.running.pop(job.id, None)
+                    self.counters["failed"] += 1
+                    self._send(job.writer, {"type": "error", "id": job.id, "message": str(error)})
+                return
+
+        finished = timer.perf_counter()
+
+        for job, (amplitude, phase) in zip(batch, results):
+            self.running.pop(job.id, None)
+
+            if job.cancelled:
+                self.counters["cancelled"] += 1
+                self._send(job.writer, {"type": "cancelled", "id": job.id})
+                continue
+
+            self.counters["completed"] += 1
+            self.latencies.append(finished - job.submitted)
+            self.queue_latencies.append(job.started - job.submitted)
+            self._send(job.writer, {
+                "type": "result",
+                "id": job.id,
+                "frequency_array": encode_array(job.frequency_array),
+                "amplitude": encode_array(amplitude),
+                "phase": encode_array(phase),
+                "latency": finished - job.submitted,
+                "queue_seconds": job.started - job.submitted,
+                "batch_size": len(batch)
+            })
+
+
+class HosaClient:
+    """Blocking client of a HosaServer
+
+    Jobs are submitted without waiting, and their results are read back as they stream
+    in with results(); messages read while waiting for another one are kept in order.
+
+    Args:
+        host (str, optional): Address of the server. Defaults to "127.0.0.1".
+        port (int, optional): TCP port of the server. Defaults to DEFAULT_PORT.
+        path (str | None, optional): Unix socket of the server, instead of TCP. Defaults to None.
+        timeout (float | None, optional): Seconds to wait for a message. Defaults to None, forever.
+    """
+
+    def __init__(
+        self,
+        host: str = "127.0.0.1",
+        port: int = DEFAULT_PORT,
+        path: str | None = None,
+        timeout: float | None = None
+    ):
+        if path is None:
+            self.socket = socket.create_connection((host, port), timeout=timeout)
+        else:
+            self.socket = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            self.socket.settimeout(timeout)
+            self.socket.connect(path)
+
+        self.file = self.socket.makefile("rwb")
+        self.outstanding: set[str] = set()
+        self._buffer: deque[dict] = deque()
+        self._ids = itertools.count()
+
+    def close(self) -> None:
+        self.file.close()
+        self.socket.close()
+
+    def __enter__(self) -> "HosaClient":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def _write(self, message: dict) -> None:
+        self.file.write(json.dumps(message).encode() + b"\n")
+        self.file.flush()
+
+    def _read(self) -> dict:
+        line = self.file.readline()
+        if not line:
+            raise ConnectionError("The server closed the connection")
+
+        message = json.loads(line)
+        if message["type"] in ("result", "cancelled") or message["type"] == "error" and message.get("id") in self.outstanding:
+            self.outstanding.discard(message.get("id"))
+
+        return message
+
+    def submit(
+        self,
+        signal: np.ndarray,
+        frequency_sampling: float,
+        job_id: str | None = None,
+        **parameters
+    ) -> str:
+        """Queue a job on the server
+
+        Args:
+            signal (np.ndarray): Signal, with shape (samples,) or (channels, samples).
+            frequency_sampling (float): Frequency sampling of the signal.
+            job_id (str | None, optional): Identifier of the job. Defaults to None, a counter.
+            **parameters: orders, cumulative, frequency_array, fmin, fmax, freq_step, phase_step, dtype ("float64" or "float32")
+                and exact_phase.
+
+        Returns:
+            str: identifier of the job
+        """
+
+        job_id = str(next(self._ids)) if job_id is None else str(job_id)
+
+        if parameters.get("frequency_array") is not None:
+            parameters["frequency_array"] = encode_array(np.asarray(parameters["frequency_array"], dtype=np.float64))
+        if parameters.get("orders") is not None:
+            parameters["orders"] = [int(order) for order in parameters["orders"]]
+
+        self._write({
+            "type": "submit",
+            "id": job_id,
+            "signal": encode_array(np.asarray(signal, dtype=np.float64)),
+            "frequency_sampling": frequency_sampling,
+            **parameters
+        })
+        self.outstanding.add(job_id)
+
+        return job_id
+
+    def cancel(self, job_id: str) -> None:
+        """Ask the server to cancel a job; a "cancelled" message follows unless it already completed"""
+
+        self._write({"type": "cancel", "id": str(job_id)})
+
+    def metrics(self) -> dict:
+        """Metrics of the server"""
+
+        self._write({"type": "metrics"})
+
+        while True:
+            message = self._read()
+            if message["type"] == "metrics":
+                return message
+            self._buffer.append(message)
+
+    def results(self):
+        """Messages of the submitted jobs as they complete, until none is outstanding
+
+        Yields:
+            dict: "result" messages with decoded frequency_array, amplitude and phase arrays, "cancelled" and "error" messages
+        """
+
+        while self._buffer or self.outstanding:
+            message = self._buffer.popleft() if self._buffer else self._read()
+
+            if message["type"] == "result":
+                for name in ("frequency_array", "amplitude", "phase"):
+                    message[name] = decode_array(message[name])
+
+            if message["type"] in ("result", "cancelled", "error"):
+                yield message
+
+
+def main(argv: list[str] | None = None) -> int:
+    """Run a HosaServer from the command line until interrupted
+
+    Returns:
+        int: exit status
+    """
+
+    parser = argparse.ArgumentParser(description="Local service computing time domain high order spectra")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--path", default=None, help="unix socket to listen on instead of TCP")
+    parser.add_argument("--engine", default="auto")
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--batch-window", type=float, default=0.005)
+    parser.add_argument("--max-batch-jobs", type=int, default=64)
+    arguments = parser.parse_args(argv)
+
+    server = HosaServer(
+        host=arguments.host,
+        port=arguments.port,
+        path=arguments.path,
+        engine=arguments.engine,
+        n_workers=arguments.workers,
+        batch_window=arguments.batch_window,
+        max_batch_jobs=arguments.max_batch_jobs
+    )
+
+    try:
+        asyncio.run(server.serve_forever())
+    except KeyboardInterrupt:
+        pass
+
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
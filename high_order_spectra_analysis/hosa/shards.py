@@ -0,0 +1,378 @@
+import argparse
+import glob
+import hashlib
+import json
+import os
+import tempfile
+import zipfile
+
+import numpy as np
+from high_order_spectra_analysis.engines.cache import array_key
+from high_order_spectra_analysis.hosa.result import HosaResult, npz_memmap
+
+
+SHARD_FORMAT = 1
+SHARD_SUFFIX = ".shard.npz"
+# Bytes of the merged buffer assembled in memory at once
+MERGE_BLOCK_BYTES = 2**26
+
+
+def shard_slice(
+    frequencies: int,
+    shard_index: int,
+    shard_count: int
+) -> slice:
+    """Contiguous frequencies of one of shard_count shards of a frequency array, the shard sizes differing by at most one
+
+    Args:
+        frequencies (int): Number of frequencies of the full array.
+        shard_index (int): Index of the shard, from 0 to shard_count - 1.
+        shard_count (int): Number of shards.
+
+    Returns:
+        slice: indices of the shard in the full frequency array
+    """
+
+    if shard_count < 1 or not 0 <= shard_index < shard_count:
+        raise ValueError(f"Expected 0 <= shard_index < shard_count, got shard {shard_index} of {shard_count}")
+
+    return slice(shard_index*frequencies//shard_count, (shard_index + 1)*frequencies//shard_count)
+
+
+def range_slice(
+    frequency_array: np.ndarray,
+    frequency_range: tuple[float, float]
+) -> slice:
+    """Frequencies of an increasing frequency array in [low, high)
+
+    Args:
+        frequency_array (np.ndarray): Full frequency array, increasing.
+        frequency_range (tuple[float, float]): Lowest frequency of the range and the frequency it stops before.
+
+    Returns:
+        slice: indices of the range in the full frequency array
+    """
+
+    low, high = frequency_range
+
+    if np.any(np.diff(frequency_array) <= 0):
+        raise ValueError("A frequency range can only select from an increasing frequency array, pass a shard index and count instead")
+
+    return slice(int(np.searchsorted(frequency_array, low)), int(np.searchsorted(frequency_array, high)))
+
+
+def shard_digest(
+    signal_hash: str,
+    frequency_sampling: float,
+    frequency_array: np.ndarray,
+    phase_step: float,
+    dtype: np.dtype,
+    orders: tuple[int, ...],
+    cumulative: bool,
+    exact_phase: bool
+) -> str:
+    """Hash of every parameter the shards of one analysis must share, including the full frequency array
+
+    The engine is left out: nodes where different engines are available compute the same
+    spectra up to rounding, and their shards can be merged. signal_hash is the
+    signal_digest of the signal, computed once by the caller as it reads the whole signal.
+    """
+
+    parameters = (
+        SHARD_FORMAT,
+        signal_hash,
+        float(frequency_sampling),
+        array_key(np.asarray(frequency_array)),
+        None if phase_step is None else float(phase_step),
+        np.dtype(dtype).str,
+        tuple(int(order) for order in orders),
+        bool(cumulative),
+        bool(exact_phase)
+    )
+
+    return hashlib.blake2b(repr(parameters).encode(), digest_size=20).hexdigest()
+
+
+def write_shard(
+    path: str,
+    result: HosaResult,
+    metadata: dict
+) -> None:
+    """Save the result of a shard with its metadata, to a temporary file renamed into place
+
+    Args:
+        path (str): Shard file, named with SHARD_SUFFIX to be found by merge_shards in a directory.
+        result (HosaResult): Spectra of the frequencies of the shard.
+        metadata (dict): Description of the shard, as built by Tdhosa.run_shard.
+    """
+
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+
+    descriptor, temporary = tempfile.mkstemp(dir=directory, suffix=".tmp")
+    try:
+        with os.fdopen(descriptor, "wb") as file:
+            np.savez(
+                file,
+                buffer=result.buffer,
+                frequency_array=result.frequency_array,
+                orders=np.asarray(result.orders),
+                computed=result.computed,
+                cumulative=np.asarray(result.cumulative),
+                metadata=np.asarray(json.dumps(metadata, sort_keys=True))
+            )
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(temporary, path)
+    except BaseException:
+        os.unlink(temporary)
+        raise
+
+
+def read_shard_metadata(path: str) -> dict:
+    """Metadata of a shard file, without reading its spectra"""
+
+    with np.load(path) as data:
+        if "metadata" not in data.files:
+            raise ValueError(f"{path} is not a shard file")
+
+        return json.loads(str(data["metadata"]))
+
+
+def find_shards(inputs: str | list[str]) -> list[str]:
+    """Shard files of a directory (every *.shard.npz in it) or of a list of paths"""
+
+    if isinstance(inputs, (str, os.PathLike)):
+        inputs = [inputs]
+
+    paths = []
+    for path in map(os.fspath, inputs):
+        if os.path.isdir(path):
+            paths.extend(glob.glob(os.path.join(path, "*" + SHARD_SUFFIX)))
+        else:
+            paths.append(path)
+
+    return sorted(paths)
+
+
+def check_shards(shards: list[tuple[str, dict]]) -> list[tuple[str, dict]]:
+    """Shards covering the full frequency array once each, in frequency order
+
+    A shard computed twice over the same frequencies (a node that was restarted, say) is
+    kept once; shards that only partially overlap, shards of different analyses and
+    frequencies covered by no shard raise a ValueError.
+
+    Args:
+        shards (list[tuple[str, dict]]): Path and metadata of every shard.
+
+    Returns:
+        list[tuple[str, dict]]: the shards to merge, by start frequency
+    """
+
+    if not shards:
+        raise ValueError("No shards to merge")
+
+    reference_path, reference = shards[0]
+    for path, metadata in shards:
+        if metadata.get("format") != SHARD_FORMAT:
+            raise ValueError(f"{path} has shard format {metadata.get('format')}, expected {SHARD_FORMAT}")
+
+        if (metadata["digest"], metadata["frequencies"]) != (reference["digest"], reference["frequencies"]):
+            differing = sorted(
+                key for key in ("signal_digest", "frequency_sampling", "phase_step", "dtype", "orders", "cumulative", "exact_phase", "frequencies")
+                if metadata.get(key) != reference.get(key)
+            )
+            raise ValueError(
+                f"{path} and {reference_path} are shards of different analyses"
+                + (f" (differing in {', '.join(differing)})" if differing else " (differing frequency arrays)")
+            )
+
+    selected = []
+    covered = 0
+    for path, metadata in sorted(shards, key=lambda shard: (shard[1]["start"], shard[1]["stop"])):
+        start, stop = metadata["start"], metadata["stop"]
+
+        if selected and (start, stop) == (selected[-1][1]["start"], selected[-1][1]["stop"]):
+            continue
+
+        if start < covered:
+            raise ValueError(f"{path} covers frequencies {start}:{stop}, overlapping {selected[-1][0]} up to {covered}")
+
+        if start > covered:
+            raise ValueError(f"No shard covers frequencies {covered}:{start} of {reference['frequencies']}")
+
+        if stop > start:
+            selected.append((path, metadata))
+        covered = max(covered, stop)
+
+    if covered < reference["frequencies"]:
+        raise ValueError(f"No shard covers frequencies {covered}:{reference['frequencies']} of {reference['frequencies']}")
+
+    return selected
+
+
+def merge_shards(
+    inputs: str | list[str],
+    output: str
+) -> HosaResult:
+    """Merge the shards of an analysis into the result of the full frequency array
+
+    The shards are checked first from their metadata alone, then memory mapped, and the
+    merged buffer is written row block by row block, so at most MERGE_BLOCK_BYTES of it
+    are in memory whatever the number and size of the shards. The output is a HosaResult
+    file, written to a temporary file renamed into place.
+
+    Args:
+        inputs (str | list[str]): Directory of the shards or paths of the shard files.
+        output (str): Merged result file, a HosaResult saved as .npz.
+
+    Returns:
+        HosaResult: the merged result, memory mapped from output
+    """
+
+    shards = check_shards([(path, read_shard_metadata(path)) for path in find_shards(inputs)])
+    reference = shards[0][1]
+
+    buffers = [npz_memmap(path, "buffer") for path, _ in shards]
+    leading_shape = buffers[0].shape[:-1]
+    for (path, _), buffer in zip(shards, buffers):
+        if buffer.shape[:-1] != leading_shape or buffer.dtype != buffers[0].dtype:
+            raise ValueError(f"{path} holds a buffer with shape {buffer.shape} and dtype {buffer.dtype}, unlike {shards[0][0]}")
+
+    rows = [buffer.reshape(-1, buffer.shape[-1]) for buffer in buffers]
+    dtype = buffers[0].dtype
+    frequencies = reference["frequencies"]
+    row_count = rows[0].shape[0]
+    block_rows = max(1, MERGE_BLOCK_BYTES//max(1, frequencies*dtype.itemsize))
+
+    frequency_array = np.empty(frequencies)
+    for path, metadata in shards:
+        with np.load(path) as data:
+            frequency_array[metadata["start"]:metadata["stop"]] = data["frequency_array"]
+
+    metadata = {key: value for key, value in reference.items() if key not in ("start", "stop", "shard_index", "shard_count", "engine")}
+    metadata["shards"] = len(shards)
+    metadata["engines"] = sorted({shard_metadata.get("engine") for _, shard_metadata in shards})
+
+    def write_member(archive: zipfile.ZipFile, name: str, array: np.ndarray) -> None:
+        with archive.open(name + ".npy", "w", force_zip64=True) as member:
+            np.lib.format.write_array(member, np.asanyarray(array))
+
+    directory = os.path.dirname(os.path.abspath(output))
+    os.makedirs(directory, exist_ok=True)
+
+    descriptor, temporary = tempfile.mkstemp(dir=directory, suffix=".tmp")
+    os.close(descriptor)
+    try:
+        with zipfile.ZipFile(temporary, "w", compression=zipfile.ZIP_STORED, allowZip64=True) as archive:
+            with archive.open("buffer.npy", "w", force_zip64=True) as member:
+                np.lib.format.write_array_header_2_0(member, {
+                    "descr": np.lib.format.dtype_to_descr(dtype),
+                    "fortran_order": False,
+                    "shape": leading_shape + (frequencies,)
+                })
+                for first in range(0, row_count, block_rows):
+                    block = np.concatenate([shard_rows[first:first + block_rows] for shard_rows in rows], axis=1)
+                    member.write(np.ascontiguousarray(block).tobytes())
+
+            write_member(archive, "frequency_array", frequency_array)
+            write_member(archive, "orders", np.asarray(reference["orders"]))
+            write_member(archive, "computed", np.ones(len(reference["orders"]), dtype=bool))
+            write_member(archive, "cumulative", np.asarray(reference["cumulative"]))
+            write_member(archive, "metadata", np.asarray(json.dumps(metadata, sort_keys=True)))
+
+        with open(temporary, "rb+") as file:
+            os.fsync(file.fileno())
+        os.replace(temporary, output)
+    except BaseException:
+        os.unlink(temporary)
+        raise
+
+    return HosaResult.load(output, mmap_mode="r")
+
+
+def main(argv: list[str] | None = None) -> int:
+    """Compute one shard of a recording, or merge the shards of a directory, from the command line
+
+    Each node runs "run" with its own --shard-index over a shared output directory, then
+    any of them runs "merge" on that directory.
+
+    Returns:
+        int: exit status
+    """
+
+    from high_order_spectra_analysis.engines.dispatch import ENGINES
+    from high_order_spectra_analysis.hosa.batch import read_recording
+    from high_order_spectra_analysis.hosa.hosa import Tdhosa
+
+    parser = argparse.ArgumentParser(description="Time domain high order spectra computed in frequency shards")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run = commands.add_parser("run", help="compute one shard of a recording")
+    run.add_argument("recording", help="recording file (.npy, raw binary, CSV, WAV)")
+    run.add_argument("--output", "-o", required=True, help="shard file or directory of the shards")
+    run.add_argument("--shard-index", type=int, default=None)
+    run.add_argument("--shard-count", type=int, default=None)
+    run.add_argument("--frequency-range", nargs=2, type=float, default=None, metavar=("LOW", "HIGH"), help="frequencies in [LOW, HIGH)")
+    run.add_argument("--orders", nargs="+", type=int, default=(1, 2, 3, 4))
+    run.add_argument("--no-cumulative", action="store_true", help="do not multiply the maxima of orders 1..k into order k")
+    run.add_argument("--fmin", type=float, default=None)
+    run.add_argument("--fmax", type=float, default=None)
+    run.add_argument("--freq-step", type=float, default=1e-3)
+    run.add_argument("--phase-step", type=float, default=1e-3)
+    run.add_argument("--exact-phase", action="store_true")
+    run.add_argument("--dtype", default="float64", choices=("float64", "float32"))
+    run.add_argument("--engine", default="auto", choices=tuple(engine for engine in ENGINES if engine != "scan"))
+    run.add_argument("--fs", type=float, default=None, help="sampling rate of a file without one")
+    run.add_argument("--raw-dtype", default=None, help="sample dtype of a raw file without a .json sidecar")
+    run.add_argument("--channels", type=int, default=None, help="interleaved channels of a raw file without a .json sidecar")
+    run.add_argument("--max-memory", type=int, default=None, help="memory budget in bytes of a basis tile")
+
+    merge = commands.add_parser("merge", help="merge the shards of a directory")
+    merge.add_argument("inputs", nargs="+", help="directory of the shards or shard files")
+    merge.add_argument("--output", "-o", required=True, help="merged result file")
+
+    arguments = parser.parse_args(argv)
+
+    if arguments.command == "merge":
+        merge_shards(arguments.inputs, arguments.output)
+        return 0
+
+    signal, frequency_sampling = read_recording(arguments.recording, arguments.fs, arguments.raw_dtype, arguments.channels)
+    if frequency_sampling is None:
+        parser.error(f"The sampling rate of {arguments.recording} is unknown, pass --fs")
+
+    output = arguments.output
+    if os.path.isdir(output) or not output.endswith(".npz"):
+        name = "all" if arguments.shard_index is None else f"{arguments.shard_index:05d}-of-{arguments.shard_count:05d}"
+        if arguments.frequency_range is not None:
+            name = f"{arguments.frequency_range[0]:g}-{arguments.frequency_range[1]:g}Hz"
+        output = os.path.join(output, os.path.basename(arguments.recording) + "." + name + SHARD_SUFFIX)
+
+    analyzer = Tdhosa(
+        frequency_sampling,
+        fmin=arguments.fmin,
+        fmax=arguments.fmax,
+        freq_step=arguments.freq_step,
+        phase_step=arguments.phase_step,
+        dtype=getattr(np, arguments.dtype),
+        enable_progress_bar=False,
+        engine=arguments.engine,
+        exact_phase=arguments.exact_phase,
+        max_memory_bytes=arguments.max_memory
+    )
+    analyzer.run_shard(
+        signal,
+        output,
+        shard_index=arguments.shard_index,
+        shard_count=arguments.shard_count,
+        frequency_range=arguments.frequency_range,
+        orders=tuple(arguments.orders),
+        cumulative=not arguments.no_cumulative
+    )
+
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,169 @@
+import numpy as np
+from high_order_spectra_analysis.engines.analytic import maximize_phase
+from high_order_spectra_analysis.time_domain_high_order_spectra.tdhos import required_orders
+
+
+class StreamingTdhosa:
+    """Sliding-window or exponentially weighted high order spectra of a live stream
+
+    Keeps, for every order k and frequency f, the running sum of S^k*exp(1j*2*pi*f*t)
+    over the window. Each pushed chunk is rotated onto the frequencies with the
+    oscillator recurrence exp(1j*w*(t + dt)) = exp(1j*w*t)*exp(1j*w*dt), re-anchored
+    once per chunk, so a push costs O(chunk * frequencies * orders) whatever the window
+    length. Samples leaving a sliding window are subtracted with their phasor
+    exp(1j*w*(t - W*dt)), which is the incoming phasor times a constant per frequency.
+
+    The spectra match tdhos on the samples of the window, with time measured from the
+    oldest sample of the window (the first pushed sample for an exponential window).
+    Additions and subtractions of a sliding window accumulate rounding error slowly,
+    about sqrt(pushed samples) * 1e-16 relative; reset() starts over.
+
+    Args:
+        frequency_sampling (float): Frequency sampling of the stream.
+        frequency_array (np.ndarray | None, optional): Frequency array (in case of already available, if nots, it is calculated). Defaults to None.
+        fmin (float | None, optional): minimum frequency. Defaults to None, one period of the sliding window.
+        fmax (float | None, optional): maximum frequency. Defaults to None, the Nyquist frequency.
+        freq_step (float, optional): Frequency step. Defaults to 0.001.
+        phase_step (float, optional): Phase step of the reported phases. Defaults to 0.001.
+        window_length (int | None, optional): Number of samples of a sliding window. Defaults to None.
+        forgetting_factor (float | None, optional): Weight decay per sample of an exponential window, in (0, 1]. Defaults to None.
+        orders (tuple[int, ...], optional): Orders to compute. Defaults to (1, 2, 3, 4).
+        exact_phase (bool, optional): Report the exact maximizing phase instead of the closest phase grid value. Defaults to False.
+        dtype (np.dtype, optional): Dtype of the reported spectra. Defaults to np.float64.
+    """
+
+    def __init__(
+        self,
+        frequency_sampling: float,
+        frequency_array: np.ndarray | None = None,
+        fmin: float | None = None,
+        fmax: float | None = None,
+        freq_step: float = 1e-3,
+        phase_step: float = 1e-3,
+        window_length: int | None = None,
+        forgetting_factor: float | None = None,
+        orders: tuple[int, ...] = (1, 2, 3, 4),
+        exact_phase: bool = False,
+        dtype: np.dtype = np.float64
+    ):
+        if (window_length is None) == (forgetting_factor is None):
+            raise ValueError("Exactly one of window_length and forgetting_factor must be given")
+        if window_length is not None and window_length < 1:
+            raise ValueError(f"window_length must be positive, got {window_length}")
+        if forgetting_factor is not None and not 0 < forgetting_factor <= 1:
+            raise ValueError(f"forgetting_factor must be in (0, 1], got {forgetting_factor}")
+
+        if frequency_array is None:
+            if fmin is None and window_length is None:
+                raise ValueError("fmin must be given with an exponential window")
+            fmax = np.floor(frequency_sampling/2)-1 if fmax is None else fmax # Nyquist Frequency
+            fmin = frequency_sampling/window_length if fmin is None else fmin # Minimun test frequency at least one window period
+            frequency_array = np.arange(fmin, fmax, freq_step)
+
+        self.frequency_sampling = frequency_sampling
+        self.frequency_array = np.asarray(frequency_array, dtype=dtype)
+        self.phase_step = phase_step
+        self.window_length = window_length
+        self.forgetting_factor = forgetting_factor
+        self.orders = orders
+        self.exact_phase = exact_phase
+        self.dtype = dtype
+
+        self._powers_orders = required_orders(orders)
+        self._frequencies = np.asarray(frequency_array, dtype=np.float64)
+        self._rotation = self._phasor(1)
+        self._departure = None if window_length is None else self._phasor(-window_length)
+
+        self.reset()
+
+    def _phasor(self, samples: int) -> np.ndarray:
+        # exp(1j*2*pi*f*samples/fs), with the phase reduced modulo one turn
+        return np.exp(2j*np.pi*np.mod(self._frequencies*(samples/self.frequency_sampling), 1))
+
+    def _powers(self, samples: np.ndarray) -> np.ndarray:
+        return np.vstack([np.power(samples, order) for order in self._powers_orders]).astype(np.float64)
+
+    def reset(self) -> None:
+        """Drop every pushed sample"""
+
+        self.samples_seen = 0
+        self._accumulator = np.zeros((len(self._powers_orders), len(self._frequencies)), dtype=np.complex128)
+        self._weight = 0.0
+        if self.window_length is not None:
+            self._buffer = np.zeros(self.window_length)
+
+    def push(self, chunk: np.ndarray) -> None:
+        """Add a chunk of samples to the window
+
+        Args:
+            chunk (np.ndarray): New samples, in acquisition order.
+        """
+
+        chunk = np.asarray(chunk, dtype=np.float64).reshape(-1)
+        step = len(chunk) if self.window_length is None else self.window_length
+
+        for start in range(0, len(chunk), max(step, 1)):
+            self._push(chunk[start:start + step])
+
+    def _push(self, chunk: np.ndarray) -> None:
+        length = len(chunk)
+
+        # Phasors of the chunk samples, by the oscillator recurrence from an exact anchor
+        rotations = np.empty((length, len(self._frequencies)), dtype=np.complex128)
+        rotations[0] = self._phasor(self.samples_seen)
+        rotations[1:] = self._rotation
+        np.cumprod(rotations, axis=0, out=rotations)
+
+        powers = self._powers(chunk)
+
+        if self.forgetting_factor is not None:
+            weights = self.forgetting_factor**np.arange(length - 1, -1, -1, dtype=np.float64)
+            self._accumulator *= self.forgetting_factor**length
+            self._accumulator += (powers*weights) @ rotations
+            self._weight = self._weight*self.forgetting_factor**length + np.sum(weights)
+
+        else:
+            self._accumulator += powers @ rotations
+
+            # Samples leaving the window, W samples before the incoming ones
+            departing = self.samples_seen - self.window_length + np.arange(length)
+            leaving = departing >= 0
+            if np.any(leaving):
+                departing_powers = self._powers(self._buffer[np.mod(departing[leaving], self.window_length)])
+                self._accumulator -= departing_powers @ (rotations[leaving]*self._departure)
+
+            self._buffer[np.mod(self.samples_seen + np.arange(length), self.window_length)] = chunk
+            self._weight = min(self.samples_seen + length, self.window_length)
+
+        self.samples_seen += length
+
+    def spectra(
+        self,
+        cumulative: bool = True
+    ) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """High order spectra of the current window
+
+        Args:
+            cumulative (bool, optional): Multiply the maxima of orders 1..k into the amplitude of order k. Defaults to True.
+
+        Returns:
+            tuple[np.ndarray, np.ndarray, np.ndarray]: frequency array, amplitude array and phase array, the last two with shape (orders, frequencies)
+        """
+
+        if self.samples_seen == 0:
+            raise ValueError("No samples were pushed")
+
+        origin = 0 if self.window_length is None else max(0, self.samples_seen - self.window_length)
+        projection = self._accumulator*np.conj(self._phasor(origin))/self._weight
+
+        phi_array = None if self.exact_phase else np.arange(0, 2*np.pi, self.phase_step).astype(self.dtype)
+        maxima, phases = maximize_phase(projection.reshape(-1), phi_array=phi_array)
+        maxima = maxima.reshape(projection.shape)
+        phases = phases.reshape(projection.shape)
+
+        if cumulative:
+            maxima = np.cumprod(maxima, axis=0)
+
+        rows = [self._powers_orders.index(int(order)) for order in self.orders]
+
+        return self.frequency_array, maxima[rows].astype(self.dtype), phases[rows].astype(self.dtype)
@@ -0,0 +1,323 @@
+from typing import NamedTuple
+
+import numpy as np
+from high_order_spectra_analysis.engines.blocked import DEFAULT_MAX_MEMORY_BYTES
+from high_order_spectra_analysis.engines.cache import BasisCache
+from high_order_spectra_analysis.engines.dispatch import check_engine, projections
+from high_order_spectra_analysis.engines.telemetry import Monitor, Telemetry, start_monitor, timed
+from high_order_spectra_analysis.time_domain_high_order_spectra.segmented import segment_view
+
+
+# Bytes per (pair, segment) of a tile: the three gathered projections and the triple product, complex
+TRIPLE_BYTES = 64
+
+
+class Bispectrum2D(NamedTuple):
+    """Bispectrum over the principal domain f2 <= f1, f1 + f2 <= fmax, one entry per (f1, f2) pair"""
+
+    # Frequencies of every pair, row by row of increasing f1 and f2 on the grid, or in the order of the candidate pairs
+    f1: np.ndarray
+    f2: np.ndarray
+    # |mean(Z(f1)*Z(f2)*conj(Z(f1 + f2)))| over the segments
+    amplitude: np.ndarray
+    # Biphase, the angle of the same mean, in [0, 2*pi)
+    phase: np.ndarray
+    # Squared bicoherence, |sum(Z1*Z2*conj(Z3))|^2/(sum(|Z1*Z2|^2)*sum(|Z3|^2)), in [0, 1]
+    bicoherence: np.ndarray
+    # Step of the frequency grid, None for candidate pairs
+    frequency_step: float | None
+    segments: int
+
+
+def principal_domain(
+    kmin: int,
+    kmax: int
+) -> tuple[np.ndarray, np.ndarray]:
+    """Grid indices (i, j) of the principal domain kmin <= j <= i, i + j <= kmax, row by row of increasing i
+
+    For a real signal, B(f1, f2) = B(f2, f1) = B(f1, -f1 - f2) = conj(B(-f1, -f2)), so the
+    permutations of (f1, f2, -f1 - f2) and the conjugation map the whole (f1, f2) plane
+    into this triangle, a twelfth of the hexagon where |f1|, |f2| and |f1 + f2| stay
+    below the highest frequency kmax.
+
+    Args:
+        kmin (int): Index of the lowest frequency of the grid.
+        kmax (int): Index of the highest frequency of the grid, which also bounds f1 + f2.
+
+    Returns:
+        tuple[np.ndarray, np.ndarray]: indices of f1 and of f2
+    """
+
+    rows = np.arange(kmin, kmax - kmin + 1)
+    counts = np.minimum(rows, kmax - rows) - kmin + 1
+    first = np.repeat(rows, counts)
+    offsets = np.cumsum(counts) - counts
+    second = np.arange(len(first)) - np.repeat(offsets, counts) + kmin
+
+    return first, second
+
+
+def _canonical_pairs(
+    first: np.ndarray,
+    second: np.ndarray
+) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    # Sorted triple s0 <= s1 <= s2 of (f1, f2, -f1 - f2): with s1 >= 0 the pair is (s2, s1), else the conjugate of (-s0, -s1)
+    first, second = np.broadcast_arrays(first, second)
+    triple = np.sort(np.stack([first, second, -first - second]), axis=0)
+    conjugate = triple[1] < 0
+
+    return (
+        np.where(conjugate, -triple[0], triple[2]),
+        np.where(conjugate, -triple[1], triple[1]),
+        conjugate
+    )
+
+
+def _triple_products(
+    projection: np.ndarray,
+    first: np.ndarray,
+    second: np.ndarray,
+    total: np.ndarray,
+    block: int,
+    monitor: Monitor | None = None
+) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    # Mean of Z(f1)*Z(f2)*conj(Z(f1 + f2)) over the segments and the squared bicoherence, a block of pairs at a time
+    length = len(first)
+    bispectrum = np.empty(length, dtype=np.complex128)
+    bicoherence = np.empty(length)
+
+    for start in range(0, length, block):
+        stop = min(start + block, length)
+
+        with timed(monitor, "reduction"):
+            pair = projection[:, first[start:stop]]*projection[:, second[start:stop]]
+            third = projection[:, total[start:stop]]
+
+            product = np.sum(pair*np.conj(third), axis=0)
+            power = np.sum(np.abs(pair)**2, axis=0)*np.sum(np.abs(third)**2, axis=0)
+
+            bispectrum[start:stop] = product/projection.shape[0]
+            bicoherence[start:stop] = np.abs(product)**2/np.where(power > 0, power, 1)
+
+    return bispectrum, bicoherence
+
+
+def tdbs2d(
+    signal: np.ndarray,
+    frequency_sampling: float,
+    segment_length: int | None = None,
+    overlap: int | None = None,
+    time: np.ndarray | None = None,
+    pairs: np.ndarray | None = None,
+    fmin: float | None = None,
+    fmax: float | None = None,
+    freq_step: float | None = None,
+    dtype: np.dtype = np.float64,
+    enable_progress_bar: bool = True,
+    engine: str = "auto",
+    max_memory_bytes: int | None = None,
+    basis_cache: BasisCache | None = None,
+    n_jobs: int | None = None,
+    chunk_size: int | None = None,
+    tolerance: float | None = None,
+    telemetry: Telemetry | None = None
+) -> Bispectrum2D:
+    """Time domain bispectrum over the (f1, f2) plane, evaluated on its principal domain only
+
+    The projections Z(f) = mean(x*exp(1j*2*pi*f*t)) of every segment are computed once,
+    in one batched call of the projection engine, on a grid f_k = k*freq_step holding
+    every f1, f2 and f1 + f2, and B(f1, f2) is the mean of Z(f1)*Z(f2)*conj(Z(f1 + f2))
+    over the segments, which does not depend on where a segment starts. Only the
+    triangle f2 <= f1, f1 + f2 <= fmax is evaluated, the rest of the plane follows from
+    the symmetries of the bispectrum of a real signal (see full_plane), in blocks of pairs
+    within max_memory_bytes. With candidate pairs, only the frequencies of those pairs
+    are projected, and every pair is first mapped into the principal domain.
+
+    Args:
+        signal (np.ndarray): Signal which the bispectrum will be calculated, with shape (samples,).
+        frequency_sampling (float): Frequency sampling of the signal.
+        segment_length (int | None, optional): Samples per segment. Defaults to None, a single segment with the whole signal.
+        overlap (int | None, optional): Samples shared by consecutive segments. Defaults to None, half of segment_length.
+        time (np.ndarray | None, optional): Time array of a single segment (in case of already available, if nots, it is
+            calculated). Defaults to None.
+        pairs (np.ndarray | None, optional): Candidate (f1, f2) pairs, in Hz, with shape (pairs, 2). Defaults to None, the
+            whole principal domain on the grid.
+        fmin (float | None, optional): minimum of f1 and f2 on the grid. Defaults to None, but the minimum used in this case is of one segment period.
+        fmax (float | None, optional): maximum of f1 + f2 on the grid. Defaults, but the maximum used in this case is the Nyquist frequency.
+        freq_step (float | None, optional): Step of the frequency grid. Defaults to None, the resolution of a segment,
+            frequency_sampling/segment_length.
+        dtype (np.dtype, optional): Precision of the signal and of the outputs. Defaults to np.float64.
+        engine (str, optional): Projection engine, as in tdhos ("scan" is not supported). Defaults to "auto".
+        max_memory_bytes (int | None, optional): Memory budget of a block of pairs, and of a basis tile of the "blocked" engine.
+            Defaults to None, 256 MiB.
+        basis_cache (BasisCache | None, optional): Cache keeping the basis tiles or chirp-z twiddles between calls. Defaults to None.
+        n_jobs (int | None, optional): Number of worker processes of the "parallel" engine, or threads of the "native" one. Defaults to None, one per CPU.
+        chunk_size (int | None, optional): Frequencies per task of the "parallel" engine. Defaults to None, four tasks per worker.
+        tolerance (float | None, optional): Error of the "nufft" engine, relative to the mean absolute value of the signal.
+            Defaults to None, 1e-10.
+        telemetry (Telemetry | None, optional): Receiver of the progress, of the setup, basis and reduction timings and of
+            the throughput. Defaults to None, which reports nothing, or draws a progress bar when enable_progress_bar is True.
+
+    Returns:
+        Bispectrum2D: pairs, amplitude, biphase and squared bicoherence, in the compact order of principal_domain or of pairs
+    """
+
+    check_engine(engine)
+
+    if engine == "scan":
+        raise ValueError("The (f1, f2) bispectrum needs a projection engine, not 'scan'")
+
+    signal = np.asarray(signal, dtype=dtype)
+
+    if signal.ndim != 1:
+        raise ValueError(f"Expected a signal with shape (samples,), got shape {signal.shape}")
+
+    segment_length = len(signal) if segment_length is None else segment_length
+
+    if time is not None and segment_length != len(signal):
+        raise ValueError("A time array is only supported with a single segment")
+
+    monitor = start_monitor(telemetry, enable_progress_bar)
+    max_memory_bytes = DEFAULT_MAX_MEMORY_BYTES if max_memory_bytes is None else max_memory_bytes
+
+    segments, starts = segment_view(signal, segment_length, 0 if segment_length == len(signal) else overlap)
+    time_sampling = 1/frequency_sampling
+    time_grid = (0.0, time_sampling) if time is None else None
+
+    # The time array stays in float64, a float32 time loses the sample period on long signals
+    time = np.arange(segment_length)*time_sampling if time is None else time
+
+    if pairs is None:
+        fstep = frequency_sampling/segment_length if freq_step is None else freq_step
+        fmax = np.floor(frequency_sampling/2)-1 if fmax is None else fmax # Nyquist Frequency
+        fmin = frequency_sampling/segment_length if fmin is None else fmin # Minimun test frequency at least one segment period
+
+        kmin = max(1, int(np.ceil(fmin/fstep - 1e-9)))
+        kmax = int(np.floor(fmax/fstep + 1e-9))
+
+        if 2*kmin > kmax:
+            raise ValueError(f"No pair with fmin <= f2 <= f1 and f1 + f2 <= fmax, for fmin={fmin} and fmax={fmax}")
+
+        first, second = principal_domain(kmin, kmax)
+        conjugate = np.zeros(len(first), dtype=bool)
+
+        # Grid rows of f1, f2 and f1 + f2 in the projections, which start at kmin
+        frequency_array = np.arange(kmin, kmax + 1)*fstep
+        frequency_grid = (kmin*fstep, fstep)
+        rows = (first - kmin, second - kmin, first + second - kmin)
+    else:
+        pairs = np.atleast_2d(np.asarray(pairs, dtype=np.float64))
+
+        if pairs.ndim != 2 or pairs.shape[1] != 2:
+            raise ValueError(f"Expected candidate pairs with shape (pairs, 2), got shape {pairs.shape}")
+
+        fstep = None
+        first, second, conjugate = _canonical_pairs(pairs[:, 0], pairs[:, 1])
+
+        # Every distinct frequency projected once, however many pairs share it
+        frequency_array, inverse = np.unique(np.concatenate([first, second, first + second]), return_inverse=True)
+        frequency_grid = None
+        rows = tuple(inverse.reshape(3, -1))
+
+    if monitor is not None:
+        monitor.end_setup(len(frequency_array), len(starts)*segment_length)
+
+    # Every segment on its own time axis, one row per segment
+    projection = projections(
+        segments,
+        time,
+        frequency_array,
+        engine=engine,
+        monitor=monitor,
+        time_grid=time_grid,
+        frequency_grid=frequency_grid,
+        dtype=dtype,
+        max_memory_bytes=max_memory_bytes,
+        cache=basis_cache,
+        n_jobs=n_jobs,
+        chunk_size=chunk_size,
+        tolerance=tolerance
+    )
+
+    if monitor is not None:
+        monitor.checkpoint()
+
+    block = max(1, max_memory_bytes//(TRIPLE_BYTES*len(starts)))
+    bispectrum, bicoherence = _triple_products(projection, *rows, block, monitor=monitor)
+
+    # Candidate pairs outside the principal domain are the conjugate of their image
+    bispectrum = np.where(conjugate, np.conj(bispectrum), bispectrum)
+
+    if monitor is not None:
+        monitor.close()
+
+    if fstep is not None:
+        first = first*fstep
+        second = second*fstep
+
+    return Bispectrum2D(
+        np.asarray(first).astype(dtype),
+        np.asarray(second).astype(dtype),
+        np.abs(bispectrum).astype(dtype),
+        np.mod(np.angle(bispectrum), 2*np.pi).astype(dtype),
+        bicoherence.astype(dtype),
+        None if fstep is None else float(fstep),
+        len(starts)
+    )
+
+
+def full_plane(
+    bispectrum: Bispectrum2D,
+    field: str = "amplitude"
+) -> tuple[np.ndarray, np.ndarray]:
+    """Symmetric view of a principal domain bispectrum over the whole (f1, f2) plane
+
+    Every cell (f1, f2) of the grid -fmax..fmax is read from its image in the principal
+    domain, through the permutations of (f1, f2, -f1 - f2) and the conjugation, which
+    negates the biphase. Cells with |f1 + f2| > fmax, or whose image falls below fmin, are
+    NaN. The view has (2*kmax + 1)^2 cells, against about kmax^2/4 pairs computed.
+
+    Args:
+        bispectrum (Bispectrum2D): Bispectrum over the whole principal domain of a grid, as returned by tdbs2d without pairs.
+        field (str, optional): "amplitude", "phase" or "bicoherence". Defaults to "amplitude".
+
+    Returns:
+        tuple[np.ndarray, np.ndarray]: frequency axis of both f1 and f2, and the plane with shape (frequencies, frequencies),
+            indexed [f1, f2]
+    """
+
+    if bispectrum.frequency_step is None:
+        raise ValueError("Candidate pairs do not cover the principal domain, there is no full plane to build")
+
+    if field not in ("amplitude", "phase", "bicoherence"):
+        raise ValueError(f"Unknown field {field!r}, expected 'amplitude', 'phase' or 'bicoherence'")
+
+    step = bispectrum.frequency_step
+    values = getattr(bispectrum, field)
+    first = np.rint(bispectrum.f1/step).astype(np.int64)
+    second = np.rint(bispectrum.f2/step).astype(np.int64)
+    kmin = int(second.min())
+    kmax = int((first + second).max())
+
+    # Position of the first pair of every row f1 in the compact arrays
+    offsets = np.full(kmax + 1, -1, dtype=np.int64)
+    rows, starts = np.unique(first, return_index=True)
+    offsets[rows] = starts
+
+    axis = np.arange(-kmax, kmax + 1)
+    image_first, image_second, conjugate = _canonical_pairs(axis[:, None], axis[None, :])
+
+    valid = (
+        (np.abs(axis[:, None] + axis[None, :]) <= kmax)
+        & (image_second >= kmin)
+        & (image_first <= kmax)
+    )
+    valid &= offsets[np.where(valid, image_first, 0)] >= 0
+    index = np.where(valid, offsets[np.where(valid, image_first, 0)] + image_second - kmin, 0)
+
+    plane = np.where(valid, values[index], np.nan)
+
+    if field == "phase":
+        plane = np.where(conjugate, np.mod(-plane, 2*np.pi), plane)
+
+    return axis*step, plane.astype(values.dtype)
@@ -1,5 +1,9 @@
 import numpy as np
-import progressbar
+from high_order_spectra_analysis.engines.analytic import maximize_phase
+from high_order_spectra_analysis.engines.cache import BasisCache
+from high_order_spectra_analysis.engines.dispatch import check_engine, projections, signal_powers
+from high_order_spectra_analysis.engines.precision import phase_argument
+from high_order_spectra_analysis.engines.telemetry import Telemetry, start_monitor
 
 
 def tdbs(
@@ -12,7 +16,15 @@ def tdbs(
     freq_step: float = 1e-3,
     phase_step: float = 1e-3,
     dtype: np.dtype = np.float64,
-    enable_progress_bar: bool = True
+    enable_progress_bar: bool = True,
+    engine: str = "scan",
+    exact_phase: bool = False,
+    max_memory_bytes: int | None = None,
+    basis_cache: BasisCache | None = None,
+    n_jobs: int | None = None,
+    chunk_size: int | None = None,
+    tolerance: float | None = None,
+    telemetry: Telemetry | None = None
 ) -> tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
     """Time domain bispectrum
 
@@ -25,16 +37,42 @@ def tdbs(
         fmax (float | None, optional): maximum frequency to generate spectrum. Defaults, but the maximum used in this case is the Nyquist frequency.
         freq_step (float, optional): Frequency step to scan. Defaults to 0.001.
         phase_step (float, optional): Phase step to scan. Defaults to 0.001.
+        dtype (np.dtype, optional): Precision of the signal, of its powers and of the outputs, and of the basis evaluation of the
+            "scan", "blocked", "parallel" and "native" engines, which reduce the phase argument modulo one turn in float64 first.
+            The "analytic", "czt" and "nufft" engines evaluate the basis and accumulate in float64. Defaults to np.float64.
+        engine (str, optional): "scan" evaluates every phase of phi_array, "analytic" maximizes over the phase in closed form,
+            "czt" does the same with chirp-z projections on uniform frequency grids, "blocked" with
+            matrix products over tiles of frequencies, "parallel" with a pool of worker processes and "native" with the
+            compiled OpenMP kernel, "nufft" with a type-3 non-uniform FFT for any time array. "auto" uses "nufft" when the time
+            array is not a uniform grid, otherwise "native" when it is built and "blocked". Defaults to "scan".
+        exact_phase (bool, optional): Return the exact maximizing phase instead of the closest phi_array value (not used by the "scan" engine). Defaults to False.
+        max_memory_bytes (int | None, optional): Memory budget of a basis tile of the "blocked" engine. Defaults to None, 256 MiB.
+        basis_cache (BasisCache | None, optional): Cache keeping the basis tiles or chirp-z twiddles between calls. Defaults to None.
+        n_jobs (int | None, optional): Number of worker processes of the "parallel" engine, or threads of the "native" one. Defaults to None, one per CPU.
+        chunk_size (int | None, optional): Frequencies per task of the "parallel" engine. Defaults to None, four tasks per worker.
+        tolerance (float | None, optional): Error of the "nufft" engine, relative to the mean absolute value of the signal powers.
+            Defaults to None, 1e-10.
+        telemetry (Telemetry | None, optional): Receiver of the progress, of the setup, basis, reduction and argmax timings and of
+            the throughput. Defaults to None, which reports nothing, or draws a progress bar when enable_progress_bar is True.
 
     Returns:
         tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray, np.ndarray]: frequency array, amplitude array, phase array
     """
 
+    check_engine(engine)
+
+    monitor = start_monitor(telemetry, enable_progress_bar)
+
+    signal = np.asarray(signal, dtype=dtype)
+
     time_sampling = 1/frequency_sampling
     time_end = len(signal)*time_sampling
 
+    time_grid = (0.0, time_sampling) if time is None else None
+
+    # The time array stays in float64, a float32 time loses the sample period on long signals
     if time is None:
-        time = np.arange(0, time_end, time_sampling)[0:len(signal)].astype(dtype)
+        time = np.arange(0, time_end, time_sampling)[0:len(signal)]
 
     fmax = np.floor(frequency_sampling/2)-1 if fmax is None else fmax # Nyquist Frequency
     phase_len = np.floor(len(signal)*1/frequency_sampling)
@@ -43,23 +81,63 @@ def tdbs(
     fstep = 0.01 if freq_step is None else freq_step
     phistep = 0.01*2*np.pi if phase_step is None else phase_step
 
+    frequency_grid = (fmin, fstep) if frequency_array is None else None
     frequency_array = np.arange(fmin, fmax, fstep).astype(dtype) if frequency_array is None else frequency_array
     phi_array = np.arange(0, 2*np.pi, phistep).astype(dtype)
 
+    if monitor is not None:
+        monitor.end_setup(len(frequency_array), len(signal))
+
+    if engine != "scan":
+        projection = projections(
+            signal_powers(signal, (1, 2)),
+            time,
+            frequency_array,
+            engine=engine,
+            monitor=monitor,
+            time_grid=time_grid,
+            frequency_grid=frequency_grid,
+            dtype=dtype,
+            max_memory_bytes=max_memory_bytes,
+            cache=basis_cache,
+            n_jobs=n_jobs,
+            chunk_size=chunk_size,
+            tolerance=tolerance
+        )
+        phi_grid = None if exact_phase else phi_array
+
+        if monitor is not None:
+            monitor.checkpoint()
+
+        # mean(S*cos(pi*f*t + phi)^2) = mean(S)/2 + Re(Z_1*exp(2j*phi))/2
+        max_amplitude_spectrum, phase_spectrum = maximize_phase(None, projection[0]/2, phi_array=phi_grid)
+        max_amplitude_spectrum = max_amplitude_spectrum + np.mean(signal)/2
+        max_amplitude_bispectrum, phase_bispectrum = maximize_phase(projection[1], phi_array=phi_grid)
+
+        if monitor is not None:
+            monitor.checkpoint("argmax")
+            monitor.close()
+
+        return (
+            frequency_array,
+            max_amplitude_spectrum.astype(dtype),
+            phase_spectrum.astype(dtype),
+            (max_amplitude_bispectrum*max_amplitude_spectrum).astype(dtype),
+            phase_bispectrum.astype(dtype)
+        )
+
     bispectrum = np.zeros(len(frequency_array)).astype(dtype)
     phase_bispectrum = np.zeros(len(frequency_array)).astype(dtype)
     spectrum = np.zeros(len(frequency_array)).astype(dtype)
     phase_spectrum = np.zeros(len(frequency_array)).astype(dtype)
-    x = np.zeros(len(frequency_array)).astype(dtype)
-
-    if enable_progress_bar:
-        bar = progressbar.ProgressBar(max_value=len(frequency_array)*len(phi_array))
-        counter_step = len(phi_array)
 
-        counter = 0
+    s_squared = np.power(signal, 2)
 
     for i, freq in enumerate(frequency_array):
 
+        half_argument = phase_argument(freq, time, dtype, scale=0.5)
+        argument = phase_argument(freq, time, dtype)
+
         max_amplitude_spectrum: dtype = dtype('-inf')
         max_amplitude_bispectrum: dtype = dtype('-inf')
         max_phi_spectrum: dtype = dtype(-1.0)
@@ -68,7 +146,7 @@ def tdbs(
         for phi in phi_array:
         
             # x = P^2 for \Omega = \omega/2
-            x = np.cos(np.pi*freq*time + phi)**2
+            x = np.cos(half_argument + phi)**2
             # x = SP^2
             x = signal * x
             # evaluated_x = mean(SP^2)
@@ -78,10 +156,8 @@ def tdbs(
             max_amplitude_spectrum = evaluated_spectrum if update_max else max_amplitude_spectrum
             max_phi_spectrum = phi if update_max else max_phi_spectrum
 
-            # x = S^2
-            x = np.power(signal, 2)
             # x = S^2P
-            x = x * np.cos(2*np.pi*freq*time + phi)
+            x = s_squared * np.cos(argument + phi)
             # evaluated_x = mean(S^2P)
             evaluated_bispectrum = np.mean(x)
 
@@ -95,8 +171,12 @@ def tdbs(
         spectrum[i] = max_amplitude_spectrum
         phase_spectrum[i] = max_phi_spectrum
 
-        if enable_progress_bar:
-            bar.update(counter)
-            counter += counter_step
+        if monitor is not None:
+            monitor.advance()
+
+    if monitor is not None:
+        # The scan evaluates the basis and takes the maxima inside the reduction loop
+        monitor.checkpoint("reduction")
+        monitor.close()
 
     return frequency_array, spectrum, phase_spectrum, bispectrum, phase_bispectrum
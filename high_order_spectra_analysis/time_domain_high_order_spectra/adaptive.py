@@ -0,0 +1,389 @@
+from typing import NamedTuple
+
+import numpy as np
+from high_order_spectra_analysis.engines.analytic import maximize_phase
+from high_order_spectra_analysis.engines.cache import BasisCache
+from high_order_spectra_analysis.engines.dispatch import check_engine, projections, signal_powers
+from high_order_spectra_analysis.engines.telemetry import Monitor, Telemetry, start_monitor
+from high_order_spectra_analysis.time_domain_high_order_spectra.tdhos import required_orders
+
+
+REFINEMENTS = ("grid", "parabolic", "golden")
+
+GOLDEN_RATIO = (np.sqrt(5) - 1)/2
+
+
+class SpectralPeaks(NamedTuple):
+    """Peaks found by the adaptive search, one entry per peak"""
+
+    order: np.ndarray
+    channel: np.ndarray
+    frequency: np.ndarray
+    amplitude: np.ndarray
+    phase: np.ndarray
+
+
+class _Spectra:
+    """Amplitudes and phases of every (order, channel) row at arbitrary frequencies, keeping every evaluated frequency"""
+
+    def __init__(
+        self,
+        powers: np.ndarray,
+        time: np.ndarray,
+        powers_orders: tuple[int, ...],
+        orders: tuple[int, ...],
+        channels: int,
+        cumulative: bool,
+        phi_grid: np.ndarray | None,
+        engine: str,
+        cache: BasisCache | None = None,
+        monitor: Monitor | None = None,
+        **engine_options
+    ):
+        self.powers = powers
+        self.time = time
+        self.shape = (len(powers_orders), channels)
+        self.rows = [powers_orders.index(int(order)) for order in orders]
+        self.cumulative = cumulative
+        self.phi_grid = phi_grid
+        self.engine = engine
+        self.cache = cache
+        self.monitor = monitor
+        self.engine_options = engine_options
+
+        self.frequencies = []
+        self.amplitudes = []
+        self.evaluations = 0
+
+    def __call__(
+        self,
+        frequencies: np.ndarray,
+        frequency_grid: tuple[float, float] | None = None
+    ) -> tuple[np.ndarray, np.ndarray]:
+        projection = projections(
+            self.powers,
+            self.time,
+            frequencies,
+            engine=self.engine,
+            frequency_grid=frequency_grid,
+            # Only the coarse grid is worth caching, the refinement probes are never evaluated twice
+            cache=None if frequency_grid is None else self.cache,
+            monitor=self.monitor,
+            **self.engine_options
+        )
+
+        if self.monitor is not None:
+            self.monitor.checkpoint()
+
+        maxima, phases = maximize_phase(projection.reshape(-1), phi_array=self.phi_grid)
+        maxima = maxima.reshape(self.shape + (len(frequencies),))
+        phases = phases.reshape(self.shape + (len(frequencies),))
+
+        if self.cumulative:
+            maxima = np.cumprod(maxima, axis=0)
+
+        amplitude = maxima[self.rows].reshape(-1, len(frequencies))
+
+        if self.monitor is not None:
+            self.monitor.checkpoint("argmax")
+
+        self.frequencies.append(np.array(frequencies, dtype=np.float64))
+        self.amplitudes.append(amplitude)
+        self.evaluations += len(frequencies)
+
+        return amplitude, phases[self.rows].reshape(-1, len(frequencies))
+
+    def at(
+        self,
+        frequencies: np.ndarray,
+        rows: np.ndarray
+    ) -> tuple[np.ndarray, np.ndarray]:
+        """Amplitude and phase of rows[i] at frequencies[i]"""
+
+        amplitude, phases = self(frequencies)
+        columns = np.arange(len(frequencies))
+
+        return amplitude[rows, columns], phases[rows, columns]
+
+
+def find_candidates(
+    amplitude: np.ndarray,
+    n_peaks: int,
+    threshold: float = 0.0
+) -> tuple[np.ndarray, np.ndarray]:
+    """Local maxima of every row of a spectrum, the n_peaks largest of each row
+
+    Args:
+        amplitude (np.ndarray): Amplitudes, with shape (rows, frequencies).
+        n_peaks (int): Maximum number of peaks per row.
+        threshold (float, optional): Minimum amplitude of a peak, relative to the largest amplitude of its row. Defaults to 0.0.
+
+    Returns:
+        tuple[np.ndarray, np.ndarray]: row and frequency index of every peak
+    """
+
+    padded = np.pad(amplitude, ((0, 0), (1, 1)), constant_values=-np.inf)
+    local_maxima = (amplitude >= padded[:, :-2]) & (amplitude > padded[:, 2:])
+    local_maxima &= amplitude >= threshold*np.max(amplitude, axis=1, keepdims=True)
+
+    rows, indices = [], []
+    for row in range(amplitude.shape[0]):
+        peaks = np.flatnonzero(local_maxima[row])
+        peaks = peaks[np.argsort(amplitude[row, peaks], kind="stable")[::-1][:n_peaks]]
+
+        rows.append(np.full(len(peaks), row))
+        indices.append(np.sort(peaks))
+
+    return np.concatenate(rows), np.concatenate(indices)
+
+
+def _refine_grid(
+    spectra: _Spectra,
+    rows: np.ndarray,
+    lower: np.ndarray,
+    upper: np.ndarray,
+    tolerance: float
+) -> np.ndarray:
+    steps = int(np.ceil(np.max(upper - lower)/tolerance)) + 1
+    frequencies = np.minimum(lower[:, None] + tolerance*np.arange(steps), upper[:, None])
+
+    amplitude, _ = spectra(frequencies.reshape(-1))
+    amplitude = amplitude[rows[:, None], np.arange(frequencies.size).reshape(frequencies.shape)]
+
+    return frequencies[np.arange(len(rows)), np.argmax(amplitude, axis=1)]
+
+
+def _refine_golden(
+    spectra: _Spectra,
+    rows: np.ndarray,
+    lower: np.ndarray,
+    upper: np.ndarray,
+    tolerance: float
+) -> np.ndarray:
+    x1 = upper - GOLDEN_RATIO*(upper - lower)
+    x2 = lower + GOLDEN_RATIO*(upper - lower)
+    f1, _ = spectra.at(x1, rows)
+    f2, _ = spectra.at(x2, rows)
+
+    while np.max(upper - lower) > tolerance:
+        # The maximum is in [lower, x2] when f1 >= f2, and in [x1, upper] otherwise
+        left = f1 >= f2
+        upper = np.where(left, x2, upper)
+        lower = np.where(left, lower, x1)
+
+        probe = np.where(left, upper - GOLDEN_RATIO*(upper - lower), lower + GOLDEN_RATIO*(upper - lower))
+        value, _ = spectra.at(probe, rows)
+
+        x1, x2 = np.where(left, probe, x2), np.where(left, x1, probe)
+        f1, f2 = np.where(left, value, f2), np.where(left, f1, value)
+
+    return np.where(f1 >= f2, x1, x2)
+
+
+def _refine_parabolic(
+    spectra: _Spectra,
+    rows: np.ndarray,
+    lower: np.ndarray,
+    center: np.ndarray,
+    upper: np.ndarray,
+    tolerance: float,
+    max_iterations: int = 100
+) -> np.ndarray:
+    x0, x1, x2 = lower.copy(), center.copy(), upper.copy()
+    f0, _ = spectra.at(x0, rows)
+    f1, _ = spectra.at(x1, rows)
+    f2, _ = spectra.at(x2, rows)
+
+    active = np.ones(len(rows), dtype=bool)
+
+    for _ in range(max_iterations):
+        # Vertex of the parabola through the bracketing triple
+        d0 = (x1 - x0)*(f1 - f2)
+        d2 = (x1 - x2)*(f1 - f0)
+        denominator = d0 - d2
+        with np.errstate(divide="ignore", invalid="ignore"):
+            vertex = x1 - 0.5*((x1 - x0)*d0 - (x1 - x2)*d2)/denominator
+
+        # Bisect the larger side when the parabola does not bracket a maximum
+        larger_right = (x2 - x1) > (x1 - x0)
+        midpoint = np.where(larger_right, 0.5*(x1 + x2), 0.5*(x0 + x1))
+        vertex = np.where(np.isfinite(vertex) & (vertex > x0) & (vertex < x2), vertex, midpoint)
+
+        active &= (np.abs(vertex - x1) >= 0.5*tolerance) & (x2 - x0 > tolerance)
+        if not np.any(active):
+            break
+
+        index = np.flatnonzero(active)
+        probe = vertex[index]
+        value, _ = spectra.at(probe, rows[index])
+
+        right = probe > x1[index]
+        better = value >= f1[index]
+
+        # Keep the best point in the middle of the bracket
+        x0[index] = np.where(better & right, x1[index], np.where(~better & ~right, probe, x0[index]))
+        f0[index] = np.where(better & right, f1[index], np.where(~better & ~right, value, f0[index]))
+        x2[index] = np.where(better & ~right, x1[index], np.where(~better & right, probe, x2[index]))
+        f2[index] = np.where(better & ~right, f1[index], np.where(~better & right, value, f2[index]))
+        x1[index] = np.where(better, probe, x1[index])
+        f1[index] = np.where(better, value, f1[index])
+
+    return x1
+
+
+def adaptive_tdhos(
+    signal: np.ndarray,
+    frequency_sampling: float,
+    time: np.ndarray | None = None,
+    fmin: float | None = None,
+    fmax: float | None = None,
+    freq_step: float = 1e-3,
+    coarse_step: float | None = None,
+    phase_step: float = 1e-3,
+    dtype: np.dtype = np.float64,
+    engine: str = "auto",
+    exact_phase: bool = False,
+    max_memory_bytes: int | None = None,
+    basis_cache: BasisCache | None = None,
+    n_jobs: int | None = None,
+    chunk_size: int | None = None,
+    orders: tuple[int, ...] = (1, 2, 3, 4),
+    cumulative: bool = True,
+    n_peaks: int = 5,
+    threshold: float = 0.0,
+    refinement: str = "parabolic",
+    dense: bool = False,
+    telemetry: Telemetry | None = None
+) -> tuple[SpectralPeaks, np.ndarray | None, np.ndarray | None]:
+    """Peaks of the time domain high order spectra, found on a coarse grid and refined to freq_step
+
+    Evaluates the spectra on a grid of step coarse_step, takes the n_peaks largest local
+    maxima of every order as candidates and refines each one inside the bracket of its two
+    coarse neighbours, all candidates at once. "grid" evaluates the bracket with step
+    freq_step, "golden" runs a golden-section search and "parabolic" a successive parabolic
+    interpolation, both stopping at freq_step. The default coarse step, half of 1/duration,
+    samples every spectral main lobe at least four times, so that a peak is bracketed.
+
+    Args:
+        signal (np.ndarray): Signal which the spectra will be calculated, with shape (samples,) or (channels, samples).
+        frequency_sampling (float): Frequency sampling of the signal.
+        time (np.ndarray | None, optional): Time array (in case of already available, if nots, it is calculated). Defaults to None.
+        fmin (float | None, optional): minimum frequency to search. Defaults to None, but the minimum used in this case is of one period.
+        fmax (float | None, optional): maximum frequency to search. Defaults, but the maximum used in this case is the Nyquist frequency.
+        freq_step (float, optional): Resolution of the peak frequencies. Defaults to 0.001.
+        coarse_step (float | None, optional): Frequency step of the coarse grid. Defaults to None, 0.5/duration.
+        phase_step (float, optional): Phase step of the phase grid. Defaults to 0.001.
+        dtype (np.dtype, optional): Precision of the basis evaluation. Defaults to np.float64.
+        engine (str, optional): Projection engine, as in tdhos ("scan" is not supported). Defaults to "auto".
+        exact_phase (bool, optional): Return the exact maximizing phase instead of the closest phase grid value. Defaults to False.
+        max_memory_bytes (int | None, optional): Memory budget of a basis tile of the "blocked" engine. Defaults to None, 256 MiB.
+        basis_cache (BasisCache | None, optional): Cache keeping the basis tiles or chirp-z twiddles between calls. Defaults to None.
+        n_jobs (int | None, optional): Number of worker processes of the "parallel" engine, or threads of the "native" one. Defaults to None, one per CPU.
+        chunk_size (int | None, optional): Frequencies per task of the "parallel" engine. Defaults to None, four tasks per worker.
+        orders (tuple[int, ...], optional): Orders to search. Defaults to (1, 2, 3, 4).
+        cumulative (bool, optional): Multiply the maxima of orders 1..k into the amplitude of order k. Defaults to True.
+        n_peaks (int, optional): Maximum number of peaks per order and channel. Defaults to 5.
+        threshold (float, optional): Minimum amplitude of a peak, relative to the largest coarse amplitude of its order. Defaults to 0.0.
+        refinement (str, optional): "grid", "golden" or "parabolic". Defaults to "parabolic".
+        dense (bool, optional): Also return the spectra on the whole freq_step grid, interpolated from every evaluated frequency. Defaults to False.
+        telemetry (Telemetry | None, optional): Receiver of the progress, of the setup, basis, reduction and argmax timings and of
+            the throughput, with the progress in evaluated frequencies. Defaults to None, which reports nothing.
+
+    Returns:
+        tuple[SpectralPeaks, np.ndarray | None, np.ndarray | None]: peaks sorted by order, channel and frequency, and the dense
+            frequency and amplitude arrays (the latter with shape (orders, [channels,] frequencies)) when dense is True
+    """
+
+    check_engine(engine)
+
+    if engine == "scan":
+        raise ValueError("The adaptive search needs a projection engine, not 'scan'")
+
+    if refinement not in REFINEMENTS:
+        raise ValueError(f"Unknown refinement '{refinement}', expected one of {REFINEMENTS}")
+
+    monitor = start_monitor(telemetry)
+
+    signal = np.asarray(signal)
+    channels_shape = signal.shape[:-1]
+    signal_length = signal.shape[-1]
+    channels = int(np.prod(channels_shape))
+
+    time_sampling = 1/frequency_sampling
+    duration = signal_length*time_sampling
+    time_grid = (0.0, time_sampling) if time is None else None
+    time = np.arange(signal_length)*time_sampling if time is None else time
+
+    fmax = np.floor(frequency_sampling/2)-1 if fmax is None else fmax # Nyquist Frequency
+    fmin = frequency_sampling/signal_length if fmin is None else fmin # Minimun test frequency at least one period
+    coarse_step = 0.5/duration if coarse_step is None else coarse_step
+    phi_grid = None if exact_phase else np.arange(0, 2*np.pi, phase_step).astype(dtype)
+
+    powers_orders = required_orders(orders, cumulative)
+    powers = signal_powers(signal, powers_orders, dtype)
+
+    if monitor is not None:
+        # The number of evaluated frequencies is only known at the end
+        monitor.end_setup(None, signal_length)
+
+    spectra = _Spectra(
+        powers,
+        time,
+        powers_orders,
+        orders,
+        channels,
+        cumulative,
+        phi_grid,
+        engine,
+        time_grid=time_grid,
+        dtype=dtype,
+        max_memory_bytes=max_memory_bytes,
+        cache=basis_cache,
+        monitor=monitor,
+        n_jobs=n_jobs,
+        chunk_size=chunk_size
+    )
+
+    coarse_frequencies = np.arange(fmin, fmax, coarse_step)
+    coarse_amplitude, _ = spectra(coarse_frequencies, frequency_grid=(fmin, coarse_step))
+
+    rows, indices = find_candidates(coarse_amplitude, n_peaks, threshold)
+    center = coarse_frequencies[indices]
+    lower = np.maximum(center - coarse_step, fmin)
+    upper = np.minimum(center + coarse_step, coarse_frequencies[-1])
+
+    if len(rows) == 0:
+        frequency = amplitude = phase = np.empty(0)
+    else:
+        if refinement == "grid":
+            frequency = _refine_grid(spectra, rows, lower, upper, freq_step)
+        elif refinement == "golden":
+            frequency = _refine_golden(spectra, rows, lower, upper, freq_step)
+        else:
+            frequency = _refine_parabolic(spectra, rows, lower, center, upper, freq_step)
+
+        amplitude, phase = spectra.at(frequency, rows)
+
+    peaks = SpectralPeaks(
+        order=np.asarray(orders)[rows // channels],
+        channel=rows % channels,
+        frequency=frequency,
+        amplitude=amplitude.astype(dtype),
+        phase=phase.astype(dtype)
+    )
+
+    if monitor is not None:
+        monitor.close()
+
+    if not dense:
+        return peaks, None, None
+
+    evaluated = np.concatenate(spectra.frequencies)
+    evaluated_amplitude = np.concatenate(spectra.amplitudes, axis=1)
+    evaluated, unique = np.unique(evaluated, return_index=True)
+    evaluated_amplitude = evaluated_amplitude[:, unique]
+
+    dense_frequencies = np.arange(fmin, fmax, freq_step)
+    dense_amplitude = np.stack([np.interp(dense_frequencies, evaluated, row) for row in evaluated_amplitude])
+
+    return peaks, dense_frequencies, dense_amplitude.reshape((len(orders),) + channels_shape + (-1,)).astype(dtype)
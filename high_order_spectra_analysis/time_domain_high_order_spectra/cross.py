@@ -0,0 +1,95 @@
+import numpy as np
+from high_order_spectra_analysis.engines.cross import channel_pairs, cross_projections
+from high_order_spectra_analysis.engines.telemetry import Telemetry, start_monitor
+from high_order_spectra_analysis.time_domain_high_order_spectra.tdhos import frequency_grid_of
+
+
+def cross_tdhos(
+    signal: np.ndarray,
+    frequency_sampling: float,
+    pairs: np.ndarray | None = None,
+    order: int = 2,
+    time: np.ndarray | None = None,
+    frequency_array: np.ndarray | None = None,
+    fmin: float | None = None,
+    fmax: float | None = None,
+    freq_step: float = 1e-3,
+    phase_step: float = 1e-3,
+    dtype: np.dtype = np.float64,
+    enable_progress_bar: bool = True,
+    exact_phase: bool = False,
+    max_memory_bytes: int | None = None,
+    telemetry: Telemetry | None = None
+) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Time domain cross high order spectra of channel pairs
+
+    The cross spectrum of the channels (i, j) maximizes mean(x_i * x_j * cos(2*pi*f*t + phi))
+    over the phase, the cross-bispectrum of the pair; a row of three channels (i, j, k)
+    gives the cross-trispectrum mean(x_i * x_j * x_k * cos(2*pi*f*t + phi)), and a
+    repeated channel, as in (i, i), the (non cumulative) auto spectrum of that order.
+    Every pair is reduced against the same basis evaluation, with batched matrix
+    products over blocks of channel products, in memory bounded by max_memory_bytes
+    besides the outputs.
+
+    Args:
+        signal (np.ndarray): Signals with shape (channels, samples).
+        frequency_sampling (float): Frequency sampling of the signals.
+        pairs (np.ndarray | None, optional): Channel indices with shape (pairs, order), one row per product. Defaults to None,
+            every combination of order distinct channels, in the order of channel_pairs.
+        order (int, optional): Channels per product when pairs is None, 2 for the cross-bispectrum and 3 for the
+            cross-trispectrum. Defaults to 2.
+        time (np.ndarray | None, optional): Time array (in case of already available, if nots, it is calculated). Defaults to None.
+        frequency_array (np.ndarray | None, optional): Frequency array (in case of already available, if nots, it is calculated). Defaults to None.
+        fmin (float | None, optional): minimum frequency to generate spectrum. Defaults to None, but the minimum used in this case is of one period.
+        fmax (float | None, optional): maximum frequency to generate spectrum. Defaults, but the maximum used in this case is the Nyquist frequency.
+        freq_step (float, optional): Frequency step to scan. Defaults to 0.001.
+        phase_step (float, optional): Phase step to scan. Defaults to 0.001.
+        dtype (np.dtype, optional): Precision of the products, of the basis evaluation and of the outputs. Defaults to np.float64.
+        exact_phase (bool, optional): Return the exact maximizing phase instead of the closest phase grid value. Defaults to False.
+        max_memory_bytes (int | None, optional): Memory budget of the tiles. Defaults to None, 256 MiB.
+        telemetry (Telemetry | None, optional): Receiver of the progress and of the stage timings. Defaults to None.
+
+    Returns:
+        tuple[np.ndarray, np.ndarray, np.ndarray]: frequency array, amplitude array and phase array, the last two with shape
+            (pairs, frequencies)
+    """
+
+    signal = np.asarray(signal)
+
+    if signal.ndim != 2:
+        raise ValueError(f"Expected signals with shape (channels, samples), got shape {signal.shape}")
+
+    channels, signal_length = signal.shape
+    pairs = channel_pairs(channels, order) if pairs is None else np.atleast_2d(np.asarray(pairs, dtype=np.intp))
+
+    if pairs.size and (pairs.min() < 0 or pairs.max() >= channels):
+        raise ValueError(f"Pairs must index the {channels} channels of the signal")
+
+    monitor = start_monitor(telemetry, enable_progress_bar)
+
+    # The time array stays in float64, a float32 time loses the sample period on long signals
+    if time is None:
+        time = np.arange(0, signal_length/frequency_sampling, 1/frequency_sampling)[0:signal_length]
+
+    frequency_array, _ = frequency_grid_of(signal_length, frequency_sampling, frequency_array, fmin, fmax, freq_step, dtype)
+    phistep = 0.01*2*np.pi if phase_step is None else phase_step
+    phi_array = np.arange(0, 2*np.pi, phistep).astype(dtype)
+
+    if monitor is not None:
+        monitor.end_setup(len(frequency_array), signal_length)
+
+    maxima, phases = cross_projections(
+        signal,
+        pairs,
+        time,
+        frequency_array,
+        dtype=dtype,
+        max_memory_bytes=max_memory_bytes,
+        phi_array=None if exact_phase else phi_array,
+        monitor=monitor
+    )
+
+    if monitor is not None:
+        monitor.close()
+
+    return frequency_array, maxima, phases
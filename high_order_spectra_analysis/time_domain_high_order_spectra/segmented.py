@@ -0,0 +1,223 @@
+import numpy as np
+from high_order_spectra_analysis.engines.analytic import maximize_phase
+from high_order_spectra_analysis.engines.cache import BasisCache
+from high_order_spectra_analysis.engines.dispatch import check_engine, projections
+from high_order_spectra_analysis.engines.telemetry import Telemetry, start_monitor
+from high_order_spectra_analysis.time_domain_high_order_spectra.tdhos import required_orders
+
+
+def segment_view(
+    signal: np.ndarray,
+    segment_length: int,
+    overlap: int | None = None
+) -> tuple[np.ndarray, np.ndarray]:
+    """Overlapping segments of a signal along its time (last) axis, as a strided view sharing its memory
+
+    Args:
+        signal (np.ndarray): Signal, with shape (samples,) or (channels, samples).
+        segment_length (int): Samples per segment.
+        overlap (int | None, optional): Samples shared by consecutive segments. Defaults to None, half of segment_length.
+
+    Returns:
+        tuple[np.ndarray, np.ndarray]: read-only view with shape ([channels,] segments, segment_length), index of the first sample of every segment
+    """
+
+    overlap = segment_length//2 if overlap is None else overlap
+
+    if not 0 < segment_length <= signal.shape[-1]:
+        raise ValueError(f"segment_length must be between 1 and the signal length {signal.shape[-1]}, got {segment_length}")
+
+    if not 0 <= overlap < segment_length:
+        raise ValueError(f"overlap must be between 0 and segment_length - 1, got {overlap}")
+
+    step = segment_length - overlap
+    segments = np.lib.stride_tricks.sliding_window_view(signal, segment_length, axis=-1)[..., ::step, :]
+
+    return segments, step*np.arange(segments.shape[-2])
+
+
+def segment_powers(
+    signal: np.ndarray,
+    segment_length: int,
+    overlap: int | None,
+    orders: tuple[int, ...],
+    dtype: np.dtype | None = None
+) -> tuple[np.ndarray, np.ndarray, int]:
+    """Powers of every segment of a signal, as one strided view over the powers of the whole signal
+
+    The powers are computed once per sample, not once per segment, into a buffer holding
+    every (order, channel) row at a length multiple of the segment step, so that a single
+    sliding window over the buffer yields the segments of every row, one after the other,
+    without copying them. The windows that straddle two rows, ceil(segment_length/step) - 1
+    per row, are padding to be discarded from the projections.
+
+    Args:
+        signal (np.ndarray): Signal, with shape (samples,) or (channels, samples).
+        segment_length (int): Samples per segment.
+        overlap (int | None): Samples shared by consecutive segments, None for half of segment_length.
+        orders (tuple[int, ...]): Orders of the powers.
+        dtype (np.dtype | None, optional): Precision of the powers. Defaults to None, the dtype of the signal.
+
+    Returns:
+        tuple[np.ndarray, np.ndarray, int]: read-only view with shape (orders*channels*windows, segment_length), index of
+            the first sample of every segment, and windows per row, the segments then the padding
+    """
+
+    segments, starts = segment_view(signal, segment_length, overlap)
+    step = segment_length - (segment_length//2 if overlap is None else overlap)
+
+    signal = signal.reshape(-1, signal.shape[-1])
+    used = starts[-1] + segment_length
+    windows = -(-used//step)
+    row_length = windows*step
+    rows = len(orders)*len(signal)
+
+    buffer = np.zeros(rows*row_length + segment_length - step, dtype=signal.dtype if dtype is None else dtype)
+    for j, order in enumerate(orders):
+        for channel, samples in enumerate(signal):
+            row = (j*len(signal) + channel)*row_length
+            np.power(samples[:used], order, out=buffer[row:row + used])
+
+    view = np.lib.stride_tricks.sliding_window_view(buffer, segment_length)[::step]
+
+    return view, starts, windows
+
+
+def segmented_tdhos(
+    signal: np.ndarray,
+    frequency_sampling: float,
+    segment_length: int,
+    overlap: int | None = None,
+    frequency_array: np.ndarray | None = None,
+    fmin: float | None = None,
+    fmax: float | None = None,
+    freq_step: float = 1e-3,
+    phase_step: float = 1e-3,
+    dtype: np.dtype = np.float64,
+    engine: str = "auto",
+    exact_phase: bool = False,
+    max_memory_bytes: int | None = None,
+    basis_cache: BasisCache | None = None,
+    n_jobs: int | None = None,
+    chunk_size: int | None = None,
+    orders: tuple[int, ...] = (1, 2, 3, 4),
+    cumulative: bool = True,
+    telemetry: Telemetry | None = None
+) -> tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """Segment-averaged time domain high order spectra, in the manner of Welch's method
+
+    The powers of the signal are computed once, and split into overlapping segments by a
+    strided view (see segment_powers). Every segment is reduced in one batched projection
+    against a single basis over the segment time axis, so the cost of a call grows with
+    the number of segments and not with a per-segment setup. The amplitude is the mean of
+    the per-segment amplitudes, as in Welch's method, so its variance falls with the
+    number of independent segments; the per-segment amplitudes are also returned, with
+    their variance across segments. The per-segment phases refer to different time
+    origins, so the phase is the one of the coherent mean of the projections, every
+    segment referred to the time origin of the signal, and not the phase at which each
+    segment reaches its amplitude.
+
+    Args:
+        signal (np.ndarray): Signal, with shape (samples,) or (channels, samples).
+        frequency_sampling (float): Frequency sampling of the signal.
+        segment_length (int): Samples per segment.
+        overlap (int | None, optional): Samples shared by consecutive segments. Defaults to None, half of segment_length.
+        frequency_array (np.ndarray | None, optional): Frequency array (in case of already available, if nots, it is calculated). Defaults to None.
+        fmin (float | None, optional): minimum frequency to generate spectrum. Defaults to None, but the minimum used in this case is of one segment period.
+        fmax (float | None, optional): maximum frequency to generate spectrum. Defaults, but the maximum used in this case is the Nyquist frequency.
+        freq_step (float, optional): Frequency step to scan. Defaults to 0.001.
+        phase_step (float, optional): Phase step to scan. Defaults to 0.001.
+        dtype (np.dtype, optional): Precision of the powers and of the outputs, and of the basis evaluation of the "blocked",
+            "parallel" and "native" engines; the "analytic", "czt" and "nufft" engines compute in float64. Defaults to np.float64.
+        engine (str, optional): Projection engine, as in tdhos ("scan" is not supported). Defaults to "auto".
+        exact_phase (bool, optional): Return the exact maximizing phase instead of the closest phase grid value. Defaults to False.
+        max_memory_bytes (int | None, optional): Memory budget of a basis tile of the "blocked" engine. Defaults to None, 256 MiB.
+        basis_cache (BasisCache | None, optional): Cache keeping the basis tiles or chirp-z twiddles between calls. Defaults to None.
+        n_jobs (int | None, optional): Number of worker processes of the "parallel" engine, or threads of the "native" one. Defaults to None, one per CPU.
+        chunk_size (int | None, optional): Frequencies per task of the "parallel" engine. Defaults to None, four tasks per worker.
+        orders (tuple[int, ...], optional): Orders to compute. Defaults to (1, 2, 3, 4).
+        cumulative (bool, optional): Multiply the maxima of orders 1..k into the amplitude of order k. Defaults to True.
+        telemetry (Telemetry | None, optional): Receiver of the progress, of the setup, basis, reduction and argmax timings and of
+            the throughput over every segment. Defaults to None, which reports nothing.
+
+    Returns:
+        tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray, np.ndarray]: frequency array, mean of the per-segment
+            amplitudes, phase of the coherent mean projection and variance of the per-segment amplitudes with shape (orders, [channels,] frequencies), and per-segment amplitudes with shape (orders, [channels,] segments, frequencies)
+    """
+
+    check_engine(engine)
+
+    if engine == "scan":
+        raise ValueError("The segment-averaged estimator needs a projection engine, not 'scan'")
+
+    monitor = start_monitor(telemetry)
+
+    signal = np.asarray(signal)
+    channels_shape = signal.shape[:-1]
+
+    time_sampling = 1/frequency_sampling
+
+    fmax = np.floor(frequency_sampling/2)-1 if fmax is None else fmax # Nyquist Frequency
+    fmin = frequency_sampling/segment_length if fmin is None else fmin # Minimun test frequency at least one segment period
+    frequency_grid = (fmin, freq_step) if frequency_array is None else None
+    frequency_array = np.arange(fmin, fmax, freq_step).astype(dtype) if frequency_array is None else frequency_array
+    phi_grid = None if exact_phase else np.arange(0, 2*np.pi, phase_step).astype(dtype)
+
+    powers_orders = required_orders(orders, cumulative)
+    rows = [powers_orders.index(int(order)) for order in orders]
+    powers, starts, windows = segment_powers(signal, segment_length, overlap, powers_orders, dtype)
+
+    if monitor is not None:
+        monitor.end_setup(len(frequency_array), len(starts)*segment_length)
+
+    # Every segment on its own time axis, one row per (order, channel, window)
+    projection = projections(
+        powers,
+        np.arange(segment_length)*time_sampling,
+        frequency_array,
+        engine=engine,
+        time_grid=(0.0, time_sampling),
+        frequency_grid=frequency_grid,
+        dtype=dtype,
+        max_memory_bytes=max_memory_bytes,
+        cache=basis_cache,
+        monitor=monitor,
+        n_jobs=n_jobs,
+        chunk_size=chunk_size
+    )
+    projection = projection.reshape((len(powers_orders),) + channels_shape + (windows, len(frequency_array)))[..., :len(starts), :]
+
+    if monitor is not None:
+        monitor.checkpoint()
+
+    # Welch-style amplitude: the mean of the per-segment amplitudes, whose variance falls with the number of segments
+    maxima, _ = maximize_phase(projection.reshape(-1), phi_array=phi_grid)
+    maxima = maxima.reshape(projection.shape)
+
+    if cumulative:
+        maxima = np.cumprod(maxima, axis=0)
+
+    segment_amplitude = maxima[rows]
+    amplitude = np.mean(segment_amplitude, axis=-2)
+    variance = np.var(segment_amplitude, axis=-2, ddof=1 if len(starts) > 1 else 0)
+
+    # The per-segment phases refer to different time origins and do not average, so the phase is the one of the
+    # coherent mean of the projections, every segment moved back to the time origin of the signal
+    frequencies = np.asarray(frequency_array, dtype=np.float64)
+    rotation = np.exp(2j*np.pi*np.mod(np.outer(starts*time_sampling, frequencies), 1))
+    mean_projection = np.mean(projection[rows]*rotation, axis=-2)
+
+    _, phase = maximize_phase(mean_projection.reshape(-1), phi_array=phi_grid)
+    phase = phase.reshape(mean_projection.shape)
+
+    if monitor is not None:
+        monitor.checkpoint("argmax")
+        monitor.close()
+
+    return (
+        frequency_array,
+        amplitude.astype(dtype),
+        phase.astype(dtype),
+        variance.astype(dtype),
+        segment_amplitude.astype(dtype)
+    )
@@ -0,0 +1,373 @@
+import os
+from concurrent.futures import FIRST_COMPLETED, wait
+from typing import NamedTuple
+
+import numpy as np
+from high_order_spectra_analysis.engines.blocked import DEFAULT_MAX_MEMORY_BYTES
+from high_order_spectra_analysis.engines.dispatch import check_engine
+from high_order_spectra_analysis.engines.parallel import attach_array, get_pool, resolve_jobs, share_array
+from high_order_spectra_analysis.engines.telemetry import Telemetry, start_monitor, timed
+from high_order_spectra_analysis.time_domain_high_order_spectra.cross import cross_tdhos
+from high_order_spectra_analysis.time_domain_high_order_spectra.tdhos import frequency_grid_of, required_orders, tdhos
+
+
+SURROGATE_METHODS = ("phase", "shift")
+
+
+class SurrogateTest(NamedTuple):
+    """Significance of the spectra of a signal against the spectra of its surrogates"""
+
+    frequency_array: np.ndarray
+    # Spectra of the signal, with shape (orders, [channels,] frequencies), or (pairs, frequencies) for cross spectra
+    amplitude: np.ndarray
+    # (1 + surrogates at least as large)/(1 + surrogates), with the shape of amplitude
+    p_value: np.ndarray
+    # Amplitude above which p_value <= alpha, one per alpha, inf when there are too few surrogates for alpha
+    threshold: np.ndarray
+    alphas: np.ndarray
+    # Spectra of every surrogate, with shape (surrogates,) + amplitude.shape, or None
+    null: np.ndarray | None
+    # Seed of the surrogates, which reproduces them when passed again
+    seed: int
+
+
+def surrogate_signals(
+    signal: np.ndarray,
+    indices: range,
+    method: str = "phase",
+    seed: int = 0,
+    min_shift: int | None = None
+) -> np.ndarray:
+    """Surrogates of a signal, each drawn from its own generator seeded with (seed, index)
+
+    A surrogate depends only on the seed and its index, not on which block or worker
+    computes it. "phase" surrogates keep the amplitude of every Fourier coefficient and
+    randomize its phase, the same random phases for every channel, which preserves the
+    power spectra and the linear cross spectra while destroying the phase coupling the
+    high order spectra detect. "shift" surrogates rotate every channel circularly by its
+    own random shift of at least min_shift samples, which destroys the coupling between
+    channels only.
+
+    Args:
+        signal (np.ndarray): Signal, with shape (samples,) or (channels, samples).
+        indices (range): Indices of the surrogates.
+        method (str, optional): "phase" or "shift". Defaults to "phase".
+        seed (int, optional): Seed of the surrogates. Defaults to 0.
+        min_shift (int | None, optional): Smallest shift of the "shift" surrogates. Defaults to None, a tenth of the signal.
+
+    Returns:
+        np.ndarray: surrogates with shape (len(indices),) + signal.shape
+    """
+
+    if method not in SURROGATE_METHODS:
+        raise ValueError(f"Unknown surrogate method '{method}', expected one of {SURROGATE_METHODS}")
+
+    signal = np.asarray(signal, dtype=np.float64)
+    signal_length = signal.shape[-1]
+    surrogates = np.empty((len(indices),) + signal.shape)
+
+    if method == "phase":
+        spectrum = np.fft.rfft(signal, axis=-1)
+        # The zero frequency, and the Nyquist frequency of an even length, stay real
+        last = spectrum.shape[-1] - (1 if signal_length % 2 == 0 else 0)
+
+        for position, index in enumerate(indices):
+            rng = np.random.default_rng([seed, index])
+            rotation = np.ones(spectrum.shape[-1], dtype=np.complex128)
+            rotation[1:last] = np.exp(2j*np.pi*rng.random(last - 1))
+            surrogates[position] = np.fft.irfft(spectrum*rotation, n=signal_length, axis=-1)
+
+    else:
+        min_shift = max(1, signal_length//10) if min_shift is None else min_shift
+        if not 0 < min_shift <= signal_length - min_shift:
+            raise ValueError(f"min_shift must be in [1, samples/2], got {min_shift} for {signal_length} samples")
+
+        channels = signal.reshape(-1, signal_length)
+        for position, index in enumerate(indices):
+            rng = np.random.default_rng([seed, index])
+            shifts = rng.integers(min_shift, signal_length - min_shift + 1, size=len(channels))
+            shifted = surrogates[position].reshape(-1, signal_length)
+            for channel, shift in enumerate(shifts):
+                shifted[channel] = np.roll(channels[channel], shift)
+
+    return surrogates
+
+
+def _surrogate_spectra(
+    signal: np.ndarray,
+    indices: range,
+    options: dict
+) -> np.ndarray:
+    # Spectra of a block of surrogates, evaluated as one batch of channels against a shared basis
+    surrogates = surrogate_signals(signal, indices, options["method"], options["seed"], options["min_shift"])
+
+    if options["pairs"] is None:
+        _, amplitude, _ = tdhos(
+            surrogates,
+            options["frequency_sampling"],
+            frequency_array=options["frequency_array"],
+            phase_step=options["phase_step"],
+            dtype=options["dtype"],
+            enable_progress_bar=False,
+            engine=options["engine"],
+            exact_phase=options["exact_phase"],
+            max_memory_bytes=options["max_memory_bytes"],
+            n_jobs=options["threads"],
+            orders=options["orders"],
+            cumulative=options["cumulative"]
+        )
+        # (orders, surrogates, [channels,] frequencies) to (surrogates, orders, [channels,] frequencies)
+        return np.moveaxis(amplitude, 1, 0)
+
+    channels = signal.shape[0]
+    pairs = options["pairs"]
+    offsets = channels*np.arange(len(indices))
+    _, amplitude, _ = cross_tdhos(
+        surrogates.reshape(-1, signal.shape[-1]),
+        options["frequency_sampling"],
+        pairs=(pairs[None] + offsets[:, None, None]).reshape(-1, pairs.shape[1]),
+        frequency_array=options["frequency_array"],
+        phase_step=options["phase_step"],
+        dtype=options["dtype"],
+        enable_progress_bar=False,
+        exact_phase=options["exact_phase"],
+        max_memory_bytes=options["max_memory_bytes"]
+    )
+
+    return amplitude.reshape(len(indices), len(pairs), -1)
+
+
+def _surrogate_task(
+    signal_description: tuple,
+    indices: range,
+    options: dict
+) -> np.ndarray:
+    signal_block, signal = attach_array(signal_description)
+
+    try:
+        return _surrogate_spectra(signal, indices, options)
+    finally:
+        del signal
+        signal_block.close()
+
+
+def surrogate_test(
+    signal: np.ndarray,
+    frequency_sampling: float,
+    count: int = 1000,
+    method: str = "phase",
+    alphas: tuple[float, ...] = (0.05,),
+    seed: int | None = None,
+    pairs: np.ndarray | None = None,
+    frequency_array: np.ndarray | None = None,
+    fmin: float | None = None,
+    fmax: float | None = None,
+    freq_step: float = 1e-3,
+    phase_step: float = 1e-3,
+    dtype: np.dtype = np.float64,
+    enable_progress_bar: bool = True,
+    engine: str = "auto",
+    exact_phase: bool = False,
+    max_memory_bytes: int | None = None,
+    orders: tuple[int, ...] = (1, 2, 3, 4),
+    cumulative: bool = True,
+    n_jobs: int | None = None,
+    block_size: int | None = None,
+    keep_null: bool = False,
+    min_shift: int | None = None,
+    telemetry: Telemetry | None = None
+) -> SurrogateTest:
+    """Per-frequency significance of the high order spectra of a signal, against the spectra of count surrogates
+
+    The surrogates are generated inside the workers, block_size at a time, and each block
+    is evaluated as one batch of channels against a shared basis, by tdhos, or by
+    cross_tdhos when pairs are given. The blocks run on the persistent process pool with
+    at most two blocks per worker in flight, and their spectra are folded into the
+    counts of the p-values and into the largest values that the thresholds need as they
+    complete, so the memory is bounded by the blocks in flight, plus the null
+    distribution when keep_null is True. The surrogates only depend on the seed, so the
+    result does not depend on block_size or n_jobs.
+
+    Args:
+        signal (np.ndarray): Signal, with shape (samples,) or (channels, samples).
+        frequency_sampling (float): Frequency sampling of the signal.
+        count (int, optional): Number of surrogates. Defaults to 1000.
+        method (str, optional): "phase" for phase randomized surrogates, "shift" for circularly time shifted channels, which
+            only tests the coupling between channels and requires pairs. Defaults to "phase".
+        alphas (tuple[float, ...], optional): Significance levels of the thresholds. Defaults to (0.05,).
+        seed (int | None, optional): Seed of the surrogates. Defaults to None, a fresh seed returned with the result.
+        pairs (np.ndarray | None, optional): Channel indices with shape (pairs, order), to test cross spectra instead of the
+            spectra of every channel. Defaults to None.
+        frequency_array (np.ndarray | None, optional): Frequency array (in case of already available, if nots, it is calculated). Defaults to None.
+        fmin (float | None, optional): minimum frequency to generate spectrum. Defaults to None, but the minimum used in this case is of one period.
+        fmax (float | None, optional): maximum frequency to generate spectrum. Defaults, but the maximum used in this case is the Nyquist frequency.
+        freq_step (float, optional): Frequency step to scan. Defaults to 0.001.
+        phase_step (float, optional): Phase step to scan. Defaults to 0.001.
+        dtype (np.dtype, optional): Precision of the computation and of the null distribution. Defaults to np.float64.
+        engine (str, optional): Engine of the spectra of a block, as in tdhos; "parallel" runs as "blocked" inside the workers,
+            and "native" with the CPUs split between them.
+            Defaults to "auto".
+        exact_phase (bool, optional): Maximize over the exact phase instead of the phase grid. Defaults to False.
+        max_memory_bytes (int | None, optional): Memory budget of the tiles of a block, and of the surrogates of a block when
+            block_size is None. Defaults to None, 256 MiB.
+        orders (tuple[int, ...], optional): Orders to test. Defaults to (1, 2, 3, 4).
+        cumulative (bool, optional): Test the cumulative amplitudes, as returned by tdts and tdqs. Defaults to True.
+        n_jobs (int | None, optional): Number of worker processes, 1 to compute in this process. Defaults to None, one per CPU.
+        block_size (int | None, optional): Surrogates per block. Defaults to None, as many as fit in max_memory_bytes.
+        keep_null (bool, optional): Return the spectra of every surrogate, count times the size of the spectra. Defaults to False.
+        min_shift (int | None, optional): Smallest shift of the "shift" surrogates. Defaults to None, a tenth of the signal.
+        telemetry (Telemetry | None, optional): Receiver of the progress, counted in surrogates. Defaults to None.
+
+    Returns:
+        SurrogateTest: spectra of the signal, p-values, thresholds and null distribution
+    """
+
+    check_engine(engine)
+
+    if method not in SURROGATE_METHODS:
+        raise ValueError(f"Unknown surrogate method '{method}', expected one of {SURROGATE_METHODS}")
+
+    if method == "shift" and pairs is None:
+        raise ValueError("Shifted surrogates keep the spectra of every channel, they only test cross spectra: pass pairs")
+
+    if count < 1:
+        raise ValueError(f"count must be positive, got {count}")
+
+    signal = np.ascontiguousarray(signal, dtype=np.float64)
+    signal_length = signal.shape[-1]
+    seed = int(np.random.SeedSequence().entropy) if seed is None else int(seed)
+    alphas = np.atleast_1d(np.asarray(alphas, dtype=np.float64))
+    pairs = None if pairs is None else np.atleast_2d(np.asarray(pairs, dtype=np.intp))
+
+    frequency_array, _ = frequency_grid_of(signal_length, frequency_sampling, frequency_array, fmin, fmax, freq_step, dtype)
+    n_jobs = resolve_jobs(n_jobs)
+
+    options = {
+        "method": method,
+        "seed": seed,
+        "min_shift": min_shift,
+        "pairs": pairs,
+        "frequency_sampling": frequency_sampling,
+        "frequency_array": frequency_array,
+        "phase_step": phase_step,
+        "dtype": dtype,
+        "engine": "blocked" if engine == "parallel" else engine,
+        "exact_phase": exact_phase,
+        "max_memory_bytes": max_memory_bytes,
+        "orders": tuple(int(order) for order in orders),
+        "cumulative": cumulative,
+        # The CPUs are split between the workers, so the threads of the "native" engine do not multiply with them
+        "threads": None if n_jobs == 1 else max(1, (os.cpu_count() or 1)//n_jobs)
+    }
+
+    monitor = start_monitor(telemetry, enable_progress_bar)
+
+    if pairs is None:
+        _, observed, _ = tdhos(
+            signal,
+            frequency_sampling,
+            frequency_array=frequency_array,
+            phase_step=phase_step,
+            dtype=dtype,
+            enable_progress_bar=False,
+            engine=options["engine"],
+            exact_phase=exact_phase,
+            max_memory_bytes=max_memory_bytes,
+            orders=options["orders"],
+            cumulative=cumulative
+        )
+        # A surrogate holds its float64 copy, then every signal power in dtype
+        surrogate_bytes = signal.size*(8 + len(required_orders(options["orders"], cumulative))*np.dtype(dtype).itemsize)
+    else:
+        _, observed, _ = cross_tdhos(
+            signal,
+            frequency_sampling,
+            pairs=pairs,
+            frequency_array=frequency_array,
+            phase_step=phase_step,
+            dtype=dtype,
+            enable_progress_bar=False,
+            exact_phase=exact_phase,
+            max_memory_bytes=max_memory_bytes
+        )
+        surrogate_bytes = signal.size*(8 + np.dtype(dtype).itemsize)
+
+    if block_size is None:
+        budget = DEFAULT_MAX_MEMORY_BYTES if max_memory_bytes is None else max_memory_bytes
+        block_size = int(min(count, max(1, budget//max(1, surrogate_bytes))))
+
+    if monitor is not None:
+        monitor.end_setup(count, signal_length)
+
+    # p_value <= alpha once at most floor(alpha*(count + 1)) - 1 surrogates reach the amplitude, so the threshold of
+    # alpha is the floor(alpha*(count + 1))-th largest surrogate spectrum
+    ranks = np.floor(alphas*(count + 1)).astype(int)
+    kept = int(min(max(ranks.max(), 0), count))
+
+    exceedances = np.zeros(observed.shape, dtype=np.int64)
+    largest = np.full((kept,) + observed.shape, -np.inf, dtype=dtype)
+    null = np.empty((count,) + observed.shape, dtype=dtype) if keep_null else None
+
+    def fold(indices: range, spectra: np.ndarray) -> None:
+        nonlocal largest
+
+        exceedances[...] += np.sum(spectra >= observed, axis=0)
+
+        if kept:
+            candidates = np.concatenate([largest, spectra.astype(dtype, copy=False)])
+            largest = np.partition(candidates, len(candidates) - kept, axis=0)[-kept:]
+
+        if null is not None:
+            null[indices.start:indices.stop] = spectra
+
+        if monitor is not None:
+            monitor.advance(len(indices))
+
+    blocks = [range(start, min(start + block_size, count)) for start in range(0, count, block_size)]
+
+    if n_jobs == 1:
+        for indices in blocks:
+            with timed(monitor, "reduction"):
+                spectra = _surrogate_spectra(signal, indices, options)
+            fold(indices, spectra)
+
+    else:
+        pool = get_pool(n_jobs)
+        signal_block, signal_description = share_array(signal)
+
+        try:
+            pending = {}
+            remaining = iter(blocks)
+
+            def submit_next() -> None:
+                indices = next(remaining, None)
+                if indices is not None:
+                    pending[pool.submit(_surrogate_task, signal_description, indices, options)] = indices
+
+            for _ in range(2*n_jobs):
+                submit_next()
+
+            while pending:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    indices = pending.pop(future)
+                    fold(indices, future.result())
+                    submit_next()
+
+        finally:
+            signal_block.close()
+            signal_block.unlink()
+
+    largest = -np.sort(-largest, axis=0)
+    threshold = np.full((len(alphas),) + observed.shape, np.inf, dtype=dtype)
+    for position, rank in enumerate(ranks):
+        if 1 <= rank <= count:
+            threshold[position] = largest[rank - 1]
+
+    p_value = (1 + exceedances)/(1 + count)
+
+    if monitor is not None:
+        monitor.checkpoint("argmax")
+        monitor.close()
+
+    return SurrogateTest(frequency_array, observed, p_value, threshold, alphas, null, seed)
@@ -0,0 +1,422 @@
+import hashlib
+from collections.abc import Iterator
+
+import numpy as np
+from high_order_spectra_analysis.engines.analytic import maximize_phase
+from high_order_spectra_analysis.engines.cache import BasisCache, array_key, signal_digest
+from high_order_spectra_analysis.engines.checkpoint import DEFAULT_CHECKPOINT_BLOCK, DEFAULT_CHECKPOINT_INTERVAL, FrequencyCheckpoint
+from high_order_spectra_analysis.engines.dispatch import check_engine, projections, resolve_engine, signal_powers
+from high_order_spectra_analysis.engines.out_of_core import is_out_of_core, open_signal, out_of_core_projections
+from high_order_spectra_analysis.engines.precision import phase_argument
+from high_order_spectra_analysis.engines.telemetry import Telemetry, start_monitor
+
+
+def required_orders(
+    orders: tuple[int, ...],
+    cumulative: bool = True
+) -> tuple[int, ...]:
+    """Signal powers needed to compute the requested orders
+
+    Args:
+        orders (tuple[int, ...]): Requested orders.
+        cumulative (bool, optional): Whether the amplitude of order k is the product of the maxima of orders 1..k. Defaults to True.
+
+    Returns:
+        tuple[int, ...]: sorted signal powers to evaluate
+    """
+
+    if len(orders) == 0 or any(int(order) != order or order < 1 for order in orders):
+        raise ValueError(f"Orders must be positive integers, got {orders}")
+
+    return tuple(range(1, max(orders) + 1)) if cumulative else tuple(sorted(set(int(order) for order in orders)))
+
+
+def frequency_grid_of(
+    signal_length: int | None,
+    frequency_sampling: float,
+    frequency_array: np.ndarray | None = None,
+    fmin: float | None = None,
+    fmax: float | None = None,
+    freq_step: float = 1e-3,
+    dtype: np.dtype = np.float64
+) -> tuple[np.ndarray, tuple[float, float] | None]:
+    """Frequency array scanned by tdhos, with the start and step it was generated from
+
+    Args:
+        signal_length (int | None): Number of samples, only needed when fmin is None.
+        frequency_sampling (float): Frequency sampling of the signal.
+        frequency_array (np.ndarray | None, optional): Frequency array, returned as is when given. Defaults to None.
+        fmin (float | None, optional): minimum frequency. Defaults to None, but the minimum used in this case is of one period.
+        fmax (float | None, optional): maximum frequency. Defaults, but the maximum used in this case is the Nyquist frequency.
+        freq_step (float, optional): Frequency step. Defaults to 0.001.
+        dtype (np.dtype, optional): Precision of the generated array. Defaults to np.float64.
+
+    Returns:
+        tuple[np.ndarray, tuple[float, float] | None]: frequency array, (start, step) or None when frequency_array was given
+    """
+
+    if frequency_array is not None:
+        return frequency_array, None
+
+    fmax = np.floor(frequency_sampling/2)-1 if fmax is None else fmax # Nyquist Frequency
+    if fmin is None:
+        phase_len = np.floor(signal_length*1/frequency_sampling)
+        fmin = 1/phase_len # Minimun test frequency at least one period
+
+    fstep = 0.01 if freq_step is None else freq_step
+
+    return np.arange(fmin, fmax, fstep).astype(dtype), (fmin, fstep)
+
+
+def tdhos(
+    signal: np.ndarray,
+    frequency_sampling: float,
+    time: np.ndarray | None = None,
+    frequency_array: np.ndarray | None = None,
+    fmin: float | None = None,
+    fmax: float | None = None,
+    freq_step: float = 1e-3,
+    phase_step: float = 1e-3,
+    dtype: np.dtype = np.float64,
+    enable_progress_bar: bool = True,
+    engine: str = "scan",
+    exact_phase: bool = False,
+    max_memory_bytes: int | None = None,
+    basis_cache: BasisCache | None = None,
+    n_jobs: int | None = None,
+    chunk_size: int | None = None,
+    tolerance: float | None = None,
+    orders: tuple[int, ...] = (1, 2, 3, 4),
+    cumulative: bool = True,
+    block_size: int | None = None,
+    telemetry: Telemetry | None = None,
+    checkpoint: str | None = None,
+    checkpoint_block: int = DEFAULT_CHECKPOINT_BLOCK,
+    checkpoint_interval: float = DEFAULT_CHECKPOINT_INTERVAL
+) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Time domain high order spectra of arbitrary orders
+
+    Computes every requested order in one pass over the frequencies, sharing each
+    evaluation of cos(2*pi*f*t + phi) between the orders. Order k maximizes
+    mean(S^k * cos(2*pi*f*t + phi)) over the phase; with cumulative amplitudes, as
+    returned by tdts and tdqs, its amplitude is the product of the maxima of orders 1..k.
+
+    A signal with shape (channels, samples) is processed as a batch: every channel of
+    every order is reduced against the same basis evaluation.
+
+    A path to a .npy file, a np.memmap or an iterator of chunks is read block by block
+    along the time axis, accumulating the projections of every block, so the recording
+    never has to fit in memory. This requires a projection engine (not "scan").
+
+    With a checkpoint file, the frequencies are computed in blocks of checkpoint_block,
+    and the finished blocks are appended to the file every checkpoint_interval seconds.
+    A call with the same inputs and an existing checkpoint verifies that it was written
+    with the same parameters, then only computes the unfinished blocks; the result is
+    the same as a run without interruption. The checkpoint is kept after the end of the
+    scan, so that a repeated call returns without computing anything.
+
+    Args:
+        signal (np.ndarray): Signal which the spectra will be calculated, with shape (samples,) or (channels, samples). Can also be
+            a path to a .npy file, a np.memmap or an iterator of chunks, which are processed out of core.
+        frequency_sampling (float): Frequency sampling of the signal.
+        time (np.ndarray | None, optional): Time array (in case of already available, if nots, it is calculated). Defaults to None.
+        frequency_array (np.ndarray | None, optional): Frequency array (in case of already available, if nots, it is calculated). Defaults to None.
+        fmin (float | None, optional): minimum frequency to generate spectrum. Defaults to None, but the minimum used in this case is of one period.
+        fmax (float | None, optional): maximum frequency to generate spectrum. Defaults, but the maximum used in this case is the Nyquist frequency.
+        freq_step (float, optional): Frequency step to scan. Defaults to 0.001.
+        phase_step (float, optional): Phase step to scan. Defaults to 0.001.
+        dtype (np.dtype, optional): Precision of the signal, of its powers and of the outputs, and of the basis evaluation of the
+            "scan", "blocked", "parallel" and "native" engines, which reduce the phase argument modulo one turn in float64 first.
+            The "analytic", "czt" and "nufft" engines evaluate the basis and accumulate in float64. Defaults to np.float64.
+        engine (str, optional): "scan" evaluates every phase of phi_array, "analytic" maximizes over the phase in closed form,
+            "czt" does the same with chirp-z projections on uniform frequency grids, "blocked" with
+            matrix products over tiles of frequencies, "parallel" with a pool of worker processes and "native" with the
+            compiled OpenMP kernel, "nufft" with a type-3 non-uniform FFT for any time array. "auto" uses "nufft" when the time
+            array is not a uniform grid, otherwise "native" when it is built and "blocked". Defaults to "scan".
+        exact_phase (bool, optional): Return the exact maximizing phase instead of the closest phi_array value (not used by the "scan" engine). Defaults to False.
+        max_memory_bytes (int | None, optional): Memory budget of a basis tile of the "blocked" engine. Defaults to None, 256 MiB.
+        basis_cache (BasisCache | None, optional): Cache keeping the basis tiles or chirp-z twiddles between calls. Defaults to None.
+        n_jobs (int | None, optional): Number of worker processes of the "parallel" engine, or threads of the "native" one. Defaults to None, one per CPU.
+        chunk_size (int | None, optional): Frequencies per task of the "parallel" engine. Defaults to None, four tasks per worker.
+        tolerance (float | None, optional): Error of the "nufft" engine, relative to the mean absolute value of the signal powers.
+            Defaults to None, 1e-10.
+        orders (tuple[int, ...], optional): Orders to compute, 1 for the spectrum, 2 for the bispectrum and so on. Defaults to (1, 2, 3, 4).
+        cumulative (bool, optional): Multiply the maxima of orders 1..k into the amplitude of order k, which requires evaluating
+            every lower order. Otherwise only the requested signal powers are evaluated. Defaults to True.
+        block_size (int | None, optional): Process the signal out of core, in blocks of this number of samples. Defaults to None,
+            which loads in-memory arrays whole and reads the other signals in blocks of 2**20 samples.
+        telemetry (Telemetry | None, optional): Receiver of the progress, of the setup, basis, reduction and argmax timings and of
+            the throughput. Defaults to None, which reports nothing, or draws a progress bar when enable_progress_bar is True.
+        checkpoint (str | None, optional): Checkpoint file of the finished frequency blocks, created if needed. Not supported with
+            an iterator of chunks. Defaults to None, no checkpoint.
+        checkpoint_block (int, optional): Frequencies per checkpointed block. Defaults to DEFAULT_CHECKPOINT_BLOCK.
+        checkpoint_interval (float, optional): Seconds between writes of the checkpoint. Defaults to DEFAULT_CHECKPOINT_INTERVAL.
+
+    Returns:
+        tuple[np.ndarray, np.ndarray, np.ndarray]: frequency array, amplitude array and phase array, the last two with shape
+            (orders, frequencies), or (orders, channels, frequencies) for a batch of signals
+    """
+
+    check_engine(engine)
+
+    if checkpoint is not None:
+        return _checkpointed_tdhos(
+            signal,
+            frequency_sampling,
+            checkpoint,
+            checkpoint_block,
+            checkpoint_interval,
+            time=time,
+            frequency_array=frequency_array,
+            fmin=fmin,
+            fmax=fmax,
+            freq_step=freq_step,
+            phase_step=phase_step,
+            dtype=dtype,
+            enable_progress_bar=enable_progress_bar,
+            engine=engine,
+            exact_phase=exact_phase,
+            orders=orders,
+            cumulative=cumulative,
+            telemetry=telemetry,
+            max_memory_bytes=max_memory_bytes,
+            basis_cache=basis_cache,
+            n_jobs=n_jobs,
+            chunk_size=chunk_size,
+            tolerance=tolerance,
+            block_size=block_size
+        )
+
+    monitor = start_monitor(telemetry, enable_progress_bar)
+
+    powers_orders = required_orders(orders, cumulative)
+
+    out_of_core = block_size is not None or is_out_of_core(signal)
+
+    if out_of_core:
+        signal = open_signal(signal)
+        signal_length = None if isinstance(signal, Iterator) else signal.shape[-1]
+
+        if signal_length is None and fmin is None and frequency_array is None:
+            raise ValueError("fmin or frequency_array must be given when the signal is an iterator of chunks")
+
+    else:
+        signal = np.asarray(signal)
+        channels_shape = signal.shape[:-1]
+        signal_length = signal.shape[-1]
+
+        time_sampling = 1/frequency_sampling
+        time_end = signal_length*time_sampling
+
+        time_grid = (0.0, time_sampling) if time is None else None
+
+        # The time array stays in float64, a float32 time loses the sample period on long signals
+        if time is None:
+            time = np.arange(0, time_end, time_sampling)[0:signal_length]
+
+    frequency_array, frequency_grid = frequency_grid_of(
+        signal_length, frequency_sampling, frequency_array, fmin, fmax, freq_step, dtype
+    )
+    phistep = 0.01*2*np.pi if phase_step is None else phase_step
+    phi_array = np.arange(0, 2*np.pi, phistep).astype(dtype)
+
+    if monitor is not None:
+        monitor.end_setup(len(frequency_array), signal_length)
+
+    if out_of_core:
+        projection, signal_length, channels_shape = out_of_core_projections(
+            signal,
+            frequency_sampling,
+            frequency_array,
+            powers_orders,
+            time=time,
+            block_size=block_size,
+            engine=engine,
+            frequency_grid=frequency_grid,
+            monitor=monitor,
+            dtype=dtype,
+            max_memory_bytes=max_memory_bytes,
+            cache=basis_cache,
+            n_jobs=n_jobs,
+            chunk_size=chunk_size,
+            tolerance=tolerance
+        )
+
+    elif engine != "scan":
+        projection = projections(
+            signal_powers(signal, powers_orders, dtype),
+            time,
+            frequency_array,
+            engine=engine,
+            monitor=monitor,
+            time_grid=time_grid,
+            frequency_grid=frequency_grid,
+            dtype=dtype,
+            max_memory_bytes=max_memory_bytes,
+            cache=basis_cache,
+            n_jobs=n_jobs,
+            chunk_size=chunk_size,
+            tolerance=tolerance
+        )
+
+    if engine != "scan":
+        if monitor is not None:
+            monitor.checkpoint()
+
+        phi_grid = None if exact_phase else phi_array
+
+        maxima, phases = maximize_phase(projection.reshape(-1), phi_array=phi_grid)
+        maxima = maxima.reshape(projection.shape)
+        phases = phases.reshape(projection.shape)
+
+    else:
+        powers = signal_powers(signal, powers_orders, dtype)
+
+        maxima = np.full((powers.shape[0], len(frequency_array)), -np.inf)
+        phases = np.full((powers.shape[0], len(frequency_array)), -1.0)
+
+        for i, freq in enumerate(frequency_array):
+
+            argument = phase_argument(freq, time, dtype)
+
+            for phi in phi_array:
+
+                P = np.cos(argument + phi)
+
+                # evaluated[k] = mean(S^kP), for every order at once
+                evaluated = np.mean(powers * P, axis=1)
+
+                update_max = evaluated > maxima[:, i]
+                maxima[update_max, i] = evaluated[update_max]
+                phases[update_max, i] = phi
+
+            if monitor is not None:
+                monitor.advance()
+
+    maxima = maxima.reshape((len(powers_orders),) + channels_shape + (len(frequency_array),))
+    phases = phases.reshape((len(powers_orders),) + channels_shape + (len(frequency_array),))
+
+    if cumulative:
+        maxima = np.cumprod(maxima, axis=0)
+
+    rows = [powers_orders.index(int(order)) for order in orders]
+
+    if monitor is not None:
+        # The scan evaluates the basis and takes the maxima inside the reduction loop
+        monitor.checkpoint("argmax" if engine != "scan" else "reduction")
+        monitor.close()
+
+    return frequency_array, maxima[rows].astype(dtype), phases[rows].astype(dtype)
+
+
+def _checkpointed_tdhos(
+    signal: np.ndarray,
+    frequency_sampling: float,
+    checkpoint: str,
+    checkpoint_block: int,
+    checkpoint_interval: float,
+    time: np.ndarray | None,
+    frequency_array: np.ndarray | None,
+    fmin: float | None,
+    fmax: float | None,
+    freq_step: float,
+    phase_step: float,
+    dtype: np.dtype,
+    enable_progress_bar: bool,
+    engine: str,
+    exact_phase: bool,
+    orders: tuple[int, ...],
+    cumulative: bool,
+    telemetry: Telemetry | None,
+    **options
+) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    # tdhos over blocks of frequencies, resuming from and appending to a checkpoint file
+
+    signal = open_signal(signal) if is_out_of_core(signal) else np.asarray(signal)
+
+    if isinstance(signal, Iterator):
+        raise ValueError("A checkpointed scan reads the signal once per frequency block, which an iterator of chunks cannot do")
+
+    monitor = start_monitor(telemetry, enable_progress_bar)
+
+    powers_orders = required_orders(orders, cumulative)
+    channels_shape = signal.shape[:-1]
+    signal_length = signal.shape[-1]
+    rows = len(powers_orders)*int(np.prod(channels_shape, dtype=np.int64))
+
+    frequency_array, _ = frequency_grid_of(signal_length, frequency_sampling, frequency_array, fmin, fmax, freq_step, dtype)
+
+    parameters = (
+        signal_digest(signal),
+        float(frequency_sampling),
+        None if time is None else signal_digest(np.asarray(time)),
+        array_key(np.asarray(frequency_array)),
+        None if phase_step is None else float(phase_step),
+        np.dtype(dtype).str,
+        resolve_engine(engine),
+        bool(exact_phase),
+        powers_orders,
+        options.get("tolerance")
+    )
+    store = FrequencyCheckpoint(
+        checkpoint,
+        hashlib.blake2b(repr(parameters).encode(), digest_size=16).hexdigest(),
+        rows,
+        len(frequency_array),
+        block_size=checkpoint_block,
+        interval=checkpoint_interval
+    )
+    finished = store.load()
+
+    if monitor is not None:
+        monitor.end_setup(len(frequency_array), signal_length)
+
+    maxima = np.empty((rows, len(frequency_array)))
+    phases = np.empty((rows, len(frequency_array)))
+
+    for index in range(store.blocks):
+        block = store.block_slice(index)
+
+        if index in finished:
+            block_maxima, block_phases = finished[index]
+        else:
+            # The raw maxima of every power, so that the blocks do not depend on cumulative
+            _, block_maxima, block_phases = tdhos(
+                signal,
+                frequency_sampling,
+                time=time,
+                frequency_array=frequency_array[block],
+                phase_step=phase_step,
+                dtype=dtype,
+                enable_progress_bar=False,
+                engine=engine,
+                exact_phase=exact_phase,
+                orders=powers_orders,
+                cumulative=False,
+                **options
+            )
+            block_maxima = block_maxima.reshape(rows, -1)
+            block_phases = block_phases.reshape(rows, -1)
+            store.append(index, block_maxima, block_phases)
+
+        maxima[:, block] = block_maxima
+        phases[:, block] = block_phases
+
+        if monitor is not None:
+            monitor.advance(block.stop - block.start)
+
+    store.flush()
+
+    maxima = maxima.reshape((len(powers_orders),) + channels_shape + (len(frequency_array),))
+    phases = phases.reshape((len(powers_orders),) + channels_shape + (len(frequency_array),))
+
+    if cumulative:
+        maxima = np.cumprod(maxima, axis=0)
+
+    rows = [powers_orders.index(int(order)) for order in orders]
+
+    if monitor is not None:
+        monitor.checkpoint("reduction")
+        monitor.close()
+
+    return frequency_array, maxima[rows].astype(dtype), phases[rows].astype(dtype)
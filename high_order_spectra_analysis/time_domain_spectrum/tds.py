@@ -1,15 +1,30 @@
 import numpy as np
-import progressbar
+from high_order_spectra_analysis.engines.analytic import maximize_phase
+from high_order_spectra_analysis.engines.cache import BasisCache
+from high_order_spectra_analysis.engines.dispatch import check_engine, projections
+from high_order_spectra_analysis.engines.precision import phase_argument
+from high_order_spectra_analysis.engines.telemetry import Telemetry, start_monitor, timed
 
 
 def tds(
     signal: np.ndarray, 
     frequency_sampling: float, 
     time: np.ndarray | None = None,
+    frequency_array: np.ndarray | None = None,
     fmin: float | None = None,
     fmax: float | None = None,
     freq_step: float = 1e-3,
-    phase_step: float = 1e-3
+    phase_step: float = 1e-3,
+    dtype: np.dtype = np.float64,
+    enable_progress_bar: bool = True,
+    engine: str = "scan",
+    exact_phase: bool = False,
+    max_memory_bytes: int | None = None,
+    basis_cache: BasisCache | None = None,
+    n_jobs: int | None = None,
+    chunk_size: int | None = None,
+    tolerance: float | None = None,
+    telemetry: Telemetry | None = None
 ) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
     """Time domain spectrum
 
@@ -17,18 +32,45 @@ def tds(
         signal (np.ndarray): Signal which the spectrum will be calculated.
         frequency_sampling (float): Frequency sampling of the signal.
         time (np.ndarray | None, optional): Time array (in case of already available, if nots, it is calculated). Defaults to None.
+        frequency_array (np.ndarray | None, optional): Frequency array (in case of already available, if nots, it is calculated). Defaults to None.
         fmin (float | None, optional): minimum frequency to generate spectrum. Defaults to None, but the minimum used in this case is of one period.
         fmax (float | None, optional): maximum frequency to generate spectrum. Defaults, but the maximum used in this case is the Nyquist frequency.
         freq_step (float, optional): Frequency step to scan. Defaults to 0.001.
         phase_step (float, optional): Phase step to scan. Defaults to 0.001.
+        dtype (np.dtype, optional): Precision of the signal, of its powers and of the outputs, and of the basis evaluation of the
+            "scan", "blocked", "parallel" and "native" engines, which reduce the phase argument modulo one turn in float64 first.
+            The "analytic", "czt" and "nufft" engines evaluate the basis and accumulate in float64. Defaults to np.float64.
+        engine (str, optional): "scan" evaluates every phase of phi_array, "analytic" maximizes over the phase in closed form,
+            "czt" does the same with chirp-z projections on uniform frequency grids, "blocked" with
+            matrix products over tiles of frequencies, "parallel" with a pool of worker processes and "native" with the
+            compiled OpenMP kernel, "nufft" with a type-3 non-uniform FFT for any time array. "auto" uses "nufft" when the time
+            array is not a uniform grid, otherwise "native" when it is built and "blocked". Defaults to "scan".
+        exact_phase (bool, optional): Return the exact maximizing phase instead of the closest phi_array value (not used by the "scan" engine). Defaults to False.
+        max_memory_bytes (int | None, optional): Memory budget of a basis tile of the "blocked" engine. Defaults to None, 256 MiB.
+        basis_cache (BasisCache | None, optional): Cache keeping the basis tiles or chirp-z twiddles between calls. Defaults to None.
+        n_jobs (int | None, optional): Number of worker processes of the "parallel" engine, or threads of the "native" one. Defaults to None, one per CPU.
+        chunk_size (int | None, optional): Frequencies per task of the "parallel" engine. Defaults to None, four tasks per worker.
+        tolerance (float | None, optional): Error of the "nufft" engine, relative to the mean absolute value of the signal powers.
+            Defaults to None, 1e-10.
+        telemetry (Telemetry | None, optional): Receiver of the progress, of the setup, basis, reduction and argmax timings and of
+            the throughput. Defaults to None, which reports nothing, or draws a progress bar when enable_progress_bar is True.
 
     Returns:
         tuple[np.ndarray, np.ndarray, np.ndarray]: frequency array, amplitude array, phase array
     """
 
+    check_engine(engine)
+
+    monitor = start_monitor(telemetry, enable_progress_bar)
+
+    signal = np.asarray(signal, dtype=dtype)
+
     time_sampling = 1/frequency_sampling
     time_end = len(signal)*time_sampling
 
+    time_grid = (0.0, time_sampling) if time is None else None
+
+    # The time array stays in float64, a float32 time loses the sample period on long signals
     if time is None:
         time = np.arange(0, time_end, time_sampling)[0:len(signal)]
 
@@ -39,23 +81,71 @@ def tds(
     fstep = 0.01 if freq_step is None else freq_step
     phistep = 0.01*2*np.pi if phase_step is None else phase_step
 
-    frequency_array = np.arange(fmin, fmax, fstep)
-    phi = np.arange(0, 2*np.pi, phistep)
+    frequency_grid = (fmin, fstep) if frequency_array is None else None
+    frequency_array = np.arange(fmin, fmax, fstep).astype(dtype) if frequency_array is None else frequency_array
+    phi = np.arange(0, 2*np.pi, phistep).astype(dtype)
 
-    amplitude = np.zeros(len(frequency_array))
-    phase = np.zeros(len(frequency_array))
+    if monitor is not None:
+        monitor.end_setup(len(frequency_array), len(signal))
 
-    s_squared = np.power(signal, 2)
-    mean_s_squared = np.mean(s_squared)
-    
+    if engine != "scan":
+        # mean((S + cos(2*pi*f*t + phi))^2) - mean(S^2) - 0.5
+        #   = 2*Re(Z_S(f)*exp(1j*phi)) + Re(Z_1(2f)*exp(2j*phi))/2
+        signal_projection = projections(
+            signal,
+            time,
+            frequency_array,
+            engine=engine,
+            monitor=monitor,
+            time_grid=time_grid,
+            frequency_grid=frequency_grid,
+            dtype=dtype,
+            max_memory_bytes=max_memory_bytes,
+            cache=basis_cache,
+            n_jobs=n_jobs,
+            chunk_size=chunk_size,
+            tolerance=tolerance
+        )
+        # The projection of a constant is a property of the basis alone
+        with timed(monitor, "basis"):
+            basis_projection = projections(
+                np.ones((1, len(signal)), dtype=dtype),
+                time,
+                2*np.asarray(frequency_array, dtype=np.float64),
+                engine=engine,
+                time_grid=time_grid,
+                frequency_grid=None if frequency_grid is None else (2*fmin, 2*fstep),
+                dtype=dtype,
+                max_memory_bytes=max_memory_bytes,
+                cache=basis_cache,
+                n_jobs=n_jobs,
+                chunk_size=chunk_size,
+                tolerance=tolerance
+            )
 
-    bar = progressbar.ProgressBar(max_value=len(frequency_array)*len(phi))
+        if monitor is not None:
+            monitor.checkpoint()
 
-    counter = 0
-    step_counter = len(phi)
+        amplitude, phase = maximize_phase(
+            2*signal_projection[0],
+            basis_projection[0]/2,
+            phi_array=None if exact_phase else phi
+        )
+
+        if monitor is not None:
+            monitor.checkpoint("argmax")
+            monitor.close()
+
+        return frequency_array, amplitude.astype(dtype), phase.astype(dtype)
+
+    amplitude = np.zeros(len(frequency_array)).astype(dtype)
+    phase = np.zeros(len(frequency_array)).astype(dtype)
 
-    def f(phi, f, time, signal, mean_s_squared): 
-        x = signal + np.cos(2*np.pi*f*time + phi)
+    s_squared = np.power(signal, 2)
+    mean_s_squared = np.mean(s_squared)
+
+    def f(phi, argument, signal, mean_s_squared): 
+        x = signal + np.cos(argument + phi)
         x = np.power(x, 2)
         x = np.mean(x)
         x = x - mean_s_squared
@@ -64,23 +154,27 @@ def tds(
 
     f_vectorized = np.vectorize(
         f,
-        excluded=['f', 'time', 'signal', 'mean_s_squared']
+        excluded=['argument', 'signal', 'mean_s_squared']
     )
 
     for i in range(len(frequency_array)):
         f_evaluated = f_vectorized(
             phi=phi,
-            f=frequency_array[i],
-            time=time,
+            argument=phase_argument(frequency_array[i], time, dtype),
             signal=signal,
             mean_s_squared=mean_s_squared
         )
-        counter += step_counter
-        bar.update(counter)
+        if monitor is not None:
+            monitor.advance()
             
         maximum_amplitude = np.max(f_evaluated)
         index_max = np.argwhere(f_evaluated == maximum_amplitude).reshape(-1)[0]
         amplitude[i] = maximum_amplitude
         phase[i] = phi[index_max]
+
+    if monitor is not None:
+        # The scan evaluates the basis and takes the maxima inside the reduction loop
+        monitor.checkpoint("reduction")
+        monitor.close()
         
     return frequency_array, amplitude, phase
@@ -1,26 +1,26 @@
 import numpy as np
-import progressbar
-from pathos.multiprocessing import ProcessingPool as Pool
+from high_order_spectra_analysis.engines.telemetry import Telemetry
+from high_order_spectra_analysis.time_domain_spectrum.tds import tds as tds_serial
 
 
-def f(phi, freq, time, signal, mean_s_squared): 
-    x = signal + np.cos(2*np.pi*freq*time + phi)
-    x = np.power(x, 2)
-    x = np.mean(x)
-    x = x - mean_s_squared
-    x = x - 0.5
-    return x
-
 def tds(
-    signal: np.ndarray, 
-    frequency_sampling: float, 
+    signal: np.ndarray,
+    frequency_sampling: float,
     time: np.ndarray | None = None,
     fmin: float | None = None,
     fmax: float | None = None,
     freq_step: float = 1e-3,
-    phase_step: float = 1e-3
+    phase_step: float = 1e-3,
+    n_jobs: int | None = None,
+    chunk_size: int | None = None,
+    telemetry: Telemetry | None = None
 ) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
-    """Time domain spectrum
+    """Time domain spectrum, computed by a persistent pool of worker processes
+
+    Runs tds with the "parallel" engine: the signal is placed once in shared memory and
+    the workers split the frequency array in contiguous chunks, instead of opening a new
+    pool and pickling the signal for every (frequency, phase) pair. The phases are taken
+    from the same phase grid as the serial scan.
 
     Args:
         signal (np.ndarray): Signal which the spectrum will be calculated.
@@ -30,51 +30,25 @@ def tds(
         fmax (float | None, optional): maximum frequency to generate spectrum. Defaults, but the maximum used in this case is the Nyquist frequency.
         freq_step (float, optional): Frequency step to scan. Defaults to 0.001.
         phase_step (float, optional): Phase step to scan. Defaults to 0.001.
+        n_jobs (int | None, optional): Number of worker processes. Defaults to None, one per CPU.
+        chunk_size (int | None, optional): Frequencies per task. Defaults to None, four tasks per worker.
+        telemetry (Telemetry | None, optional): Receiver of the progress, stage timings and throughput. Defaults to None, which reports nothing.
 
     Returns:
         tuple[np.ndarray, np.ndarray, np.ndarray]: frequency array, amplitude array, phase array
     """
 
-    time_sampling = 1/frequency_sampling
-    time_end = len(signal)*time_sampling
-
-    if time is None:
-        time = np.arange(0, time_end, time_sampling)[0:len(signal)]
-
-    fmax = np.floor(frequency_sampling/2)-1 if fmax is None else fmax # Nyquist Frequency
-    phase_len = np.floor(len(signal)*1/frequency_sampling)
-    fmin = 1/phase_len if fmin is None else fmin # Minimun test frequency at least one period 
-    
-    fstep = 0.01 if freq_step is None else freq_step
-    phistep = 0.01*2*np.pi if phase_step is None else phase_step
-
-    frequency_array = np.arange(fmin, fmax, fstep)
-    phi = np.arange(0, 2*np.pi, phistep)
-
-    amplitude = np.zeros(len(frequency_array))
-    phase = np.zeros(len(frequency_array))
-    aux = np.zeros(len(phi))
-
-    s_squared = np.power(signal, 2)
-    mean_s_squared = np.mean(s_squared)
-
-
-    bar = progressbar.ProgressBar(max_value=len(frequency_array)*len(phi))
-
-    counter = 0
-    step_counter = len(phi)
-
-    
-    for i, freq in enumerate(frequency_array):
-
-        with Pool() as pool:
-            f_evaluated = pool.map(lambda x: f(x, freq, time, signal, mean_s_squared), phi)
-        counter += step_counter
-        bar.update(counter)
-            
-        maximum_amplitude = np.max(f_evaluated)
-        index_max = np.argwhere(f_evaluated == maximum_amplitude).reshape(-1)[0]
-        amplitude[i] = maximum_amplitude
-        phase[i] = phi[index_max]
-        
-    return frequency_array, amplitude, phase
+    return tds_serial(
+        signal,
+        frequency_sampling,
+        time=time,
+        fmin=fmin,
+        fmax=fmax,
+        freq_step=freq_step,
+        phase_step=phase_step,
+        enable_progress_bar=False,
+        engine="parallel",
+        n_jobs=n_jobs,
+        chunk_size=chunk_size,
+        telemetry=telemetry
+    )
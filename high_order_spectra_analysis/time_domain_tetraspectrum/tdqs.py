@@ -1,5 +1,8 @@
 import numpy as np
-import progressbar
+from high_order_spectra_analysis.engines.cache import BasisCache
+from high_order_spectra_analysis.engines.checkpoint import DEFAULT_CHECKPOINT_BLOCK, DEFAULT_CHECKPOINT_INTERVAL
+from high_order_spectra_analysis.engines.telemetry import Telemetry
+from high_order_spectra_analysis.time_domain_high_order_spectra.tdhos import tdhos
 
 
 def tdqs(
@@ -12,7 +15,19 @@ def tdqs(
     freq_step: float = 1e-3,
     phase_step: float = 1e-3,
     dtype: np.dtype = np.float64,
-    enable_progress_bar: bool = True
+    enable_progress_bar: bool = True,
+    engine: str = "scan",
+    exact_phase: bool = False,
+    max_memory_bytes: int | None = None,
+    basis_cache: BasisCache | None = None,
+    n_jobs: int | None = None,
+    chunk_size: int | None = None,
+    tolerance: float | None = None,
+    block_size: int | None = None,
+    telemetry: Telemetry | None = None,
+    checkpoint: str | None = None,
+    checkpoint_block: int = DEFAULT_CHECKPOINT_BLOCK,
+    checkpoint_interval: float = DEFAULT_CHECKPOINT_INTERVAL
 ) -> tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray, np.ndarray, np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
     """Time domain tetraspectrum
 
@@ -25,131 +40,63 @@ def tdqs(
         fmax (float | None, optional): maximum frequency to generate spectrum. Defaults, but the maximum used in this case is the Nyquist frequency.
         freq_step (float, optional): Frequency step to scan. Defaults to 0.001.
         phase_step (float, optional): Phase step to scan. Defaults to 0.001.
+        engine (str, optional): "scan" evaluates every phase of phi_array, "analytic" maximizes over the phase in closed form,
+            "czt" does the same with chirp-z projections on uniform frequency grids, "blocked" with
+            matrix products over tiles of frequencies, "parallel" with a pool of worker processes and "native" with the
+            compiled OpenMP kernel, "nufft" with a type-3 non-uniform FFT for any time array. "auto" uses "nufft" when the time
+            array is not a uniform grid, otherwise "native" when it is built and "blocked". Defaults to "scan".
+        exact_phase (bool, optional): Return the exact maximizing phase instead of the closest phi_array value (not used by the "scan" engine). Defaults to False.
+        max_memory_bytes (int | None, optional): Memory budget of a basis tile of the "blocked" engine. Defaults to None, 256 MiB.
+        basis_cache (BasisCache | None, optional): Cache keeping the basis tiles or chirp-z twiddles between calls. Defaults to None.
+        n_jobs (int | None, optional): Number of worker processes of the "parallel" engine, or threads of the "native" one. Defaults to None, one per CPU.
+        chunk_size (int | None, optional): Frequencies per task of the "parallel" engine. Defaults to None, four tasks per worker.
+        tolerance (float | None, optional): Error of the "nufft" engine, relative to the mean absolute value of the signal powers.
+            Defaults to None, 1e-10.
+        block_size (int | None, optional): Process the signal out of core, in blocks of this number of samples (see tdhos). Defaults to None.
+        telemetry (Telemetry | None, optional): Receiver of the progress, of the setup, basis, reduction and argmax timings and of
+            the throughput. Defaults to None, which reports nothing, or draws a progress bar when enable_progress_bar is True.
+        checkpoint (str | None, optional): Checkpoint file of the finished frequency blocks, resumed when it exists (see tdhos). Defaults to None.
+        checkpoint_block (int, optional): Frequencies per checkpointed block. Defaults to DEFAULT_CHECKPOINT_BLOCK.
+        checkpoint_interval (float, optional): Seconds between writes of the checkpoint. Defaults to DEFAULT_CHECKPOINT_INTERVAL.
 
     Returns:
         tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray, np.ndarray, np.ndarray, np.ndarray, np.ndarray, np.ndarray]: frequency array, amplitude array, phase array
     """
 
-    time_sampling = 1/frequency_sampling
-    time_end = len(signal)*time_sampling
-
-    if time is None:
-        time = np.arange(0, time_end, time_sampling)[0:len(signal)].astype(dtype)
-
-    fmax = np.floor(frequency_sampling/2)-1 if fmax is None else fmax # Nyquist Frequency
-    phase_len = np.floor(len(signal)*1/frequency_sampling)
-    fmin = 1/phase_len if fmin is None else fmin # Minimun test frequency at least one period 
-    
-    fstep = 0.01 if freq_step is None else freq_step
-    phistep = 0.01*2*np.pi if phase_step is None else phase_step
-
-    frequency_array = np.arange(fmin, fmax, fstep).astype(dtype) if frequency_array is None else frequency_array
-    phi_array = np.arange(0, 2*np.pi, phistep).astype(dtype)
-
-    spectrum = np.zeros(len(frequency_array)).astype(dtype)
-    bispectrum = np.zeros(len(frequency_array)).astype(dtype)
-    trispectrum = np.zeros(len(frequency_array)).astype(dtype)
-    tetraspectrum = np.zeros(len(frequency_array)).astype(dtype)
-
-    phase_spectrum = np.zeros(len(frequency_array)).astype(dtype)
-    phase_bispectrum = np.zeros(len(frequency_array)).astype(dtype)
-    phase_trispectrum = np.zeros(len(frequency_array)).astype(dtype)
-    phase_tetraspectrum = np.zeros(len(frequency_array)).astype(dtype)
-
-    squared_signal = np.power(signal, 2)
-    cubed_signal = np.power(signal, 3)
-    tetra_signal = np.power(signal, 4)
-
-    x = np.zeros(len(frequency_array)).astype(dtype)
-
-    if enable_progress_bar:
-        bar = progressbar.ProgressBar(max_value=len(frequency_array)*len(phi_array))
-        counter_step = len(phi_array)
-
-        counter = 0
-
-    for i, freq in enumerate(frequency_array):
-
-        max_amplitude_spectrum: dtype = dtype('-inf')
-        max_amplitude_bispectrum: dtype = dtype('-inf')
-        max_amplitude_trispectrum: dtype = dtype('-inf')
-        max_amplitude_tetraspectrum: dtype = dtype('-inf')
-        max_phi_spectrum: dtype = dtype(-1.0)
-        max_phi_bispectrum: dtype = dtype(-1.0)
-        max_phi_trispectrum: dtype = dtype(-1.0)
-        max_phi_tetraspectrum: dtype = dtype(-1.0)
-
-        for phi in phi_array:
-        
-            P = np.cos(2*np.pi*freq*time + phi)
-
-            # Spectrum
-    
-            # x = SP
-            x = signal * P
-            # evaluated_x = mean(SP^2)
-            evaluated_spectrum = np.mean(x)
-
-            update_max: bool = evaluated_spectrum > max_amplitude_spectrum
-            max_amplitude_spectrum = evaluated_spectrum if update_max else max_amplitude_spectrum
-            max_phi_spectrum = phi if update_max else max_phi_spectrum
-
-            # Bispectrum
-            # x = S^2P
-            x = squared_signal * P
-            # evaluated_x = mean(S^2P)
-            evaluated_bispectrum = np.mean(x)
-
-            update_max: bool = evaluated_bispectrum > max_amplitude_bispectrum
-            max_amplitude_bispectrum = evaluated_bispectrum if update_max else max_amplitude_bispectrum
-            max_phi_bispectrum = phi if update_max else max_phi_bispectrum
-
-
-            # Trispectrum
-            # x = S^3P
-            x = cubed_signal * P
-            # evaluated_x = mean(S^3P)
-            evaluated_trispectrum = np.mean(x)
-
-            update_max: bool = evaluated_trispectrum > max_amplitude_trispectrum
-            max_amplitude_trispectrum = evaluated_trispectrum if update_max else max_amplitude_trispectrum
-            max_phi_trispectrum = phi if update_max else max_phi_trispectrum
-
-
-            # Tetraspectrum
-            # x = S^4P
-            x = tetra_signal * P
-            # evaluated_x = mean(S^3P)
-            evaluated_tetraspectrum = np.mean(x)
-
-            update_max: bool = evaluated_tetraspectrum > max_amplitude_tetraspectrum
-            max_amplitude_tetraspectrum = evaluated_tetraspectrum if update_max else max_amplitude_tetraspectrum
-            max_phi_tetraspectrum = phi if update_max else max_phi_tetraspectrum
-
-        spectrum[i] = max_amplitude_spectrum
-        phase_spectrum[i] = max_phi_spectrum
-        bispectrum[i] = max_amplitude_bispectrum*max_amplitude_spectrum
-        phase_bispectrum[i] = max_phi_bispectrum
-        trispectrum[i] = max_amplitude_trispectrum*max_amplitude_spectrum*max_amplitude_bispectrum
-        phase_trispectrum[i] = max_phi_trispectrum
-        tetraspectrum[i] = max_amplitude_trispectrum*max_amplitude_spectrum*max_amplitude_bispectrum*max_amplitude_tetraspectrum
-        phase_tetraspectrum[i] = max_phi_tetraspectrum
-
-        if enable_progress_bar:
-            bar.update(counter)
-            counter += counter_step
+    frequency_array, amplitude, phase = tdhos(
+        signal,
+        frequency_sampling,
+        time=time,
+        frequency_array=frequency_array,
+        fmin=fmin,
+        fmax=fmax,
+        freq_step=freq_step,
+        phase_step=phase_step,
+        dtype=dtype,
+        enable_progress_bar=enable_progress_bar,
+        engine=engine,
+        exact_phase=exact_phase,
+        max_memory_bytes=max_memory_bytes,
+        basis_cache=basis_cache,
+        n_jobs=n_jobs,
+        chunk_size=chunk_size,
+        tolerance=tolerance,
+        block_size=block_size,
+        telemetry=telemetry,
+        checkpoint=checkpoint,
+        checkpoint_block=checkpoint_block,
+        checkpoint_interval=checkpoint_interval,
+        orders=(1, 2, 3, 4)
+    )
 
     return (
-        frequency_array, 
-        spectrum, 
-        phase_spectrum, 
-        bispectrum, 
-        phase_bispectrum, 
-        trispectrum, 
-        phase_trispectrum, 
-        tetraspectrum, 
-        phase_tetraspectrum
+        frequency_array,
+        amplitude[0],
+        phase[0],
+        amplitude[1],
+        phase[1],
+        amplitude[2],
+        phase[2],
+        amplitude[3],
+        phase[3]
     )
-
-
-
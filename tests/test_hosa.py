@@ -0,0 +1,122 @@
+import numpy as np
+import pytest
+from high_order_spectra_analysis.benchmarks.suite import TOLERANCES, _implementation, available_engines, quadratic_phase_coupled
+from high_order_spectra_analysis.hosa.hosa import Tdhosa
+from high_order_spectra_analysis.hosa.shards import merge_shards
+from high_order_spectra_analysis.time_domain_bispectrum.bispectrum2d import full_plane, tdbs2d
+from high_order_spectra_analysis.time_domain_high_order_spectra.surrogates import surrogate_test
+from high_order_spectra_analysis.time_domain_high_order_spectra.tdhos import tdhos
+
+
+FREQUENCY_SAMPLING = 64.0
+GRID = dict(fmin=1.0, fmax=31.0, freq_step=0.5, phase_step=0.05)
+
+
+@pytest.fixture(scope="module")
+def signal():
+    return quadratic_phase_coupled(128, FREQUENCY_SAMPLING)
+
+
+@pytest.fixture(scope="module")
+def scan_reference(signal):
+    # The scan engine evaluates every phase of the grid directly, the baseline of every other engine
+    return {
+        function: np.array(_implementation(function, "scan", orders)(signal, FREQUENCY_SAMPLING, np.float64, **GRID))
+        for function, orders in (("tds", (1,)), ("tdbs", (1, 2)), ("tdhos", (1, 2, 3, 4)))
+    }
+
+
+@pytest.mark.parametrize("dtype", tuple(TOLERANCES))
+@pytest.mark.parametrize("engine", [engine for engine in available_engines() if engine != "scan"] + ["auto"])
+@pytest.mark.parametrize("function, orders", [("tds", (1,)), ("tdbs", (1, 2)), ("tdhos", (1, 2, 3, 4))])
+def test_engine_matches_scan(signal, scan_reference, function, orders, engine, dtype):
+    reference = scan_reference[function]
+    amplitudes = _implementation(function, engine, orders)(signal, FREQUENCY_SAMPLING, getattr(np, dtype), **GRID)
+
+    error = np.max(np.abs(np.array(amplitudes, dtype=np.float64) - reference)/np.max(np.abs(reference), axis=-1, keepdims=True))
+
+    assert error <= TOLERANCES[dtype]
+
+
+def test_checkpoint_resume(signal, tmp_path):
+    path = tmp_path / "scan.ckpt"
+    options = dict(enable_progress_bar=False, engine="analytic", checkpoint_block=16, checkpoint_interval=0.0, **GRID)
+
+    expected = tdhos(signal, FREQUENCY_SAMPLING, enable_progress_bar=False, engine="analytic", **GRID)
+    tdhos(signal, FREQUENCY_SAMPLING, checkpoint=str(path), **options)
+
+    # An interrupted scan leaves its last record cut short
+    size = path.stat().st_size
+    with open(path, "r+b") as file:
+        file.truncate(size - 100)
+
+    resumed = tdhos(signal, FREQUENCY_SAMPLING, checkpoint=str(path), **options)
+
+    for expected_array, resumed_array in zip(expected, resumed):
+        np.testing.assert_array_equal(resumed_array, expected_array)
+
+    with pytest.raises(ValueError, match="other parameters"):
+        tdhos(signal, FREQUENCY_SAMPLING, checkpoint=str(path), **dict(options, phase_step=0.1))
+
+
+def test_merge_shards(signal, tmp_path):
+    hosa = Tdhosa(FREQUENCY_SAMPLING, enable_progress_bar=False, engine="analytic", orders=(1, 2), **GRID)
+    expected = hosa.run_tdhos(signal, orders=(1, 2))
+
+    for index in range(3):
+        hosa.run_shard(signal, str(tmp_path / f"{index}.shard.npz"), shard_index=index, shard_count=3, orders=(1, 2))
+
+    # A shard computed twice over the same frequencies is merged once
+    hosa.run_shard(signal, str(tmp_path / "again.shard.npz"), shard_index=1, shard_count=3, orders=(1, 2))
+
+    merged = merge_shards(str(tmp_path), str(tmp_path / "merged.npz"))
+
+    np.testing.assert_allclose(merged.amplitudes, np.array(expected[1]))
+    np.testing.assert_allclose(merged.frequency_array, expected[0])
+
+
+def test_merge_shards_overlap_and_gap(signal, tmp_path):
+    hosa = Tdhosa(FREQUENCY_SAMPLING, enable_progress_bar=False, engine="analytic", orders=(1, 2), **GRID)
+
+    hosa.run_shard(signal, str(tmp_path / "low.shard.npz"), frequency_range=(0.0, 10.0), orders=(1, 2))
+    hosa.run_shard(signal, str(tmp_path / "high.shard.npz"), frequency_range=(20.0, 40.0), orders=(1, 2))
+
+    with pytest.raises(ValueError, match="No shard covers"):
+        merge_shards(str(tmp_path), str(tmp_path / "merged.npz"))
+
+    hosa.run_shard(signal, str(tmp_path / "middle.shard.npz"), frequency_range=(5.0, 20.0), orders=(1, 2))
+
+    with pytest.raises(ValueError, match="overlapping"):
+        merge_shards(str(tmp_path), str(tmp_path / "merged.npz"))
+
+
+def test_surrogates_reproducible(signal):
+    options = dict(count=6, seed=3, enable_progress_bar=False, engine="analytic", orders=(1, 2), n_jobs=1, keep_null=True, **GRID)
+
+    first = surrogate_test(signal, FREQUENCY_SAMPLING, block_size=2, **options)
+    second = surrogate_test(signal, FREQUENCY_SAMPLING, block_size=4, **options)
+
+    assert first.seed == second.seed == 3
+    np.testing.assert_array_equal(first.null, second.null)
+    np.testing.assert_array_equal(first.p_value, second.p_value)
+    np.testing.assert_array_equal(first.threshold, second.threshold)
+
+
+def test_bispectrum2d_full_plane_symmetry(signal):
+    bispectrum = tdbs2d(signal, FREQUENCY_SAMPLING, segment_length=64, overlap=32, fmin=1.0, freq_step=1.0, enable_progress_bar=False)
+
+    axis, amplitude = full_plane(bispectrum)
+    _, phase = full_plane(bispectrum, "phase")
+    valid = np.isfinite(amplitude)
+
+    # B(f1, f2) = B(f2, f1) = conj(B(-f1, -f2))
+    np.testing.assert_array_equal(valid, valid.T)
+    np.testing.assert_allclose(amplitude[valid], amplitude.T[valid])
+    np.testing.assert_allclose(amplitude[valid], amplitude[::-1, ::-1][valid])
+    np.testing.assert_allclose(np.exp(1j*phase[valid]), np.exp(-1j*phase[::-1, ::-1][valid]))
+
+    # The principal domain reads back unchanged
+    kmax = len(axis)//2
+    rows = kmax + np.rint(bispectrum.f1/bispectrum.frequency_step).astype(int)
+    columns = kmax + np.rint(bispectrum.f2/bispectrum.frequency_step).astype(int)
+    np.testing.assert_allclose(amplitude[rows, columns], bispectrum.amplitude)